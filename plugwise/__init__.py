@@ -5,14 +5,22 @@ Plugwise backend module for Home Assistant Core.
 
 from __future__ import annotations
 
-from typing import cast
+import asyncio
+import inspect
+import time
+from typing import TYPE_CHECKING, Any, cast
 
 from plugwise.constants import (
+    BATCH_COMMANDS,
+    DEFAULT_COMMAND_CONCURRENCY,
     DEFAULT_LEGACY_TIMEOUT,
+    DEFAULT_MEMBER_CONCURRENCY,
     DEFAULT_PORT,
     DEFAULT_TIMEOUT,
     DEFAULT_USERNAME,
+    DEFAULT_XML_PARSER,
     DOMAIN_OBJECTS,
+    ID_PARAMETERS,
     LOGGER,
     MODULES,
     NONE,
@@ -21,7 +29,10 @@ from plugwise.constants import (
     STATE_ON,
     STATUS,
     SYSTEM,
+    BatchCommand,
+    CommandResult,
     GwEntityData,
+    MemberSwitchResult,
     ThermoLoc,
 )
 from plugwise.exceptions import (
@@ -29,18 +40,23 @@ from plugwise.exceptions import (
     DataMissingError,
     InvalidSetupError,
     PlugwiseError,
+    PlugwiseException,
     ResponseError,
     UnsupportedDeviceError,
 )
-from plugwise.legacy.smile import SmileLegacyAPI
+from plugwise.history import SensorHistory
 from plugwise.smile import SmileAPI
 from plugwise.smilecomm import SmileComm
 
-import aiohttp
 from defusedxml import ElementTree as etree
 from munch import Munch
 from packaging.version import Version, parse
 
+if TYPE_CHECKING:
+    from plugwise.legacy.smile import SmileLegacyAPI
+
+    import aiohttp
+
 
 class Smile(SmileComm):
     """The main Plugwise Smile API class."""
@@ -52,8 +68,13 @@ class Smile(SmileComm):
         websession: aiohttp.ClientSession,
         port: int = DEFAULT_PORT,
         username: str = DEFAULT_USERNAME,
+        *,
+        xml_parser: str = DEFAULT_XML_PARSER,
     ) -> None:
-        """Set the constructor for this class."""
+        """Set the constructor for this class.
+
+        The xml_parser selects the parser backend: defusedxml, or lxml when installed.
+        """
         self._timeout = DEFAULT_LEGACY_TIMEOUT
         super().__init__(
             host,
@@ -62,18 +83,25 @@ class Smile(SmileComm):
             self._timeout,
             username=username,
             websession=websession,
+            xml_parser=xml_parser,
         )
 
         self._cooling_present = False
         self._elga = False
+        self._last_full_update: float | None = None
         self._is_thermostat = False
         self._loc_data: dict[str, ThermoLoc] = {}
+        self._member_concurrency: int = DEFAULT_MEMBER_CONCURRENCY
         self._on_off_device = False
         self._opentherm_device = False
         self._schedule_old_states: dict[str, dict[str, str]] = {}
         self._smile_api: SmileAPI | SmileLegacyAPI
         self._stretch_v2 = False
         self._target_smile: str = NONE
+        self._write_coalesce_window = 0.0
+        self.command_concurrency: int = DEFAULT_COMMAND_CONCURRENCY
+        self.full_update_interval: float | None = None
+        self.history: SensorHistory | None = None
         self.smile: Munch = Munch()
         self.smile.anna_p1 = False
         self.smile.hostname = NONE
@@ -107,6 +135,39 @@ class Smile(SmileComm):
         """Return the item-count."""
         return self._smile_api.item_count
 
+    @property
+    def member_concurrency(self) -> int:
+        """Return the maximum number of group-members switched at the same time."""
+        return self._member_concurrency
+
+    @member_concurrency.setter
+    def member_concurrency(self, value: int) -> None:
+        """Set the maximum number of group-members switched at the same time, 1 for sequential switching.
+
+        Can be set before connecting, the gateway-API created by connect() takes it over.
+        """
+        self._member_concurrency = value
+        if hasattr(self, "_smile_api"):
+            self._smile_api.member_concurrency = value
+
+    @property
+    def member_switch_results(self) -> dict[str, MemberSwitchResult]:
+        """Return the per-member results of the latest group-switch: switched, locked or failed."""
+        return self._smile_api.member_switch_results
+
+    @property
+    def next_log_update(self) -> float | None:
+        """Return the number of seconds until new log-data is expected on the gateway."""
+        return self._smile_api.next_log_update
+
+    @property
+    def pending_updates(self) -> dict[str, list[str]]:
+        """Return the entity-items patched after a write, awaiting confirmation by the next update."""
+        if isinstance(self._smile_api, SmileAPI):
+            return self._smile_api.pending_updates
+
+        return {}
+
     @property
     def reboot(self) -> bool:
         """Return the reboot capability.
@@ -115,6 +176,22 @@ class Smile(SmileComm):
         """
         return not self.smile.legacy
 
+    @property
+    def write_coalesce_window(self) -> float:
+        """Return the window in seconds for combining repeated setpoint- and number-writes."""
+        return 0.0 if self.smile.legacy else self._write_coalesce_window
+
+    @write_coalesce_window.setter
+    def write_coalesce_window(self, value: float) -> None:
+        """Set the window for combining repeated writes, only the latest value is sent.
+
+        Not supported for legacy gateways. Can be set before connecting, the gateway-API
+        created by connect() takes it over.
+        """
+        self._write_coalesce_window = value
+        if hasattr(self, "_smile_api") and isinstance(self._smile_api, SmileAPI):
+            self._smile_api.write_coalesce_window = value
+
     async def connect(self) -> Version:
         """Connect to the Plugwise Gateway and determine its name, type, version, and other data."""
         result = await self._request(DOMAIN_OBJECTS)
@@ -151,36 +228,48 @@ class Smile(SmileComm):
         # Determine smile specifics
         await self._smile_detect(result, dsmrmain)
 
-        self._smile_api = (
-            SmileAPI(
-                self._cooling_present,
-                self._elga,
-                self._is_thermostat,
-                self._loc_data,
-                self._on_off_device,
-                self._opentherm_device,
-                self._request,
-                self._schedule_old_states,
-                self.smile,
-            )
-            if not self.smile.legacy
-            else SmileLegacyAPI(
-                self._is_thermostat,
-                self._loc_data,
-                self._on_off_device,
-                self._opentherm_device,
-                self._request,
-                self._stretch_v2,
-                self._target_smile,
-                self.smile,
+        if not self.smile.legacy:
+            self._smile_api = SmileAPI(_request=self._request, **self.api_config())
+            self._smile_api.write_coalesce_window = self._write_coalesce_window
+        else:
+            # Legacy support is only loaded for a legacy gateway
+            # pylint: disable-next=import-outside-toplevel
+            from plugwise.legacy.smile import SmileLegacyAPI  # noqa: PLC0415
+
+            self._smile_api = SmileLegacyAPI(
+                _request=self._request, **self.api_config()
             )
-        )
 
+        self._smile_api.member_concurrency = self._member_concurrency
         # Update all endpoints on first connect
         await self._smile_api.full_xml_update()
 
         return cast(Version, self.smile.version)
 
+    def api_config(self) -> dict[str, Any]:
+        """Return the detected gateway-specifics, the arguments for creating the gateway-API."""
+        if not self.smile.legacy:
+            return {
+                "_cooling_present": self._cooling_present,
+                "_elga": self._elga,
+                "_is_thermostat": self._is_thermostat,
+                "_loc_data": self._loc_data,
+                "_on_off_device": self._on_off_device,
+                "_opentherm_device": self._opentherm_device,
+                "_schedule_old_states": self._schedule_old_states,
+                "smile": self.smile,
+            }
+
+        return {
+            "_is_thermostat": self._is_thermostat,
+            "_loc_data": self._loc_data,
+            "_on_off_device": self._on_off_device,
+            "_opentherm_device": self._opentherm_device,
+            "_stretch_v2": self._stretch_v2,
+            "_target_smile": self._target_smile,
+            "smile": self.smile,
+        }
+
     async def _smile_detect(
         self, result: etree.Element, dsmrmain: etree.Element
     ) -> None:
@@ -339,16 +428,169 @@ class Smile(SmileComm):
         self.smile.legacy = True
         return return_model
 
+    def _fast_tier(self) -> bool:
+        """Determine if the fast polling tier applies, when tiered polling is enabled.
+
+        The full domain_objects refresh runs once per full_update_interval, counted from
+        the latest successful full update.
+        """
+        return (
+            self.full_update_interval is not None
+            and self._last_full_update is not None
+            and time.monotonic() - self._last_full_update < self.full_update_interval
+        )
+
     async def async_update(self) -> dict[str, GwEntityData]:
         """Update the Plughwise Gateway entities and their data and states."""
         data: dict[str, GwEntityData] = {}
         try:
-            data = await self._smile_api.async_update()
+            if isinstance(self._smile_api, SmileAPI):
+                fast = self._fast_tier()
+                data = await self._smile_api.async_update(
+                    fast=fast, offload=self.executor_offload
+                )
+                if not fast:
+                    self._last_full_update = time.monotonic()
+            else:
+                data = await self._smile_api.async_update()
         except (DataMissingError, KeyError) as err:
             raise PlugwiseError(f"No Plugwise data received: {err}") from err
 
+        if self.history is not None:
+            self.history.update(data)
+
         return data
 
+    async def async_refresh_entities(
+        self, entity_ids: list[str]
+    ) -> dict[str, GwEntityData]:
+        """Refresh the data of the given entities only, e.g. to confirm a write.
+
+        Legacy gateways perform a regular update instead.
+        """
+        try:
+            if isinstance(self._smile_api, SmileAPI):
+                return await self._smile_api.async_refresh_entities(entity_ids)
+
+            data = await self._smile_api.async_update()
+            return {entity_id: data[entity_id] for entity_id in entity_ids}
+        except (DataMissingError, KeyError) as err:
+            raise PlugwiseError(f"No Plugwise data received: {err}") from err
+
+    async def async_fetch_xml(self) -> dict[str, str]:
+        """Fetch the unparsed responses of a full update, see plugwise.fleet."""
+        return {
+            command: await self._request(command, raw=True)
+            for command in self._smile_api.xml_commands()
+        }
+
+    def _check_command(self, command: BatchCommand) -> str | None:
+        """Validate a batch-command against the present data, return the error or None."""
+        name = command.get("command")
+        args = command.get("args", {})
+        if name not in BATCH_COMMANDS:
+            return f"unsupported command {name}"
+        try:
+            inspect.signature(getattr(self, name)).bind(**args)
+        except TypeError as exc:
+            return f"{name}: {exc}"
+
+        entities = self._smile_api.gw_entities
+        known_ids = set(entities) | {
+            location
+            for entity in entities.values()
+            if (location := entity.get("location"))
+        }
+        for param in ID_PARAMETERS:
+            if param in args and args[param] not in known_ids:
+                return f"{name}: unknown {param} {args[param]}"
+        if unknown := [
+            member for member in args.get("members") or [] if member not in entities
+        ]:
+            return f"{name}: unknown members {', '.join(unknown)}"
+
+        if name == "set_preset":
+            presets = {
+                preset
+                for entity_id, entity in entities.items()
+                if args["loc_id"] in (entity_id, entity.get("location"))
+                for preset in entity.get("preset_modes") or []
+            }
+            if args["preset"] not in presets:
+                return f"{name}: invalid preset {args['preset']}"
+        if name == "set_switch_state" and args["state"] not in (STATE_OFF, STATE_ON):
+            return f"{name}: invalid state {args['state']}"
+
+        return None
+
+    async def _apply_command(
+        self, command: BatchCommand, semaphore: asyncio.Semaphore
+    ) -> CommandResult:
+        """Send a single batch-command, report the outcome instead of raising.
+
+        A switch-command switching no relay, all being locked, is not successful.
+        """
+        name = command["command"]
+        args = command.get("args", {})
+        switches: dict[str, MemberSwitchResult] | None = None
+        if name == "set_switch_state":
+            switches = {}
+            args = {**args, "results": switches}
+        async with semaphore:
+            try:
+                result = await getattr(self, name)(**args)
+            except PlugwiseException as exc:
+                return {
+                    "command": name,
+                    "error": str(exc),
+                    "result": None,
+                    "success": False,
+                    "switches": switches,
+                }
+
+        if switches and "switched" not in switches.values():
+            return {
+                "command": name,
+                "error": f"{name}: locked, not switched",
+                "result": result,
+                "success": False,
+                "switches": switches,
+            }
+
+        return {
+            "command": name,
+            "error": None,
+            "result": result,
+            "success": True,
+            "switches": switches,
+        }
+
+    async def apply_commands(
+        self, commands: list[BatchCommand], refresh: bool = True
+    ) -> list[CommandResult]:
+        """Apply a batch of set-commands, for instance a scene or an automation.
+
+        All commands are validated against the present data before anything is sent,
+        one invalid command raises a PlugwiseError. The commands are then sent with at most
+        command_concurrency requests at the same time, the results are returned per command
+        and in order. When refresh is True, one update is performed after the batch.
+        """
+        if errors := [
+            error for command in commands if (error := self._check_command(command))
+        ]:
+            raise PlugwiseError(f"Plugwise: invalid commands: {'; '.join(errors)}")
+
+        semaphore = asyncio.Semaphore(max(1, self.command_concurrency))
+        results = list(
+            await asyncio.gather(
+                *(self._apply_command(command, semaphore) for command in commands)
+            )
+        )
+        if refresh and any(result["success"] for result in results):
+            await self.async_update()
+
+        return results
+
     ########################################################################################################
     ###  API Set and HA Service-related Functions                                                        ###
     ########################################################################################################
@@ -382,6 +624,30 @@ class Smile(SmileComm):
                 f"Failed to set schedule state: {str(exc)}"
             ) from exc  # pragma no cover
 
+    async def set_schedule_states(
+        self,
+        loc_ids: list[str],
+        name: str | None = None,
+        state: int | str | None = None,
+    ) -> None:
+        """Activate/deactivate the Schedule, with the given name, for several locations at once.
+
+        Each schedule-rule is updated in a single request, legacy gateways have one location.
+        """
+        try:
+            if isinstance(self._smile_api, SmileAPI):
+                await self._smile_api.set_schedule_states(
+                    loc_ids, name=name, state=state
+                )
+                return
+
+            for loc_id in loc_ids:  # pragma: no cover
+                await self._smile_api.set_schedule_state(loc_id, name=name, state=state)
+        except ConnectionFailedError as exc:  # pragma no cover
+            raise ConnectionFailedError(
+                f"Failed to set schedule states: {str(exc)}"
+            ) from exc  # pragma no cover
+
     async def set_preset(self, loc_id: str, preset: str) -> None:
         """Set the given Preset on the relevant Thermostat."""
         try:
@@ -389,6 +655,23 @@ class Smile(SmileComm):
         except ConnectionFailedError as exc:
             raise ConnectionFailedError(f"Failed to set preset: {str(exc)}") from exc
 
+    async def set_presets(self, loc_ids: list[str], preset: str) -> None:
+        """Set the given Preset on the Thermostats of several locations, a request per location.
+
+        Legacy gateways have one location.
+        """
+        try:
+            if isinstance(self._smile_api, SmileAPI):
+                await self._smile_api.set_presets(loc_ids, preset)
+                return
+
+            for loc_id in loc_ids:  # pragma: no cover
+                await self._smile_api.set_preset(loc_id, preset)
+        except ConnectionFailedError as exc:  # pragma no cover
+            raise ConnectionFailedError(
+                f"Failed to set presets: {str(exc)}"
+            ) from exc  # pragma no cover
+
     async def set_temperature(self, loc_id: str, items: dict[str, float]) -> None:
         """Set the given Temperature on the relevant Thermostat."""
         try:
@@ -422,7 +705,13 @@ class Smile(SmileComm):
             ) from exc  # pragma no cover
 
     async def set_switch_state(
-        self, appl_id: str, members: list[str] | None, model: str, state: str
+        self,
+        appl_id: str,
+        members: list[str] | None,
+        model: str,
+        state: str,
+        *,
+        results: dict[str, MemberSwitchResult] | None = None,
     ) -> bool | None:
         """Set the given State of the relevant Switch.
 
@@ -430,13 +719,14 @@ class Smile(SmileComm):
           - True when switched to state on,
           - False when switched to state off,
           - the unchanged state when the switch is for instance locked.
+        The outcome per switch, or per group-member, is added to results when provided.
         """
         if state not in (STATE_OFF, STATE_ON):
             raise PlugwiseError("Invalid state supplied to set_switch_state")
 
         try:
             return await self._smile_api.set_switch_state(
-                appl_id, members, model, state
+                appl_id, members, model, state, results=results
             )
         except ConnectionFailedError as exc:
             raise ConnectionFailedError(
@@ -0,0 +1,27 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise command line: python -m plugwise profile <fixture-directory|host>
+"""
+
+import argparse
+
+from plugwise.profiling import add_arguments, profile
+
+
+def main() -> None:
+    """Parse the command line and run the command."""
+    parser = argparse.ArgumentParser(prog="python -m plugwise")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_arguments(
+        commands.add_parser(
+            "profile",
+            help="profile connect() and async_update() under cProfile, a stack-sampler and tracemalloc",
+        )
+    )
+    args = parser.parse_args()
+    if args.command == "profile":
+        profile(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise columnar snapshots: the entities of a fleet as typed columns, one row per entity.
+
+The columns are standard-library arrays: compact, and shared without copying with NumPy
+(numpy.frombuffer) and Arrow (pyarrow.py_buffer), both optional.
+"""
+
+from __future__ import annotations
+
+from array import array
+import math
+import sys
+from typing import Any
+
+from plugwise.constants import DATA_DICTS, GwEntityData
+from plugwise.exceptions import PlugwiseError
+
+# Typecodes: the values, and the codes of the dictionary-encoded text-columns
+VALUE_TYPECODE = "d"
+CODE_TYPECODE = "i"
+
+
+class ColumnarSnapshot:
+    """The entities of one or more gateways, as columns.
+
+    Per row: the gateway and the dev_class as codes into their categories, the entity-id,
+    and a float per value-column. A value-column is named after its data-dict and key,
+    e.g. "sensors.temperature" or "thermostat.setpoint"; booleans are 0.0 or 1.0 and an
+    absent value is NaN.
+    """
+
+    def __init__(self, snapshots: dict[str, dict[str, GwEntityData]]) -> None:
+        """Set the constructor for this class, from e.g. the result of Fleet.async_update()."""
+        self.dev_class_categories: list[str] = []
+        self.dev_class_codes = array(CODE_TYPECODE)
+        self.entity_ids: list[str] = []
+        self.gateway_categories: list[str] = []
+        self.gateway_codes = array(CODE_TYPECODE)
+        self.columns: dict[str, array[float]] = {}
+
+        dev_classes: dict[str, int] = {}
+        cells: dict[str, list[tuple[int, float]]] = {}
+        row = 0
+        for gateway, entities in snapshots.items():
+            self.gateway_codes.extend([len(self.gateway_categories)] * len(entities))
+            self.gateway_categories.append(sys.intern(gateway))
+            for entity_id, entity in entities.items():
+                dev_class = entity.get("dev_class", "")
+                if (code := dev_classes.get(dev_class)) is None:
+                    code = dev_classes[dev_class] = len(self.dev_class_categories)
+                    self.dev_class_categories.append(sys.intern(dev_class))
+                self.dev_class_codes.append(code)
+                self.entity_ids.append(sys.intern(entity_id))
+                for data_dict in DATA_DICTS:
+                    for key, value in entity.get(data_dict, {}).items():  # type: ignore[attr-defined]
+                        if isinstance(value, bool | int | float):
+                            name = sys.intern(f"{data_dict}.{key}")
+                            cells.setdefault(name, []).append((row, float(value)))
+                row += 1
+
+        empty = array(VALUE_TYPECODE, [math.nan]) * row
+        for name in sorted(cells):
+            column = self.columns[name] = array(VALUE_TYPECODE, empty)
+            for index, value in cells[name]:
+                column[index] = value
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self.entity_ids)
+
+    @property
+    def dev_classes(self) -> list[str]:
+        """Return the dev_class of each row."""
+        return [self.dev_class_categories[code] for code in self.dev_class_codes]
+
+    @property
+    def gateways(self) -> list[str]:
+        """Return the gateway of each row."""
+        return [self.gateway_categories[code] for code in self.gateway_codes]
+
+    def dev_class_mask(self, dev_class: str) -> list[bool]:
+        """Return per row whether the entity is of the dev_class."""
+        if dev_class not in self.dev_class_categories:
+            return [False] * len(self)
+        code = self.dev_class_categories.index(dev_class)
+        return [item == code for item in self.dev_class_codes]
+
+    def to_numpy(self) -> dict[str, Any]:
+        """Return the value-columns and the codes as NumPy arrays, sharing the memory."""
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            import numpy as np  # noqa: PLC0415
+        except ImportError as exc:
+            raise PlugwiseError("Plugwise: to_numpy() requires numpy") from exc
+
+        result: dict[str, Any] = {
+            "gateway": np.frombuffer(self.gateway_codes, dtype=np.int32),
+            "dev_class": np.frombuffer(self.dev_class_codes, dtype=np.int32),
+        }
+        for name, column in self.columns.items():
+            result[name] = np.frombuffer(column, dtype=np.float64)
+        return result
+
+    def to_arrow(self) -> Any:
+        """Return an Arrow table, the text-columns dictionary-encoded, sharing the memory."""
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            import pyarrow as pa  # noqa: PLC0415
+        except ImportError as exc:
+            raise PlugwiseError("Plugwise: to_arrow() requires pyarrow") from exc
+
+        rows = len(self)
+
+        def codes(buffer: array[int], categories: list[str]) -> Any:
+            indices = pa.Array.from_buffers(
+                pa.int32(), rows, [None, pa.py_buffer(buffer)]
+            )
+            return pa.DictionaryArray.from_arrays(
+                indices, pa.array(categories, pa.string())
+            )
+
+        arrays = {
+            "gateway": codes(self.gateway_codes, self.gateway_categories),
+            "entity_id": pa.array(self.entity_ids, pa.string()),
+            "dev_class": codes(self.dev_class_codes, self.dev_class_categories),
+        }
+        for name, column in self.columns.items():
+            arrays[name] = pa.Array.from_buffers(
+                pa.float64(), rows, [None, pa.py_buffer(column)]
+            )
+        return pa.table(arrays)
@@ -5,10 +5,13 @@ Plugwise Smile protocol helpers.
 
 from __future__ import annotations
 
-from typing import cast
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, cast
 
 from plugwise.constants import (
     ANNA,
+    DEFAULT_MEMBER_CONCURRENCY,
     DHW_SETPOINT,
     GROUP_TYPES,
     NONE,
@@ -18,11 +21,15 @@ from plugwise.constants import (
     ActuatorData,
     ApplianceType,
     GwEntityData,
+    MemberSwitchResult,
     ModuleData,
 )
+from plugwise.exceptions import PlugwiseException
 from plugwise.util import (
     check_heater_central,
     check_model,
+    count_data_items,
+    expected_log_update,
     get_vendor_name,
     return_valid,
 )
@@ -54,11 +61,14 @@ class SmileCommon:
     def __init__(self) -> None:
         """Init."""
         self._cooling_present: bool
-        self._count: int
+        self._item_count: int | None = None
         self._domain_objects: etree.Element
         self._heater_id: str = NONE
         self._on_off_device: bool
+        self._request: Callable[..., Awaitable[Any]]
         self.gw_entities: dict[str, GwEntityData] = {}
+        self.member_concurrency: int = DEFAULT_MEMBER_CONCURRENCY
+        self.member_switch_results: dict[str, MemberSwitchResult] = {}
         self.smile: Munch
 
     @property
@@ -66,6 +76,33 @@ class SmileCommon:
         """Return the heater-id."""
         return self._heater_id
 
+    @property
+    def item_count(self) -> int:
+        """Return the item-count.
+
+        Computed from the collected gw_entities on first request after an update.
+        """
+        if self._item_count is None:
+            self._item_count = sum(
+                count_data_items(entity) for entity in self.gw_entities.values()
+            )
+
+        return self._item_count
+
+    @property
+    def next_log_update(self) -> float | None:
+        """Return the number of seconds until new log-data is expected on the gateway."""
+        waits = [
+            wait
+            for xml in self._log_sources()
+            if (wait := expected_log_update(xml)) is not None
+        ]
+        return min(waits, default=None)
+
+    def _log_sources(self) -> list[etree.Element]:
+        """Return the XML-data containing the point- and interval-logs."""
+        return [self._domain_objects]
+
     def check_name(self, name: str) -> bool:
         """Helper-function checking the smile-name.
 
@@ -149,7 +186,6 @@ class SmileCommon:
     def _create_gw_entities(self, appl: Munch) -> None:
         """Helper-function for creating/updating gw_entities."""
         self.gw_entities[appl.entity_id] = {"dev_class": appl.pwclass}
-        self._count += 1
         for key, value in {
             "available": appl.available,
             "firmware": appl.firmware,
@@ -165,7 +201,6 @@ class SmileCommon:
             if value is not None or key == "location":
                 appl_key = cast(ApplianceType, key)
                 self.gw_entities[appl.entity_id][appl_key] = value
-                self._count += 1
 
     def _reorder_devices(self) -> None:
         """Place the gateway and optional heater_central devices as 1st and 2nd."""
@@ -185,10 +220,10 @@ class SmileCommon:
         if entity["dev_class"] in SWITCH_GROUP_TYPES:
             counter = 0
             for member in entity["members"]:
-                if self.gw_entities[member]["switches"].get("relay"):
+                # A member without data, e.g. removed from the gateway, has no relay-state
+                if self.gw_entities[member].get("switches", {}).get("relay"):
                     counter += 1
             entity["switches"]["relay"] = counter != 0
-            self._count += 1
 
     def _get_groups(self) -> None:
         """Helper-function for smile.py: get_all_gateway_entities().
@@ -217,7 +252,6 @@ class SmileCommon:
                     "members": members,
                     "vendor": "Plugwise",
                 }
-                self._count += 5
 
     def _collect_members(self, element: etree.Element) -> list[str]:
         """Check and collect members."""
@@ -229,6 +263,43 @@ class SmileCommon:
 
         return members
 
+    async def _switch_members(
+        self,
+        uris: dict[str, str | None],
+        data: str,
+        results: dict[str, MemberSwitchResult],
+    ) -> int:
+        """Helper-function for _set_groupswitch_member_state().
+
+        Send the switch-command to each unlocked member (a member without uri is locked),
+        at most member_concurrency at the same time, a concurrency of 1 switches sequentially.
+        Collect the per-member results in results and in member_switch_results, return the number of switched members.
+        A failing member does not stop the others, the first error is raised when none switched.
+        """
+        errors: list[PlugwiseException] = []
+        semaphore = asyncio.Semaphore(max(1, self.member_concurrency))
+
+        async def switch_member(uri: str | None) -> MemberSwitchResult:
+            if uri is None:
+                return "locked"
+
+            async with semaphore:
+                try:
+                    await self._request(uri, method="put", data=data)
+                except PlugwiseException as exc:
+                    errors.append(exc)
+                    return "failed"
+
+            return "switched"
+
+        outcomes = await asyncio.gather(*(switch_member(uri) for uri in uris.values()))
+        self.member_switch_results = dict(zip(uris, outcomes, strict=True))
+        results.update(self.member_switch_results)
+        if errors and "switched" not in outcomes:
+            raise errors[0]
+
+        return outcomes.count("switched")
+
     def _get_lock_state(
         self, xml: etree.Element, data: GwEntityData, stretch_v2: bool = False
     ) -> None:
@@ -245,7 +316,6 @@ class SmileCommon:
             locator = f"./{actuator}/{func_type}/lock"
             if (found := xml.find(locator)) is not None:
                 data["switches"]["lock"] = found.text == "true"
-                self._count += 1
 
     def _get_module_data(
         self,
@@ -298,21 +368,16 @@ class SmileCommon:
         """Update the dhw_temperature and boiler_temperature dicts with a current key."""
         if item == DHW_SETPOINT:
             item = "dhw_temperature"
-            if DHW_SETPOINT in data["sensors"]:
-                data["sensors"].pop(DHW_SETPOINT)
-                self._count -= 1
+            data["sensors"].pop(DHW_SETPOINT, None)
             # Use dhw_temperature when available, otherwise use water_temperature
             if "dhw_temperature" in data["sensors"]:
                 temp_dict["current"] = data["sensors"]["dhw_temperature"]
-                self._count += 1
             elif "water_temperature" in data["sensors"]:
                 temp_dict["current"] = data["sensors"]["water_temperature"]
-                self._count += 1
 
         if item == "maximum_boiler_temperature":
             item = "boiler_temperature"
             if "water_temperature" in data["sensors"]:
                 temp_dict["current"] = data["sensors"]["water_temperature"]
-                self._count += 1
 
         return item, temp_dict
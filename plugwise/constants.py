@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from collections import namedtuple
 import logging
-from typing import Final, Literal, TypedDict, get_args
+from typing import Any, Final, Literal, TypedDict, get_args
 
 LOGGER = logging.getLogger(__name__)
 
@@ -39,9 +39,23 @@ ANNA_P1: Final = "Smile Anna P1"
 DEFAULT_TIMEOUT: Final = 10
 DEFAULT_LEGACY_TIMEOUT: Final = 30
 DEFAULT_USERNAME: Final = "smile"
+DEFAULT_XML_PARSER: Final = "defusedxml"
 DEFAULT_PORT: Final = 80
+DEFAULT_COMMAND_CONCURRENCY: Final = 2
+DEFAULT_CONNECTION_LIMIT: Final = 2
+DEFAULT_DNS_CACHE_TTL: Final = 300
+DEFAULT_ENERGY_MAX_GAP: Final = 900.0
+DEFAULT_ENERGY_RESOLUTION: Final = 300
+DEFAULT_ENERGY_WINDOWS: Final[tuple[int, ...]] = (3600, 86400)
+DEFAULT_KEEPALIVE_TIMEOUT: Final = 15.0
+DEFAULT_MEMBER_CONCURRENCY: Final = 4
 DEFAULT_PW_MAX: Final = 30.0
 DEFAULT_PW_MIN: Final = 4.0
+DEFAULT_HISTORY_SIZE: Final = 360
+DEFAULT_HUB_QUEUE_SIZE: Final = 16
+DEFAULT_POLL_MARGIN: Final = 2.0
+DEFAULT_POLL_MAX: Final = 300.0
+DEFAULT_POLL_MIN: Final = 5.0
 DHW_SETPOINT: Final = "domestic_hot_water_setpoint"
 FAKE_APPL: Final = "aaaa0000aaaa0000aaaa0000aaaa00aa"
 FAKE_LOC: Final = "0000aaaa0000aaaa0000aaaa0000aa00"
@@ -139,6 +153,13 @@ P1_LEGACY_MEASUREMENTS: Final[dict[str, UOM]] = {
     "electricity_produced": UOM(POWER_WATT),
     "gas_consumed": UOM(VOLUME_CUBIC_METERS),
 }
+# The log types in the order of collection, of the same measurement the last one found is kept
+P1_LOG_TYPES: Final[tuple[str, ...]] = ("point_log", "cumulative_log", "interval_log")
+P1_LEGACY_LOG_TYPES: Final[tuple[str, ...]] = (
+    "interval_meter",
+    "cumulative_meter",
+    "point_meter",
+)
 # Thermostat and Plug/Stretch related measurements
 # Excluded:
 # zone_thermosstat: 'temperature_offset'
@@ -314,6 +335,19 @@ BinarySensorType = Literal[
 ]
 BINARY_SENSORS: Final[tuple[str, ...]] = get_args(BinarySensorType)
 
+# Dict-type GwEntityData items, their items are counted separately
+DATA_DICTS: Final[tuple[str, ...]] = (
+    "binary_sensors",
+    "boiler_temperature",
+    "dhw_temperature",
+    "max_dhw_temperature",
+    "maximum_boiler_temperature",
+    "sensors",
+    "switches",
+    "temperature_offset",
+    "thermostat",
+)
+
 GROUP_TYPES: Final[tuple[str, ...]] = ("pumping", "report", "switching")
 
 SensorType = Literal[
@@ -377,6 +411,12 @@ SPECIAL_PLUG_TYPES: Final[tuple[str, ...]] = (
     "valve_actuator",
 )
 
+MemberSwitchResult = Literal[
+    "failed",
+    "locked",
+    "switched",
+]
+
 SpecialType = Literal[
     "c_heating_state",
     "thermostat_supports_cooling",
@@ -412,6 +452,53 @@ TOGGLES: Final[dict[str, ToggleNameType]] = {
     "domestic_hot_water_comfort_mode": "dhw_cm_switch",
 }
 
+# Set-functions accepted by Smile.apply_commands()
+BATCH_COMMANDS: Final[tuple[str, ...]] = (
+    "set_gateway_mode",
+    "set_number",
+    "set_preset",
+    "set_regulation_mode",
+    "set_select",
+    "set_switch_state",
+    "set_temperature",
+    "set_temperature_offset",
+)
+
+# Id-arguments of the batch-commands, validated against the known entities and locations
+ID_PARAMETERS: Final[tuple[str, ...]] = ("appl_id", "dev_id", "loc_id")
+
+# Sensors tracked by the optional SensorHistory
+HISTORY_SENSORS: Final[tuple[str, ...]] = (
+    "electricity_consumed",
+    "electricity_consumed_off_peak_point",
+    "electricity_consumed_peak_point",
+    "electricity_consumed_point",
+    "electricity_produced",
+    "electricity_produced_off_peak_point",
+    "electricity_produced_peak_point",
+    "electricity_produced_point",
+    "net_electricity_point",
+    "outdoor_temperature",
+    "temperature",
+)
+
+# Sensors only increasing, exported as counters; the net values can decrease
+COUNTER_SENSORS: Final[tuple[str, ...]] = (
+    "electricity_consumed_off_peak_cumulative",
+    "electricity_consumed_peak_cumulative",
+    "electricity_produced_off_peak_cumulative",
+    "electricity_produced_peak_cumulative",
+    "gas_consumed_cumulative",
+)
+# Power sensors integrated by the EnergyAggregator, of the entities also logging them as interval
+ENERGY_POWER_SENSORS: Final[tuple[str, ...]] = (
+    "electricity_consumed",
+    "electricity_produced",
+)
+OPENMETRICS_CONTENT_TYPE: Final = (
+    "application/openmetrics-text; version=1.0.0; charset=utf-8"
+)
+
 ZONE_THERMOSTATS: Final[tuple[str, ...]] = (
     "thermostat",
     "thermostatic_radiator_valve",
@@ -420,6 +507,23 @@ ZONE_THERMOSTATS: Final[tuple[str, ...]] = (
 )
 
 
+class BatchCommand(TypedDict):
+    """Batch-command for Smile.apply_commands(): a set-function and its keyword-arguments."""
+
+    command: str
+    args: dict[str, Any]
+
+
+class CommandResult(TypedDict):
+    """Result of a batch-command, the switch-commands report the outcome per relay or member."""
+
+    command: str
+    error: str | None
+    result: Any
+    success: bool
+    switches: dict[str, MemberSwitchResult] | None
+
+
 class ModuleData(TypedDict):
     """The Module data class."""
 
@@ -26,6 +26,7 @@ class SmileData(SmileHelper):
     def __init__(self) -> None:
         """Init."""
         super().__init__()
+        self._low_battery_macs: list[str] = []
         self._zones: dict[str, GwEntityData] = {}
 
     def _all_entity_data(self) -> None:
@@ -53,37 +54,55 @@ class SmileData(SmileHelper):
         """
         mac_list: list[str] = []
         for entity_id, entity in self.gw_entities.items():
-            self._get_entity_data(entity_id, entity)
-            if entity_id == self._gateway_id:
-                mac_list = self._detect_low_batteries()
-                self._add_or_update_notifications(entity_id, entity)
-
-            is_battery_low = (
-                mac_list
-                and "low_battery" in entity["binary_sensors"]
-                and entity["zigbee_mac_address"] in mac_list
-                and entity["dev_class"]
-                in (
-                    "thermo_sensor",
-                    "thermostatic_radiator_valve",
-                    "zone_thermometer",
-                    "zone_thermostat",
-                )
+            mac_list = self._update_gw_entity(entity_id, entity, mac_list)
+
+    def _update_gw_entity(
+        self,
+        entity_id: str,
+        entity: GwEntityData,
+        mac_list: list[str],
+        refresh: bool = False,
+    ) -> list[str]:
+        """Helper-function for _update_gw_entities() and refresh_entities().
+
+        Collect data for a single entity, return the (updated) low-battery mac-list.
+        The battery-messages are consumed by the full update, a refresh reuses its mac-list.
+        """
+        self._get_entity_data(entity_id, entity)
+        if entity_id == self._gateway_id:
+            if not refresh:
+                self._low_battery_macs = self._detect_low_batteries()
+            mac_list = self._low_battery_macs
+            self._add_or_update_notifications(entity_id, entity)
+
+        is_battery_low = (
+            mac_list
+            and "low_battery" in entity["binary_sensors"]
+            and entity["zigbee_mac_address"] in mac_list
+            and entity["dev_class"]
+            in (
+                "thermo_sensor",
+                "thermostatic_radiator_valve",
+                "zone_thermometer",
+                "zone_thermostat",
             )
-            if is_battery_low:
-                entity["binary_sensors"]["low_battery"] = True
+        )
+        if is_battery_low:
+            entity["binary_sensors"]["low_battery"] = True
 
-            self._update_for_cooling(entity)
+        self._update_for_cooling(entity)
 
-            remove_empty_platform_dicts(entity)
+        remove_empty_platform_dicts(entity)
 
-            # Replace select_dhw_mode with dhw_mode when applicable
-            if (
-                "dhw_temperature" in entity
-                and (mode := entity.get("select_dhw_mode")) is not None
-            ):
-                entity.pop("select_dhw_mode")
-                entity["dhw_mode"] = mode
+        # Replace select_dhw_mode with dhw_mode when applicable
+        if (
+            "dhw_temperature" in entity
+            and (mode := entity.get("select_dhw_mode")) is not None
+        ):
+            entity.pop("select_dhw_mode")
+            entity["dhw_mode"] = mode
+
+        return mac_list
 
     def _detect_low_batteries(self) -> list[str]:
         """Helper-function updating the low-battery binary_sensor status from a Battery-is-low message."""
@@ -124,7 +143,6 @@ class SmileData(SmileHelper):
                     {"plugwise_notification": bool(self._notifications)}
                 )
                 entity.update({"notifications": self._notifications})
-                self._count += 2
 
     def _update_for_cooling(self, entity: GwEntityData) -> None:
         """Helper-function for adding/updating various cooling-related values."""
@@ -144,21 +162,14 @@ class SmileData(SmileHelper):
                     "setpoint_low": MIN_SETPOINT,
                     "setpoint_high": thermostat["setpoint"],
                 }
-            thermostat.pop("setpoint")  # Add 2 keys, remove 1
+            thermostat.pop("setpoint")
             temp_dict.update(thermostat)
             entity["thermostat"] = temp_dict
 
             sensors = entity["sensors"]
             sensors["setpoint_low"] = temp_dict["setpoint_low"]
             sensors["setpoint_high"] = temp_dict["setpoint_high"]
-            # Add 2 more keys, remove 1 when required
-            if "setpoint" in sensors:
-                sensors.pop("setpoint")
-                self._count -= 1
-
-            self._count += (
-                3  # add 4 total, remove 1, count the conditional remove separately
-            )
+            sensors.pop("setpoint", None)
 
     def _get_location_data(self, loc_id: str, zone: GwEntityData) -> None:
         """Helper-function for _all_entity_data() and async_update().
@@ -169,7 +180,6 @@ class SmileData(SmileHelper):
         self._regulation_control(zone)
 
         zone["control_state"] = "idle"
-        self._count += 1
         if (ctrl_state := self._control_state(zone)) and ctrl_state in (
             "cooling",
             "heating",
@@ -179,7 +189,6 @@ class SmileData(SmileHelper):
 
         if "setpoint" in zone["sensors"]:
             zone["sensors"].pop("setpoint")  # remove, only used in _control_state()
-            self._count -= 1
 
         # Thermostat data (presets, temperatures etc)
         self._climate_data(loc_id, zone)
@@ -221,7 +230,6 @@ class SmileData(SmileHelper):
         """
         if entity["dev_class"] == dev_class:
             entity["available"] = True
-            self._count += 1
             for item in self._notifications.values():
                 for msg in item.values():
                     if message in msg:
@@ -246,16 +254,13 @@ class SmileData(SmileHelper):
                 and self._cooling_present
             ):
                 entity["binary_sensors"]["cooling_enabled"] = self._cooling_enabled
-                self._count += 1
 
         # Show the allowed regulation_modes and gateway_modes
         if entity["dev_class"] == "gateway":
             if self._reg_allowed_modes:
                 entity["regulation_modes"] = self._reg_allowed_modes
-                self._count += 1
             if self._gw_allowed_modes:
                 entity["gateway_modes"] = self._gw_allowed_modes
-                self._count += 1
 
     def _climate_data(self, location_id: str, entity: GwEntityData) -> None:
         """Helper-function for _get_entity_data().
@@ -269,7 +274,6 @@ class SmileData(SmileHelper):
         # Presets
         entity["preset_modes"] = None
         entity["active_preset"] = None
-        self._count += 2
         if presets := self._presets(loc_id):
             entity["preset_modes"] = list(presets)
             entity["active_preset"] = self._preset(loc_id)
@@ -277,7 +281,6 @@ class SmileData(SmileHelper):
         # Schedule
         entity["available_schedules"] = [OFF]
         entity["select_schedule"] = OFF
-        self._count += 2
         avail_schedules, sel_schedule = self._schedules(loc_id)
         if avail_schedules != [OFF]:
             entity["available_schedules"] = avail_schedules
@@ -285,7 +288,6 @@ class SmileData(SmileHelper):
 
         # Set HA climate HVACMode: auto, heat, heat_cool, cool and off
         entity["climate_mode"] = "auto"
-        self._count += 1
         if sel_schedule == OFF:
             entity["climate_mode"] = "heat"
             if self._cooling_present:
@@ -310,7 +312,6 @@ class SmileData(SmileHelper):
     def _get_anna_control_state(self, data: GwEntityData) -> None:
         """Set the thermostat control_state based on the opentherm/onoff device state."""
         data["control_state"] = "idle"
-        self._count += 1
         for entity in self.gw_entities.values():
             if entity["dev_class"] != "heater_central":
                 continue
@@ -0,0 +1,275 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise energy aggregation: tumbling and sliding window totals, per entity and per fleet,
+maintained incrementally from successive snapshots.
+"""
+
+from __future__ import annotations
+
+from array import array
+import math
+import time
+
+from plugwise.constants import (
+    COUNTER_SENSORS,
+    DEFAULT_ENERGY_MAX_GAP,
+    DEFAULT_ENERGY_RESOLUTION,
+    DEFAULT_ENERGY_WINDOWS,
+    ENERGY_POWER_SENSORS,
+    GwEntityData,
+)
+
+WATT_SECONDS_PER_KWH = 3_600_000.0
+
+# Series-key: gateway, entity-id and sensor
+SeriesKey = tuple[str, str, str]
+
+
+class EnergyWindows:
+    """Tumbling and sliding window totals of an energy series.
+
+    The energy is kept per slot of the resolution, in a ring covering twice the longest
+    window: the previous period of a tumbling window starts up to that far back.
+    A sliding window is a running sum over its last slots, including the current one. A
+    tumbling window is the total of its current, partial, period and of the previous one.
+    Adding energy costs O(1) per slot it is spread over, advancing O(1) per elapsed slot.
+    The slots and periods are aligned to local time, given as a fixed offset from UTC.
+    """
+
+    def __init__(
+        self,
+        windows: tuple[int, ...] = DEFAULT_ENERGY_WINDOWS,
+        resolution: int = DEFAULT_ENERGY_RESOLUTION,
+        utc_offset: int = 0,
+    ) -> None:
+        """Set the constructor for this class."""
+        if not windows or any(
+            window < resolution or window % resolution for window in windows
+        ):
+            raise ValueError("Energy windows must be multiples of the resolution")
+
+        self._lengths = {window: window // resolution for window in windows}
+        self._offset = utc_offset
+        self._resolution = resolution
+        self._size = 2 * max(self._lengths.values())
+        self._ring = array("d", [0.0]) * self._size
+        self._slot: int | None = None
+        self._sums = dict.fromkeys(windows, 0.0)
+        self._period = dict.fromkeys(windows, 0)
+        self._current = dict.fromkeys(windows, 0.0)
+        self._previous = dict.fromkeys(windows, 0.0)
+
+    def _slot_of(self, timestamp: float) -> int:
+        """Return the slot of a timestamp."""
+        return math.floor((timestamp + self._offset) / self._resolution)
+
+    def _start_of(self, slot: int) -> float:
+        """Return the timestamp at which a slot starts."""
+        return float(slot * self._resolution - self._offset)
+
+    def _advance_to(self, slot: int) -> None:
+        """Make a slot the current one, expire the slots leaving the sliding windows."""
+        if self._slot is None or slot - self._slot >= self._size:
+            self._ring = array("d", [0.0]) * self._size
+            self._sums = dict.fromkeys(self._sums, 0.0)
+        else:
+            for next_slot in range(self._slot + 1, slot + 1):
+                for window, length in self._lengths.items():
+                    self._sums[window] -= self._ring[(next_slot - length) % self._size]
+                self._ring[next_slot % self._size] = 0.0
+                # Limit floating point drift of the running sums, once per ring cycle
+                if next_slot % self._size == 0:
+                    for window, length in self._lengths.items():
+                        self._sums[window] = math.fsum(
+                            self._ring[(next_slot - i) % self._size]
+                            for i in range(length)
+                        )
+
+        for window, length in self._lengths.items():
+            if (period := slot // length) != self._period[window]:
+                follows = self._slot is not None and period == self._period[window] + 1
+                self._previous[window] = self._current[window] if follows else 0.0
+                self._current[window] = 0.0
+                self._period[window] = period
+
+        self._slot = slot
+
+    def _add_to_slot(self, slot: int, energy: float) -> None:
+        """Add energy to a slot, to the windows still covering it."""
+        if (current := self._slot) is None or slot > current:
+            self._advance_to(slot)
+            current = slot
+
+        age = current - slot
+        if age < self._size:
+            self._ring[slot % self._size] += energy
+        for window, length in self._lengths.items():
+            if age < length:
+                self._sums[window] += energy
+            period = slot // length
+            if period == self._period[window]:
+                self._current[window] += energy
+            elif period == self._period[window] - 1:
+                self._previous[window] += energy
+
+    def advance(self, timestamp: float) -> None:
+        """Move the windows to a timestamp, without adding energy."""
+        slot = self._slot_of(timestamp)
+        if self._slot is None or slot > self._slot:
+            self._advance_to(slot)
+
+    def add(self, start: float, end: float, energy: float) -> None:
+        """Add the energy of a period, spread evenly over the slots it covers."""
+        last = self._slot_of(end)
+        # The part of a long period before the ring counts in no window
+        if (clipped := self._start_of(last - self._size + 1)) > start:
+            energy *= (end - clipped) / (end - start)
+            start = clipped
+        if (first := self._slot_of(start)) == last or end <= start:
+            self._add_to_slot(last, energy)
+            return
+
+        rate = energy / (end - start)
+        for slot in range(first, last + 1):
+            begin = max(start, self._start_of(slot))
+            if (finish := min(end, self._start_of(slot + 1))) > begin:
+                self._add_to_slot(slot, rate * (finish - begin))
+
+    def sliding(self, window: int) -> float:
+        """Return the total of a sliding window, as of the latest update."""
+        return self._sums[window]
+
+    def tumbling(self, window: int) -> tuple[float, float]:
+        """Return the start-timestamp and the total of the current period of a window."""
+        start = self._start_of(self._period[window] * self._lengths[window])
+        return start, self._current[window]
+
+    def previous(self, window: int) -> tuple[float, float]:
+        """Return the start-timestamp and the total of the previous, completed, period."""
+        start = self._start_of((self._period[window] - 1) * self._lengths[window])
+        return start, self._previous[window]
+
+
+class EnergyAggregator:
+    """Energy totals per window, per entity and per fleet, from successive snapshots.
+
+    The cumulative counters give the energy between two polls exactly: a counter decreasing
+    was reset, or its meter replaced, and counts from zero again. After missed polls the
+    energy is spread over the time since the previous poll. The plugs and circles are
+    integrated from their power, in kWh: they only log the energy of the latest interval of
+    the gateway, without the length of it. A power-gap longer than max_gap is not estimated.
+    Feed it the output of async_update(), per gateway.
+    """
+
+    def __init__(
+        self,
+        windows: tuple[int, ...] = DEFAULT_ENERGY_WINDOWS,
+        resolution: int = DEFAULT_ENERGY_RESOLUTION,
+        max_gap: float = DEFAULT_ENERGY_MAX_GAP,
+        utc_offset: int = 0,
+    ) -> None:
+        """Set the constructor for this class."""
+        EnergyWindows(windows, resolution, utc_offset)  # validate
+        self._fleet: dict[str, EnergyWindows] = {}
+        self._gateways: dict[str, set[SeriesKey]] = {}
+        self._latest: dict[SeriesKey, tuple[float, float]] = {}
+        self._max_gap = max_gap
+        self._resolution = resolution
+        self._series: dict[SeriesKey, EnergyWindows] = {}
+        self._utc_offset = utc_offset
+        self._windows = windows
+        self.gaps = 0
+        self.resets = 0
+
+    def _create_windows(self) -> EnergyWindows:
+        """Return new, empty, windows."""
+        return EnergyWindows(self._windows, self._resolution, self._utc_offset)
+
+    def _add(self, key: SeriesKey, start: float, end: float, energy: float) -> None:
+        """Add the energy of a period to the series and to the fleet-total."""
+        self._series[key].add(start, end, energy)
+        if (fleet := self._fleet.get(key[2])) is None:
+            fleet = self._fleet[key[2]] = self._create_windows()
+        fleet.add(start, end, energy)
+
+    def _track(
+        self, key: SeriesKey, timestamp: float, value: float
+    ) -> tuple[float, float] | None:
+        """Store the latest value, return the previous one when older."""
+        if (previous := self._latest.get(key)) is not None and timestamp <= previous[0]:
+            return None
+
+        self._latest[key] = (timestamp, value)
+        if key not in self._series:
+            self._series[key] = self._create_windows()
+            self._gateways.setdefault(key[0], set()).add(key)
+        self._series[key].advance(timestamp)
+        return previous
+
+    def _count(self, key: SeriesKey, timestamp: float, value: float) -> None:
+        """Add the increase of a cumulative counter."""
+        if (previous := self._track(key, timestamp, value)) is None:
+            return
+
+        if (energy := value - previous[1]) < 0:
+            self.resets += 1
+            energy = value
+        self._add(key, previous[0], timestamp, energy)
+
+    def _integrate(self, key: SeriesKey, timestamp: float, value: float) -> None:
+        """Add the energy of the power since the previous poll, trapezoidal."""
+        if (previous := self._track(key, timestamp, value)) is None:
+            return
+
+        if (period := timestamp - previous[0]) > self._max_gap:
+            self.gaps += 1
+            return
+        energy = (previous[1] + value) / 2 * period / WATT_SECONDS_PER_KWH
+        self._add(key, previous[0], timestamp, energy)
+
+    def update(
+        self,
+        entities: dict[str, GwEntityData],
+        timestamp: float | None = None,
+        gateway: str = "",
+    ) -> None:
+        """Add the energy since the previous snapshot of a gateway.
+
+        The series of the entities no longer present are dropped, their energy remains in
+        the fleet-totals.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        for entity_id, entity in entities.items():
+            if not (sensors := entity.get("sensors")):
+                continue
+
+            for sensor in COUNTER_SENSORS:
+                if isinstance(value := sensors.get(sensor), int | float):
+                    self._count((gateway, entity_id, sensor), timestamp, float(value))
+            for sensor in ENERGY_POWER_SENSORS:
+                if f"{sensor}_interval" in sensors and isinstance(
+                    value := sensors.get(sensor), int | float
+                ):
+                    self._integrate(
+                        (gateway, entity_id, sensor), timestamp, float(value)
+                    )
+
+        keys = self._gateways.get(gateway, set())
+        for key in [key for key in keys if key[1] not in entities]:
+            keys.remove(key)
+            del self._latest[key]
+            del self._series[key]
+        for fleet in self._fleet.values():
+            fleet.advance(timestamp)
+
+    def series(
+        self, entity_id: str, sensor: str, gateway: str = ""
+    ) -> EnergyWindows | None:
+        """Return the windows of an entity-sensor, None when not tracked."""
+        return self._series.get((gateway, entity_id, sensor))
+
+    def fleet(self, sensor: str) -> EnergyWindows | None:
+        """Return the windows of a sensor totalled over all gateways and entities."""
+        return self._fleet.get(sensor)
@@ -0,0 +1,140 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise OpenMetrics exporter: serve the latest entity data of many gateways to any number of
+scrapers, without them polling the gateways.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any
+
+from plugwise.constants import (
+    COUNTER_SENSORS,
+    DATA_DICTS,
+    OPENMETRICS_CONTENT_TYPE,
+    GwEntityData,
+)
+
+from aiohttp import web
+
+# The OpenMetrics name per data-dict, the actuators are named after themselves
+DICT_PREFIXES = {
+    "binary_sensors": "plugwise_binary_sensor_",
+    "sensors": "plugwise_sensor_",
+    "switches": "plugwise_switch_",
+}
+LABEL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+# Metric-family: type and sample-lines
+Families = dict[str, tuple[str, list[str]]]
+
+
+def _labels(**labels: str) -> str:
+    """Return the label-set of a sample."""
+    return ",".join(
+        f'{key}="{str(value).translate(LABEL_ESCAPES)}"'
+        for key, value in labels.items()
+    )
+
+
+def _value(value: Any) -> str | None:
+    """Return the sample-value, None for the non-numeric values."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and not math.isfinite(value):
+        if math.isnan(value):
+            return "NaN"
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, int | float):
+        return repr(value)
+    return None
+
+
+def collect_families(gateway: str, entities: dict[str, GwEntityData]) -> Families:
+    """Collect the metric-families of the entities of a gateway."""
+    families: Families = {}
+
+    def add(name: str, labels: str, value: Any, metric_type: str = "gauge") -> None:
+        if (sample := _value(value)) is None:
+            return
+        suffix = "_total" if metric_type == "counter" else ""
+        families.setdefault(name, (metric_type, []))[1].append(
+            f"{name}{suffix}{{{labels}}} {sample}"
+        )
+
+    add("plugwise_last_update_timestamp_seconds", _labels(gateway=gateway), time.time())
+    for entity_id, entity in entities.items():
+        labels = _labels(
+            gateway=gateway,
+            entity_id=entity_id,
+            name=entity.get("name", ""),
+            dev_class=entity.get("dev_class", ""),
+        )
+        if (available := entity.get("available")) is not None:
+            add("plugwise_available", labels, available)
+        for data_dict in DATA_DICTS:
+            if not (items := entity.get(data_dict)):
+                continue
+            prefix = DICT_PREFIXES.get(data_dict, f"plugwise_{data_dict}_")
+            for key, value in items.items():  # type: ignore[attr-defined]
+                metric_type = "counter" if key in COUNTER_SENSORS else "gauge"
+                add(f"{prefix}{key}", labels, value, metric_type)
+
+    return families
+
+
+class MetricsExporter:
+    """Keep the metrics of the latest poll per gateway, serve them from cache.
+
+    The families of a gateway are collected on its update, the exposition is rendered on the
+    first scrape after a change and then served as-is to all scrapers.
+    """
+
+    def __init__(self) -> None:
+        """Set the constructor for this class."""
+        self._families: dict[str, Families] = {}
+        self._payload: bytes | None = None
+        self.scrapes = 0
+
+    def update(self, gateway: str, entities: dict[str, GwEntityData]) -> None:
+        """Take the entities of a poll of a gateway, e.g. the result of async_update()."""
+        self._families[gateway] = collect_families(gateway, entities)
+        self._payload = None
+
+    def remove(self, gateway: str) -> None:
+        """Stop exporting a gateway."""
+        if self._families.pop(gateway, None) is not None:
+            self._payload = None
+
+    @property
+    def payload(self) -> bytes:
+        """Return the OpenMetrics exposition of all gateways, rendered once per change."""
+        if self._payload is None:
+            merged: Families = {}
+            for families in self._families.values():
+                for name, (metric_type, samples) in families.items():
+                    merged.setdefault(name, (metric_type, []))[1].extend(samples)
+
+            lines: list[str] = []
+            for name, (metric_type, samples) in sorted(merged.items()):
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(samples)
+            lines.append("# EOF\n")
+            self._payload = "\n".join(lines).encode()
+
+        return self._payload
+
+    async def handle(self, _: web.Request) -> web.Response:
+        """Serve a scrape."""
+        self.scrapes += 1
+        return web.Response(
+            body=self.payload, headers={"Content-Type": OPENMETRICS_CONTENT_TYPE}
+        )
+
+    def app(self) -> web.Application:
+        """Return the web-application serving /metrics."""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        return app
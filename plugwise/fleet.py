@@ -0,0 +1,125 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise fleet-mode: update many gateways using all CPU-cores.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+import json
+import multiprocessing
+from typing import TYPE_CHECKING, Any
+
+from plugwise.constants import LOGGER, GwEntityData
+from plugwise.exceptions import PlugwiseError, PlugwiseException
+from plugwise.parsers import get_xml_parser
+from plugwise.smilecomm import parse_xml
+
+if TYPE_CHECKING:
+    from plugwise import Smile
+
+
+async def _no_request(*_: Any, **__: Any) -> None:
+    """Request-function of the gateway-API in a fleet-worker: it only processes XML data."""
+    raise PlugwiseError(
+        "Plugwise: the gateway-API copy in the process pool cannot communicate"
+    )
+
+
+def collect_snapshot(
+    legacy: bool, config: dict[str, Any], responses: dict[str, str], xml_parser: str
+) -> bytes:
+    """Fleet-worker: parse the responses and collect the entities, as a full update does.
+
+    Return the entities as compact JSON, the transfer between the processes is then cheap.
+    """
+    if legacy:
+        # pylint: disable-next=import-outside-toplevel
+        from plugwise.legacy.smile import SmileLegacyAPI  # noqa: PLC0415
+
+        api: Any = SmileLegacyAPI(_request=_no_request, **config)
+    else:
+        # pylint: disable-next=import-outside-toplevel
+        from plugwise.smile import SmileAPI  # noqa: PLC0415
+
+        api = SmileAPI(_request=_no_request, **config)
+
+    parser = get_xml_parser(xml_parser)
+    xml = {command: parse_xml(text, parser) for command, text in responses.items()}
+    entities = api.collect_from_xml(xml)
+    return json.dumps(entities, separators=(",", ":")).encode()
+
+
+class Fleet:
+    """Update a fleet of connected gateways, the requests on the event loop, the processing in parallel.
+
+    The raw responses are handed to a process pool that parses them and collects the entities.
+    The results are snapshots: the Smile objects keep their own data, to use for set-commands,
+    refreshed by their own async_update().
+    """
+
+    def __init__(
+        self, gateways: dict[str, Smile], executor: Executor | None = None
+    ) -> None:
+        """Set the constructor for this class.
+
+        Without an executor provided, a process pool with one worker per CPU-core is used,
+        started via a fork-server: forking the threaded event loop process is unsafe.
+        """
+        self._executor = executor
+        self._own_executor = executor is None
+        self.errors: dict[str, PlugwiseException] = {}
+        self.gateways = gateways
+
+    def _get_executor(self) -> Executor:
+        """Return the executor, start the process pool on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("forkserver")
+            )
+
+        return self._executor
+
+    async def _update(self, smile: Smile) -> dict[str, GwEntityData]:
+        """Fetch on the event loop, collect in the executor."""
+        responses = await smile.async_fetch_xml()
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(),
+            collect_snapshot,
+            smile.smile.legacy,
+            smile.api_config(),
+            responses,
+            smile.xml_parser.name,
+        )
+        result: dict[str, GwEntityData] = json.loads(snapshot)
+        return result
+
+    async def async_update(self) -> dict[str, dict[str, GwEntityData]]:
+        """Update all gateways, return the entities per gateway.
+
+        A failing gateway is left out, its error is available in errors.
+        """
+        names = list(self.gateways)
+        results = await asyncio.gather(
+            *(self._update(self.gateways[name]) for name in names),
+            return_exceptions=True,
+        )
+        self.errors = {}
+        snapshots: dict[str, dict[str, GwEntityData]] = {}
+        for name, result in zip(names, results, strict=True):
+            if isinstance(result, PlugwiseException):
+                LOGGER.warning("Fleet-update of %s failed: %s", name, result)
+                self.errors[name] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                snapshots[name] = result
+
+        return snapshots
+
+    def close(self) -> None:
+        """Stop the process pool, when created by the fleet."""
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -27,6 +27,7 @@ from plugwise.constants import (
     MODULE_LOCATOR,
     NONE,
     OFF,
+    P1_LOG_TYPES,
     P1_MEASUREMENTS,
     TEMP_CELSIUS,
     THERMO_MATCHING,
@@ -44,10 +45,10 @@ from plugwise.constants import (
 )
 from plugwise.util import (
     check_model,
-    collect_power_values,
     common_match_cases,
-    count_data_items,
     format_measure,
+    power_data_from_buckets,
+    power_log_buckets,
     skip_obsolete_measurements,
 )
 
@@ -100,18 +101,12 @@ class SmileHelper(SmileCommon):
         """Return the gateway-id."""
         return self._gateway_id
 
-    @property
-    def item_count(self) -> int:
-        """Return the item-count."""
-        return self._count
-
     def _get_appliances(self) -> None:
         """Collect all appliances with relevant info.
 
         Also, collect the P1 smartmeter info from a location
         as this one is not available as an appliance.
         """
-        self._count = 0
         self._get_locations()
 
         for appliance in self._domain_objects.findall("./appliance"):
@@ -208,6 +203,8 @@ class SmileHelper(SmileCommon):
         if not locations:
             raise KeyError("No location data present!")
 
+        # Clear in place, the dict is shared with the Smile object; removed locations are dropped
+        self._loc_data.clear()
         for location in locations:
             loc.loc_id = location.get("id")
             loc.name = location.find("name").text
@@ -367,7 +364,6 @@ class SmileHelper(SmileCommon):
             # Show the available dhw_modes
             if self._dhw_allowed_modes:
                 data["dhw_modes"] = self._dhw_allowed_modes
-                # Counting of this item is done in _appliance_measurements()
 
         if (
             appliance := self._collect_appliance_data(
@@ -382,7 +378,6 @@ class SmileHelper(SmileCommon):
             self._process_c_heating_state(data)
             # Remove c_heating_state after processing
             data.pop("c_heating_state")
-            self._count -= 1
 
         if self._is_thermostat and self.check_name(ANNA):
             self._update_anna_cooling(entity_id, data)
@@ -407,7 +402,6 @@ class SmileHelper(SmileCommon):
                     continue
 
                 common_match_cases(measurement, attrs, group_meas_loc, data)
-                self._count += 1
 
     def _collect_appliance_data(
         self,
@@ -439,18 +433,10 @@ class SmileHelper(SmileCommon):
 
         Collect the power-data from the Home location.
         """
-        data: GwEntityData = {"sensors": {}}
-        loc = Munch()
-        log_list: list[str] = ["point_log", "cumulative_log", "interval_log"]
-        t_string = "tariff"
-
-        loc.logs = self._home_location.find("./logs")
-        for loc.measurement, loc.attrs in P1_MEASUREMENTS.items():
-            for loc.log_type in log_list:
-                collect_power_values(data, loc, t_string)
-
-        self._count += len(data["sensors"])
-        return data
+        buckets = power_log_buckets(self._home_location.find("./logs"), legacy=False)
+        return power_data_from_buckets(
+            [buckets], P1_MEASUREMENTS, P1_LOG_TYPES, legacy=False
+        )
 
     def _appliance_measurements(
         self,
@@ -484,8 +470,6 @@ class SmileHelper(SmileCommon):
                     appl_i_loc.text, ENERGY_WATT_HOUR
                 )
 
-        self._count = count_data_items(self._count, data)
-
     def _select_dhw_mode(self, text: str, data: GwEntityData, measurement: str) -> None:
         """Set the selected dhw mode."""
         if self._dhw_allowed_modes and "select_dhw_mode" not in data:
@@ -509,7 +493,6 @@ class SmileHelper(SmileCommon):
             if (state := xml.find(locator)) is not None:
                 if "switches" in data:
                     data["switches"][name] = state.text == "on"
-                    self._count += 1
                 if (
                     not self._dhw_allowed_modes
                     and toggle == "domestic_hot_water_comfort_mode"
@@ -574,12 +557,10 @@ class SmileHelper(SmileCommon):
                         temp_dict["lower_bound"] = -2.0
                         temp_dict["resolution"] = 0.1
                         temp_dict["upper_bound"] = 2.0
-                        self._count += 3
                         # Rename offset to setpoint
                         key = "setpoint"
 
                     act_key = cast(ActuatorDataType, key)
-                    self._count += 1
                     try:
                         temp_dict[act_key] = format_measure(
                             pw_function.text, TEMP_CELSIUS
@@ -623,7 +604,6 @@ class SmileHelper(SmileCommon):
             self._cooling_enabled = mode == "cooling"
             if self._reg_allowed_modes:
                 data["select_regulation_mode"] = mode
-                self._count += 1
 
     def _get_gateway_mode(
         self, appliance: etree.Element, entity_id: str, data: GwEntityData
@@ -638,7 +618,6 @@ class SmileHelper(SmileCommon):
             )
         ) is not None and self._gw_allowed_modes:
             data["select_gateway_mode"] = mode
-            self._count += 1
 
     def _get_gateway_outdoor_temp(self, entity_id: str, data: GwEntityData) -> None:
         """Adam & Anna: the Smile outdoor_temperature is present in the Home location."""
@@ -647,7 +626,6 @@ class SmileHelper(SmileCommon):
             if (found := self._home_location.find(locator)) is not None:
                 value = format_measure(found.text, NONE)
                 data.update({"sensors": {"outdoor_temperature": value}})
-                self._count += 1
 
     def _process_c_heating_state(self, data: GwEntityData) -> None:
         """Helper-function for _get_measurement_data().
@@ -671,14 +649,7 @@ class SmileHelper(SmileCommon):
             data["binary_sensors"]["heating_state"] = data["c_heating_state"]
 
         if self.check_name(ADAM):
-            # First count when not present, then create and init to False.
-            # When present init to False
-            if "heating_state" not in data["binary_sensors"]:
-                self._count += 1
             data["binary_sensors"]["heating_state"] = False
-
-            if "cooling_state" not in data["binary_sensors"]:
-                self._count += 1
             data["binary_sensors"]["cooling_state"] = False
 
             if self._cooling_enabled:
@@ -720,10 +691,8 @@ class SmileHelper(SmileCommon):
             # Elga has no cooling-switch
             if "cooling_ena_switch" in data["switches"]:
                 data["switches"].pop("cooling_ena_switch")
-                self._count -= 1
 
         data.pop("elga_status_code", None)
-        self._count -= 1
 
     def _update_loria_cooling(self, data: GwEntityData) -> None:
         """Loria/Thermastage: base cooling-related on cooling_state and modulation_level.
@@ -754,17 +723,12 @@ class SmileHelper(SmileCommon):
         if not self._cooling_present:
             if "cooling_state" in data["binary_sensors"]:
                 data["binary_sensors"].pop("cooling_state")
-                self._count -= 1
             if "cooling_ena_switch" in data["switches"]:
                 data["switches"].pop("cooling_ena_switch")  # pragma: no cover
-                self._count -= 1  # pragma: no cover
             if "cooling_enabled" in data["binary_sensors"]:
                 data["binary_sensors"].pop("cooling_enabled")  # pragma: no cover
-                self._count -= 1  # pragma: no cover
 
-        if "thermostat_supports_cooling" in data:
-            data.pop("thermostat_supports_cooling", None)
-            self._count -= 1
+        data.pop("thermostat_supports_cooling", None)
 
     def _scan_thermostats(self) -> None:
         """Helper-function for smile.py: get_all_entities().
@@ -788,7 +752,6 @@ class SmileHelper(SmileCommon):
                     },
                     "vendor": "Plugwise",
                 }
-                self._count += 5
 
     def _match_and_rank_thermostats(self) -> None:
         """Helper-function for _scan_thermostats().
@@ -848,7 +811,6 @@ class SmileHelper(SmileCommon):
 
         if (ctrl_state := thermostat.get("control_state")) is not None:
             data["thermostat"].pop("control_state")
-            self._count -= 1
             return ctrl_state
 
         # Handle missing control_state in regulation_mode off for firmware >= 3.2.0 (issue #776)
@@ -899,7 +861,6 @@ class SmileHelper(SmileCommon):
             data["select_zone_profile"] = reg_control
             data["zone_profiles"] = ALLOWED_ZONE_PROFILES
             data["thermostat"].pop("regulation_control")
-            self._count += 1  # Add 2, remove 1
 
     def _preset(self, loc_id: str) -> str | None:
         """Helper-function for smile.py: device_data_climate().
@@ -0,0 +1,273 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise sensor history: fixed-size ring buffers with rolling statistics.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+import mmap
+import os
+import struct
+import time
+
+from plugwise.constants import (
+    DEFAULT_HISTORY_SIZE,
+    HISTORY_SENSORS,
+    LOGGER,
+    GwEntityData,
+)
+
+# File layout: header (magic, capacity, head, count), followed by the
+# timestamps-buffer and the values-buffer, each capacity doubles long.
+HEADER = struct.Struct("<4sIII")
+MAGIC = b"PWH1"
+
+
+class SensorSeries:
+    """Ring buffer of (timestamp, value) samples for a single entity-sensor.
+
+    Rolling min/max are kept in monotonic queues, the mean from a running sum,
+    so all queries are O(1) (amortized) regardless of the buffer size.
+    """
+
+    def __init__(self, capacity: int, path: str | None = None) -> None:
+        """Set the constructor for this class."""
+        if capacity < 2:
+            raise ValueError("History capacity must be at least 2")
+
+        self._capacity = capacity
+        self._count = 0
+        self._head = 0
+        self._mmap: mmap.mmap | None = None
+        self._seq = 0
+        self._sum = 0.0
+        self._max_queue: deque[tuple[int, float]] = deque()
+        self._min_queue: deque[tuple[int, float]] = deque()
+
+        if path is None:
+            self._times = memoryview(bytearray(8 * capacity)).cast("d")
+            self._values = memoryview(bytearray(8 * capacity)).cast("d")
+            return
+
+        self._open_mmap(path)
+
+    def _open_mmap(self, path: str) -> None:
+        """Map the series to a file, restore the stored samples when valid."""
+        size = HEADER.size + 16 * self._capacity
+        restore = os.path.exists(path) and os.path.getsize(path) == size
+        with open(path, "a+b") as file:
+            if not restore:
+                file.truncate(0)
+                file.truncate(size)
+            self._mmap = mmap.mmap(file.fileno(), size)
+
+        buffer = memoryview(self._mmap)
+        offset = HEADER.size + 8 * self._capacity
+        self._times = buffer[HEADER.size : offset].cast("d")
+        self._values = buffer[offset:].cast("d")
+        if restore:
+            magic, capacity, head, count = HEADER.unpack_from(self._mmap)
+            if magic == MAGIC and capacity == self._capacity and count <= capacity:
+                self._head = head % capacity
+                for _, value in self._stored_samples(count):
+                    self._track(value)
+                    self._count += 1
+                    self._seq += 1
+                return
+
+            LOGGER.warning("Discarding incompatible history file %s", path)
+
+        self._write_header()
+
+    def _stored_samples(self, count: int) -> list[tuple[float, float]]:
+        """Return the given number of samples, oldest first."""
+        start = (self._head - count) % self._capacity
+        return [
+            (
+                self._times[(start + i) % self._capacity],
+                self._values[(start + i) % self._capacity],
+            )
+            for i in range(count)
+        ]
+
+    def _write_header(self) -> None:
+        """Persist the ring-pointers, only for a file-backed series."""
+        if self._mmap is not None:
+            HEADER.pack_into(
+                self._mmap, 0, MAGIC, self._capacity, self._head, self._count
+            )
+
+    def _track(self, value: float) -> None:
+        """Add a value to the running sum and the min/max queues."""
+        self._sum += value
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((self._seq, value))
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((self._seq, value))
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample, overwriting the oldest one when the buffer is full."""
+        if self._count == self._capacity:
+            self._sum -= self._values[self._head]
+        else:
+            self._count += 1
+
+        self._times[self._head] = timestamp
+        self._values[self._head] = value
+        self._track(value)
+        self._seq += 1
+        # Drop the min/max candidates that left the window
+        oldest = self._seq - self._count
+        while self._min_queue[0][0] < oldest:
+            self._min_queue.popleft()
+        while self._max_queue[0][0] < oldest:
+            self._max_queue.popleft()
+
+        self._head = (self._head + 1) % self._capacity
+        # Limit floating point drift of the running sum, once per buffer cycle
+        if self._head == 0:
+            self._sum = math.fsum(self._values[: self._count])
+
+        self._write_header()
+
+    def __len__(self) -> int:
+        """Return the number of stored samples."""
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        """Return the maximum number of stored samples."""
+        return self._capacity
+
+    @property
+    def latest(self) -> tuple[float, float] | None:
+        """Return the newest (timestamp, value) sample."""
+        if not self._count:
+            return None
+
+        index = (self._head - 1) % self._capacity
+        return self._times[index], self._values[index]
+
+    @property
+    def minimum(self) -> float | None:
+        """Return the lowest value in the window."""
+        return self._min_queue[0][1] if self._count else None
+
+    @property
+    def maximum(self) -> float | None:
+        """Return the highest value in the window."""
+        return self._max_queue[0][1] if self._count else None
+
+    @property
+    def mean(self) -> float | None:
+        """Return the average value over the window."""
+        return self._sum / self._count if self._count else None
+
+    @property
+    def rate(self) -> float | None:
+        """Return the rate of change per second, between the oldest and newest sample."""
+        if self._count < 2:
+            return None
+
+        newest = (self._head - 1) % self._capacity
+        oldest = (self._head - self._count) % self._capacity
+        if (period := self._times[newest] - self._times[oldest]) <= 0:
+            return None
+
+        return (self._values[newest] - self._values[oldest]) / period
+
+    def samples(self) -> list[tuple[float, float]]:
+        """Return all stored (timestamp, value) samples, oldest first."""
+        return self._stored_samples(self._count)
+
+    def close(self) -> None:
+        """Release the file mapping of a file-backed series."""
+        if self._mmap is not None:
+            self._times.release()
+            self._values.release()
+            self._mmap.close()
+            self._mmap = None
+
+
+class SensorHistory:
+    """Optional history store for the sensors of the Plugwise gateway entities.
+
+    Feed it the output of async_update(), or attach it to Smile to do so automatically.
+    With a directory provided, each series is stored in a memory-mapped file
+    so the history survives a restart.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_HISTORY_SIZE,
+        sensors: tuple[str, ...] = HISTORY_SENSORS,
+        path: str | None = None,
+    ) -> None:
+        """Set the constructor for this class."""
+        self._capacity = capacity
+        self._path = path
+        self._sensors = sensors
+        self._series: dict[tuple[str, str], SensorSeries] = {}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, entity_id: str, sensor: str) -> str | None:
+        """Return the file of a series, None when not file-backed."""
+        if self._path is None:
+            return None
+
+        return os.path.join(self._path, f"{entity_id}_{sensor}.bin")
+
+    def _create_series(self, entity_id: str, sensor: str) -> SensorSeries:
+        """Create a new, or restore a file-backed, series."""
+        path = self._file(entity_id, sensor)
+        series = self._series[(entity_id, sensor)] = SensorSeries(self._capacity, path)
+        return series
+
+    def update(
+        self, entities: dict[str, GwEntityData], timestamp: float | None = None
+    ) -> None:
+        """Add the current values of the tracked sensors.
+
+        The series of the entities no longer present are dropped, including their files.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        for entity_id, entity in entities.items():
+            if not (sensors := entity.get("sensors")):
+                continue
+
+            for sensor in self._sensors:
+                if not isinstance(value := sensors.get(sensor), int | float):
+                    continue
+
+                if (series := self._series.get((entity_id, sensor))) is None:
+                    series = self._create_series(entity_id, sensor)
+                series.append(timestamp, float(value))
+
+        for key in [key for key in self._series if key[0] not in entities]:
+            self._series.pop(key).close()
+            if (path := self._file(*key)) is not None and os.path.exists(path):
+                os.remove(path)
+
+    def series(self, entity_id: str, sensor: str) -> SensorSeries | None:
+        """Return the series of an entity-sensor, None when not tracked."""
+        if (series := self._series.get((entity_id, sensor))) is not None:
+            return series
+
+        path = self._file(entity_id, sensor)
+        if path is not None and sensor in self._sensors and os.path.exists(path):
+            return self._create_series(entity_id, sensor)
+
+        return None
+
+    def close(self) -> None:
+        """Release all file mappings."""
+        for series in self._series.values():
+            series.close()
+        self._series = {}
@@ -0,0 +1,282 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise hub: poll a gateway once, publish the snapshots and deltas to many subscribers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+import contextlib
+from copy import deepcopy
+import json
+import time
+from typing import TYPE_CHECKING, Any, Literal, TypedDict
+
+from plugwise.constants import DEFAULT_HUB_QUEUE_SIZE, LOGGER, GwEntityData
+from plugwise.exceptions import PlugwiseException
+from plugwise.scheduler import PollScheduler
+
+if TYPE_CHECKING:
+    from plugwise import Smile
+
+
+class HubMessage(TypedDict, total=False):
+    """A published message: the full (filtered) data, or the changes since the previous poll.
+
+    A delta lists the removed entities, and per entity the removed keys and data-dict items.
+    """
+
+    type: Literal["delta", "snapshot"]
+    data: dict[str, Any]
+    removed: list[str]
+    removed_keys: dict[str, list[str]]
+
+
+def entity_delta(old: GwEntityData, new: GwEntityData) -> dict[str, Any]:
+    """Return the changed items of an entity, of the data-dicts only the changed items."""
+    delta: dict[str, Any] = {}
+    for key, value in new.items():
+        if (previous := old.get(key)) == value:
+            continue
+        if isinstance(value, dict) and isinstance(previous, dict):
+            delta[key] = {
+                item: item_value
+                for item, item_value in value.items()
+                if previous.get(item) != item_value
+            }
+        else:
+            delta[key] = value
+
+    return delta
+
+
+def entity_removed_keys(old: GwEntityData, new: GwEntityData) -> list[str]:
+    """Return the keys no longer present in an entity, the data-dict items as key.item."""
+    removed: list[str] = []
+    for key, previous in old.items():
+        if key not in new:
+            removed.append(key)
+        elif isinstance(previous, dict) and isinstance(value := new[key], dict):
+            removed.extend(f"{key}.{item}" for item in previous if item not in value)
+
+    return removed
+
+
+class Subscription:
+    """The messages for one subscriber, in a bounded queue.
+
+    When the queue is full the oldest message is dropped, the next message is then a full
+    snapshot instead of a delta: the subscriber is consistent again after processing it.
+    """
+
+    def __init__(
+        self,
+        entities: Iterable[str] | None = None,
+        keys: Iterable[str] | None = None,
+        queue_size: int = DEFAULT_HUB_QUEUE_SIZE,
+    ) -> None:
+        """Set the constructor for this class."""
+        self._queue: asyncio.Queue[HubMessage] = asyncio.Queue(queue_size)
+        self._resync = True
+        self.dropped = 0
+        self.entities = None if entities is None else set(entities)
+        self.keys = None if keys is None else set(keys)
+
+    def _filter(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Return the selected entities and keys; a key also selects the data-dict items."""
+        result: dict[str, Any] = {}
+        for entity_id, entity in data.items():
+            if self.entities is not None and entity_id not in self.entities:
+                continue
+            if self.keys is None:
+                result[entity_id] = entity
+                continue
+
+            selected: dict[str, Any] = {}
+            for key, value in entity.items():
+                if key in self.keys:
+                    selected[key] = value
+                elif isinstance(value, dict) and (
+                    items := {item: v for item, v in value.items() if item in self.keys}
+                ):
+                    selected[key] = items
+            if selected:
+                result[entity_id] = selected
+
+        return result
+
+    def _filter_removed_keys(
+        self, removed_keys: dict[str, list[str]]
+    ) -> dict[str, list[str]]:
+        """Return the removed keys of the selected entities and keys, as _filter() selects."""
+        result: dict[str, list[str]] = {}
+        for entity_id, keys in removed_keys.items():
+            if self.entities is not None and entity_id not in self.entities:
+                continue
+            if self.keys is not None:
+                keys = [
+                    key for key in keys if not self.keys.isdisjoint(key.split(".", 1))
+                ]
+            if keys:
+                result[entity_id] = keys
+
+        return result
+
+    def publish(
+        self,
+        snapshot: dict[str, GwEntityData],
+        delta: dict[str, Any],
+        removed: list[str],
+        removed_keys: dict[str, list[str]],
+    ) -> None:
+        """Queue the message of a poll, without waiting."""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+            self._resync = True
+
+        if self._resync:
+            self._resync = False
+            self._queue.put_nowait(
+                {"type": "snapshot", "data": self._filter(dict(snapshot))}
+            )
+            return
+
+        data = self._filter(delta)
+        if self.entities is not None:
+            removed = [entity_id for entity_id in removed if entity_id in self.entities]
+        removed_keys = self._filter_removed_keys(removed_keys)
+        if data or removed or removed_keys:
+            self._queue.put_nowait(
+                {
+                    "type": "delta",
+                    "data": data,
+                    "removed": removed,
+                    "removed_keys": removed_keys,
+                }
+            )
+
+    async def get(self) -> HubMessage:
+        """Wait for the next message."""
+        return await self._queue.get()
+
+    def __aiter__(self) -> Subscription:
+        """Iterate over the messages."""
+        return self
+
+    async def __anext__(self) -> HubMessage:
+        """Wait for the next message."""
+        return await self.get()
+
+
+class Hub:
+    """Own the connection to a gateway: poll it once for all subscribers.
+
+    The polls are planned by the PollScheduler. A new subscriber receives the latest snapshot
+    first, then the deltas. The messages are shared between the subscribers: read-only.
+    Set-commands go through the api, the next poll publishes their result.
+    """
+
+    def __init__(
+        self,
+        api: Smile,
+        scheduler: PollScheduler | None = None,
+        queue_size: int = DEFAULT_HUB_QUEUE_SIZE,
+    ) -> None:
+        """Set the constructor for this class."""
+        self._scheduler = scheduler or PollScheduler(api)
+        self._snapshot: dict[str, GwEntityData] | None = None
+        self.api = api
+        self.queue_size = queue_size
+        self.subscriptions: list[Subscription] = []
+
+    @property
+    def snapshot(self) -> dict[str, GwEntityData] | None:
+        """Return the data of the latest poll."""
+        return self._snapshot
+
+    def subscribe(
+        self,
+        entities: Iterable[str] | None = None,
+        keys: Iterable[str] | None = None,
+        queue_size: int | None = None,
+    ) -> Subscription:
+        """Add a subscriber, optionally for some entities and/or keys only."""
+        subscription = Subscription(entities, keys, queue_size or self.queue_size)
+        if self._snapshot is not None:
+            subscription.publish(self._snapshot, {}, [], {})
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber."""
+        with contextlib.suppress(ValueError):
+            self.subscriptions.remove(subscription)
+
+    async def poll(self) -> dict[str, GwEntityData]:
+        """Poll the gateway, publish the snapshot and its delta."""
+        data = deepcopy(await self._scheduler.async_update())
+        previous = self._snapshot or {}
+        delta: dict[str, Any] = {}
+        removed_keys: dict[str, list[str]] = {}
+        for entity_id, entity in data.items():
+            if entity_id not in previous:
+                delta[entity_id] = entity
+                continue
+            if changes := entity_delta(previous[entity_id], entity):
+                delta[entity_id] = changes
+            if keys := entity_removed_keys(previous[entity_id], entity):
+                removed_keys[entity_id] = keys
+        removed = [entity_id for entity_id in previous if entity_id not in data]
+
+        self._snapshot = data
+        for subscription in self.subscriptions:
+            subscription.publish(data, delta, removed, removed_keys)
+        return data
+
+    async def run(self) -> None:
+        """Poll at the planned times, until cancelled."""
+        while True:
+            await asyncio.sleep(self._scheduler.delay)
+            try:
+                await self.poll()
+            except PlugwiseException as exc:
+                LOGGER.warning("Hub-poll failed: %s", exc)
+                self._scheduler.next_update = (
+                    time.monotonic() + self._scheduler.interval
+                )
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve a socket-subscriber: a JSON filter-line in, JSON message-lines out."""
+        subscription = None
+        try:
+            request = json.loads(await reader.readline() or b"{}")
+            if not isinstance(request, dict):
+                raise TypeError("the filter must be a JSON-object")
+            subscription = self.subscribe(request.get("entities"), request.get("keys"))
+            async for message in subscription:
+                writer.write(
+                    json.dumps(message, separators=(",", ":")).encode() + b"\n"
+                )
+                await writer.drain()
+        except (ConnectionError, TypeError, ValueError) as exc:
+            LOGGER.debug("Hub-subscriber disconnected: %s", exc)
+        finally:
+            if subscription is not None:
+                self.unsubscribe(subscription)
+            writer.close()
+
+    async def serve(
+        self, path: str | None = None, host: str = "127.0.0.1", port: int = 0
+    ) -> asyncio.Server:
+        """Serve socket-subscribers, on a unix-socket when a path is given.
+
+        A subscriber sends one line with its filter, e.g. {"keys": ["temperature"]} or {},
+        then receives the messages as JSON-lines.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle_client, path)
+        return await asyncio.start_server(self._handle_client, host, port)
@@ -57,7 +57,6 @@ class SmileLegacyData(SmileLegacyHelper):
         # Presets
         entity["preset_modes"] = None
         entity["active_preset"] = None
-        self._count += 2
         if presets := self._presets():
             entity["preset_modes"] = list(presets)
             entity["active_preset"] = self._preset()
@@ -65,7 +64,6 @@ class SmileLegacyData(SmileLegacyHelper):
         # Schedule
         entity["available_schedules"] = [OFF]
         entity["select_schedule"] = OFF
-        self._count += 2
         avail_schedules, sel_schedule = self._schedules()
         if avail_schedules != [OFF]:
             entity["available_schedules"] = avail_schedules
@@ -73,14 +71,12 @@ class SmileLegacyData(SmileLegacyHelper):
 
         # Set HA climate HVACMode: auto, heat
         entity["climate_mode"] = "auto"
-        self._count += 1
         if sel_schedule == OFF:
             entity["climate_mode"] = "heat"
 
     def _get_anna_control_state(self, entity: GwEntityData) -> None:
         """Set the thermostat control_state based on the opentherm/onoff device state."""
         entity["control_state"] = "idle"
-        self._count += 1
         for device in self.gw_entities.values():
             if device["dev_class"] != "heater_central":
                 continue
@@ -22,6 +22,7 @@ from plugwise.constants import (
     HEATER_CENTRAL_MEASUREMENTS,
     NONE,
     OFF,
+    P1_LEGACY_LOG_TYPES,
     P1_LEGACY_MEASUREMENTS,
     TEMP_CELSIUS,
     THERMOSTAT_CLASSES,
@@ -35,10 +36,10 @@ from plugwise.constants import (
     ThermoLoc,
 )
 from plugwise.util import (
-    collect_power_values,
     common_match_cases,
-    count_data_items,
     format_measure,
+    power_data_from_buckets,
+    power_log_buckets,
     skip_obsolete_measurements,
     version_to_model,
 )
@@ -78,14 +79,16 @@ class SmileLegacyHelper(SmileCommon):
         """Return the gateway-id."""
         return self._gateway_id
 
-    @property
-    def item_count(self) -> int:
-        """Return the item-count."""
-        return self._count
+    def _log_sources(self) -> list[etree.Element]:
+        """Return the XML-data containing the point- and interval-logs."""
+        # P1 legacy has no appliances
+        if self.smile.type == "power":
+            return [self._locations]
+
+        return [self._appliances, self._locations]
 
     def _get_appliances(self) -> None:
         """Collect all appliances with relevant info."""
-        self._count = 0
         self._get_locations()
 
         self._create_legacy_gateway()
@@ -141,6 +144,8 @@ class SmileLegacyHelper(SmileCommon):
     def _get_locations(self) -> None:
         """Collect all locations."""
         loc = Munch()
+        # Clear in place, the dict is shared with the Smile object; removed locations are dropped
+        self._loc_data.clear()
 
         # Legacy Anna without outdoor_temp and Stretches have no locations, create fake location-data
         if not (locations := self._locations.findall("./location")):
@@ -172,7 +177,6 @@ class SmileLegacyHelper(SmileCommon):
             self._gateway_id = FAKE_APPL
 
         self.gw_entities[self._gateway_id] = {"dev_class": "gateway"}
-        self._count += 1
         for key, value in {
             "firmware": str(self.smile.version),
             "location": self._home_loc_id,
@@ -185,7 +189,6 @@ class SmileLegacyHelper(SmileCommon):
             if value is not None:
                 gw_key = cast(ApplianceType, key)
                 self.gw_entities[self._gateway_id][gw_key] = value
-                self._count += 1
 
     def _appliance_info_finder(self, appliance: etree, appl: Munch) -> Munch:
         """Collect entity info (Smile/Stretch, Thermostats, OpenTherm/On-Off): firmware, model and vendor name."""
@@ -282,11 +285,9 @@ class SmileLegacyHelper(SmileCommon):
             if (found := self._domain_objects.find(locator)) is not None:
                 value = format_measure(found.text, NONE)
                 data.update({"sensors": {"outdoor_temperature": value}})
-                self._count += 1
 
         if "c_heating_state" in data:
             data.pop("c_heating_state")
-            self._count -= 1
 
         entity.update(data)
 
@@ -295,21 +296,13 @@ class SmileLegacyHelper(SmileCommon):
 
         Collect the power-data from MODULES (P1 legacy only).
         """
-        data: GwEntityData = {"sensors": {}}
-        loc = Munch()
-        mod_list: list[str] = ["interval_meter", "cumulative_meter", "point_meter"]
-        t_string = "tariff_indicator"
-
-        search = self._modules
-        mod_logs = search.findall("./module/services")
-        for loc.measurement, loc.attrs in P1_LEGACY_MEASUREMENTS.items():
-            loc.meas_list = loc.measurement.partition("_")[0::2]
-            for loc.logs in mod_logs:
-                for loc.log_type in mod_list:
-                    collect_power_values(data, loc, t_string, legacy=True)
-
-        self._count += len(data["sensors"])
-        return data
+        module_buckets = [
+            power_log_buckets(services, legacy=True)
+            for services in self._modules.iterfind("./module/services")
+        ]
+        return power_data_from_buckets(
+            module_buckets, P1_LEGACY_MEASUREMENTS, P1_LEGACY_LOG_TYPES, legacy=True
+        )
 
     def _appliance_measurements(
         self,
@@ -339,8 +332,6 @@ class SmileLegacyHelper(SmileCommon):
                     appl_i_loc.text, ENERGY_WATT_HOUR
                 )
 
-        self._count = count_data_items(self._count, data)
-
     def _get_actuator_functionalities(
         self,
         xml: etree.Element,
@@ -365,7 +356,6 @@ class SmileLegacyHelper(SmileCommon):
                 if (pw_function := xml.find(locator)) is not None:
                     act_key = cast(ActuatorDataType, key)
                     temp_dict[act_key] = format_measure(pw_function.text, TEMP_CELSIUS)
-                    self._count += 1
 
             if temp_dict:
                 item, temp_dict = self._create_special_dicts(item, data, temp_dict)
@@ -6,7 +6,6 @@ Plugwise backend module for Home Assistant Core - covering the legacy P1, Anna,
 from __future__ import annotations
 
 from collections.abc import Awaitable, Callable
-import datetime as dt
 from typing import Any
 
 from plugwise.constants import (
@@ -21,11 +20,13 @@ from plugwise.constants import (
     STATE_OFF,
     STATE_ON,
     GwEntityData,
+    MemberSwitchResult,
     ThermoLoc,
 )
 from plugwise.exceptions import ConnectionFailedError, DataMissingError, PlugwiseError
 from plugwise.legacy.data import SmileLegacyData
 
+from defusedxml import ElementTree as etree
 from munch import Munch
 
 
@@ -57,8 +58,7 @@ class SmileLegacyAPI(SmileLegacyData):
         self._target_smile = _target_smile
         self.smile = smile
 
-        self._first_update = True
-        self._previous_day_number: str = "0"
+        self._topology: frozenset[str] | None = None
 
     @property
     def cooling_present(self) -> bool:
@@ -74,6 +74,33 @@ class SmileLegacyAPI(SmileLegacyData):
         if self.smile.type != "power":
             self._appliances = await self._request(APPLIANCES)
 
+    def xml_commands(self) -> list[str]:
+        """Return the requests of a full update, see collect_from_xml()."""
+        commands = [DOMAIN_OBJECTS, LOCATIONS, MODULES]
+        # P1 legacy has no appliances
+        if self.smile.type != "power":
+            commands.append(APPLIANCES)
+
+        return commands
+
+    def collect_from_xml(
+        self, xml: dict[str, etree.Element]
+    ) -> dict[str, GwEntityData]:
+        """Perform a full update from already received XML data, as done by a fleet-worker."""
+        try:
+            self._domain_objects = xml[DOMAIN_OBJECTS]
+            self._locations = xml[LOCATIONS]
+            self._modules = xml[MODULES]
+            if APPLIANCES in xml:
+                self._appliances = xml[APPLIANCES]
+            self.get_all_gateway_entities()
+            # Detect failed data-retrieval
+            _ = self.gw_entities[self.gateway_id]["location"]
+        except KeyError as err:
+            raise DataMissingError(f"No (full) legacy data: {err}") from err
+
+        return self.gw_entities
+
     def get_all_gateway_entities(self) -> None:
         """Collect the Plugwise gateway entities and their data and states from the received raw XML-data.
 
@@ -86,41 +113,93 @@ class SmileLegacyAPI(SmileLegacyData):
         self._all_entity_data()
 
     async def async_update(self) -> dict[str, GwEntityData]:
-        """Perform an full update update at day-change: re-collect all gateway entities and their data and states.
+        """Perform an incremental update: only collect the entities updated data and states.
 
-        Otherwise perform an incremental update: only collect the entities updated data and states.
+        A full update is performed at the first update and when the topology has changed:
+        appliances, modules or groups added or removed, or group-members changed, detected
+        from the refreshed XML data.
         """
-        day_number = dt.datetime.now().strftime("%w")
-        if self._first_update or day_number != self._previous_day_number:
-            LOGGER.info(
-                "Performing daily full-update, reload the Plugwise integration when a single entity becomes unavailable."
-            )
-            try:
-                await self.full_xml_update()
-                self.get_all_gateway_entities()
-                # Detect failed data-retrieval
-                _ = self.gw_entities[self.gateway_id]["location"]
-            except KeyError as err:  # pragma: no cover
-                raise DataMissingError(f"No (full) legacy data: {err}") from err
-        else:
-            try:
-                self._domain_objects = await self._request(DOMAIN_OBJECTS)
-                match self._target_smile:
-                    case "smile_v2":
-                        self._modules = await self._request(MODULES)
-                    case self._target_smile if self._target_smile in REQUIRE_APPLIANCES:
-                        self._appliances = await self._request(APPLIANCES)
-
-                self._update_gw_entities()
-                # Detect failed data-retrieval
-                _ = self.gw_entities[self.gateway_id]["location"]
-            except KeyError as err:  # pragma: no cover
-                raise DataMissingError(f"No legacy data: {err}") from err
-
-        self._first_update = False
-        self._previous_day_number = day_number
+        self._item_count = None
+        if self._topology is None:
+            await self._full_update()
+            return self.gw_entities
+
+        try:
+            self._domain_objects = await self._request(DOMAIN_OBJECTS)
+            match self._target_smile:
+                case "smile_v2":
+                    self._modules = await self._request(MODULES)
+                case self._target_smile if self._target_smile in REQUIRE_APPLIANCES:
+                    self._appliances = await self._request(APPLIANCES)
+
+            if self._get_topology() != self._topology:
+                LOGGER.info("Appliances, modules or groups changed, full update")
+                await self._full_update(refreshed=True)
+                return self.gw_entities
+
+            self._update_gw_entities()
+            # Detect failed data-retrieval
+            _ = self.gw_entities[self.gateway_id]["location"]
+        except KeyError as err:  # pragma: no cover
+            raise DataMissingError(f"No legacy data: {err}") from err
+
         return self.gw_entities
 
+    async def _full_update(self, refreshed: bool = False) -> None:
+        """Re-collect all gateway entities, remember the topology they were collected from.
+
+        When refreshed, the XML data already refreshed by this update is reused.
+        """
+        try:
+            if refreshed:
+                await self._complete_xml_update()
+            else:
+                await self.full_xml_update()
+            self.gw_entities = {}
+            self.get_all_gateway_entities()
+            # Detect failed data-retrieval
+            _ = self.gw_entities[self.gateway_id]["location"]
+        except KeyError as err:  # pragma: no cover
+            raise DataMissingError(f"No (full) legacy data: {err}") from err
+
+        self._topology = self._get_topology()
+
+    async def _complete_xml_update(self) -> None:
+        """Fetch the XML data of a full update not already refreshed by async_update()."""
+        self._locations = await self._request(LOCATIONS)
+        if self._target_smile != "smile_v2":
+            self._modules = await self._request(MODULES)
+        # P1 legacy has no appliances
+        if self.smile.type != "power" and self._target_smile not in REQUIRE_APPLIANCES:
+            self._appliances = await self._request(APPLIANCES)
+
+    def _get_topology(self) -> frozenset[str]:
+        """Return the appliance-, module- and group-ids in the XML data refreshed on each update.
+
+        The members of the groups are included, the group-entities list them.
+        """
+        trees = [self._domain_objects]
+        match self._target_smile:
+            case "smile_v2":
+                trees.append(self._modules)
+            case self._target_smile if self._target_smile in REQUIRE_APPLIANCES:
+                trees.append(self._appliances)
+
+        topology = {
+            f"{item.tag}:{item.get('id')}"
+            for tree in trees
+            for item in (*tree.iterfind("./appliance"), *tree.iterfind("./module"))
+        }
+        for group in self._domain_objects.iterfind("./group"):
+            group_id = group.get("id")
+            topology.add(f"group:{group_id}")
+            topology.update(
+                f"group:{group_id}/appliance:{member.get('id')}"
+                for member in group.iterfind("appliances/appliance")
+            )
+
+        return frozenset(topology)
+
     ########################################################################################################
     ###  API Set and HA Service-related Functions                                                        ###
     ########################################################################################################
@@ -233,7 +312,13 @@ class SmileLegacyAPI(SmileLegacyData):
         await self.call_request(uri, method="put", data=data)
 
     async def set_switch_state(
-        self, appl_id: str, members: list[str] | None, model: str, state: str
+        self,
+        appl_id: str,
+        members: list[str] | None,
+        model: str,
+        state: str,
+        *,
+        results: dict[str, MemberSwitchResult] | None = None,
     ) -> bool | None:
         """Set the given state of the relevant switch.
 
@@ -241,7 +326,11 @@ class SmileLegacyAPI(SmileLegacyData):
         For group switches, sets the state for each member in the group separately.
         For switch-locks, sets the lock state using a different data format.
         Return the requested state when successful, the current state otherwise.
+        The outcome per switch, or per group-member, is added to results when provided.
         """
+        if results is None:
+            results = {}
+
         current_state = self.gw_entities[appl_id]["switches"].get("relay")
         requested_state = state == STATE_ON
         switch = Munch()
@@ -272,42 +361,52 @@ class SmileLegacyAPI(SmileLegacyData):
                 "</appliances>"
             )
             await self.call_request(APPLIANCES, method="post", data=data)
+            results[appl_id] = "switched"
             return requested_state
 
         # Handle group of switches
         data = f"<{switch.func_type}><state>{state}</state></{switch.func_type}>"
         if members is not None:
             return await self._set_groupswitch_member_state(
-                appl_id, data, members, state, switch
+                appl_id, data, members, state, switch, results=results
             )
 
         # Handle individual relay switches
         uri = f"{APPLIANCES};id={appl_id}/relay"
         if model == "relay" and self.gw_entities[appl_id]["switches"]["lock"]:
             # Don't bother switching a relay when the corresponding lock-state is true
+            results[appl_id] = "locked"
             return current_state
 
         await self.call_request(uri, method="put", data=data)
+        results[appl_id] = "switched"
         return requested_state
 
     async def _set_groupswitch_member_state(
-        self, appl_id: str, data: str, members: list[str], state: str, switch: Munch
+        self,
+        appl_id: str,
+        data: str,
+        members: list[str],
+        state: str,
+        switch: Munch,
+        *,
+        results: dict[str, MemberSwitchResult],
     ) -> bool:
         """Helper-function for set_switch_state().
 
         Set the requested state of the relevant switch within a group of switches.
+        The members are switched concurrently, see _switch_members().
         Return the current group-state when none of the switches has changed its state, the requested state otherwise.
         """
         current_state = self.gw_entities[appl_id]["switches"]["relay"]
         requested_state = state == STATE_ON
-        switched = 0
+        uris: dict[str, str | None] = {}
         for member in members:
+            uris[member] = None
             if not self.gw_entities[member]["switches"]["lock"]:
-                uri = f"{APPLIANCES};id={member}/relay"
-                await self.call_request(uri, method="put", data=data)
-                switched += 1
+                uris[member] = f"{APPLIANCES};id={member}/relay"
 
-        if switched > 0:
+        if await self._switch_members(uris, data, results) > 0:
             return requested_state
 
         return current_state  # pragma: no cover
@@ -0,0 +1,79 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise XML parser backends: defusedxml (default) and the optional, faster lxml.
+
+Both return ElementTree-compatible elements, the locators of the helpers work on either.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from plugwise.constants import DEFAULT_XML_PARSER
+from plugwise.exceptions import InvalidXMLError, PlugwiseError
+
+from defusedxml import DefusedXmlException, ElementTree as etree
+
+
+class DefusedXmlParser:
+    """Parse with defusedxml: the standard-library parser, guarded against XML attacks."""
+
+    name = "defusedxml"
+
+    def parse(self, data: bytes) -> etree.Element:
+        """Parse a gateway response."""
+        try:
+            return etree.XML(data)
+        except (DefusedXmlException, etree.ParseError) as exc:
+            raise InvalidXMLError from exc
+
+
+class LxmlParser:
+    """Parse with lxml, configured safely.
+
+    No entity resolution, no DTD-loading, no network access and no huge trees.
+    Comments and processing instructions are dropped, as the standard-library parser does.
+    """
+
+    name = "lxml"
+
+    def __init__(self) -> None:
+        """Set the constructor for this class."""
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            from lxml import etree as lxml_etree  # noqa: PLC0415
+        except ImportError as exc:
+            raise PlugwiseError("Plugwise: the lxml parser requires lxml") from exc
+
+        self._etree: Any = lxml_etree
+        self._parser = lxml_etree.XMLParser(
+            huge_tree=False,
+            load_dtd=False,
+            no_network=True,
+            remove_comments=True,
+            remove_pis=True,
+            resolve_entities=False,
+        )
+
+    def parse(self, data: bytes) -> etree.Element:
+        """Parse a gateway response."""
+        try:
+            return self._etree.fromstring(data, self._parser)
+        except self._etree.XMLSyntaxError as exc:
+            raise InvalidXMLError from exc
+
+
+XmlParser = DefusedXmlParser | LxmlParser
+
+XML_PARSERS: dict[str, type[XmlParser]] = {
+    DefusedXmlParser.name: DefusedXmlParser,
+    LxmlParser.name: LxmlParser,
+}
+
+
+def get_xml_parser(name: str = DEFAULT_XML_PARSER) -> XmlParser:
+    """Return the parser backend with the given name."""
+    if (parser := XML_PARSERS.get(name)) is None:
+        raise PlugwiseError(f"Plugwise: unknown XML parser {name}")
+
+    return parser()
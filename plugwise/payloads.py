@@ -0,0 +1,127 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise request-body builders: the XML payloads of the PUT- and POST-requests.
+
+The payloads are generated from plain values, the cached XML data is never modified
+or re-serialized to build a request.
+"""
+
+from __future__ import annotations
+
+# A rule-context as (container, object-tag, object-id) items,
+# e.g. (("zone", "location", <loc_id>),) for a zone-context
+Context = tuple[tuple[str, str, str], ...]
+
+
+def zone_context(loc_id: str) -> Context:
+    """Return the rule-context of a location (zone)."""
+    return (("zone", "location", loc_id),)
+
+
+def dhw_mode(mode: str) -> str:
+    """Return the body for setting the domestic hot water mode."""
+    return (
+        "<domestic_hot_water_mode_control_functionality>"
+        f"<mode>{mode}</mode>"
+        "</domestic_hot_water_mode_control_functionality>"
+    )
+
+
+def gateway_mode(
+    mode: str, valid_from: str | None = None, valid_to: str | None = None
+) -> str:
+    """Return the body for setting the gateway mode, optionally with a validity period."""
+    valid = ""
+    if valid_from is not None and valid_to is not None:
+        valid = f"<valid_from>{valid_from}</valid_from><valid_to>{valid_to}</valid_to>"
+
+    return (
+        "<gateway_mode_control_functionality>"
+        f"<mode>{mode}</mode>"
+        f"{valid}"
+        "</gateway_mode_control_functionality>"
+    )
+
+
+def locations_preset(locations: list[tuple[str, str, str]], preset: str) -> str:
+    """Return the body for setting a preset on the given (id, name, type) locations."""
+    items = "".join(
+        f'<location id="{loc_id}">'
+        f"<name>{name}</name>"
+        f"<type>{loc_type}</type>"
+        f"<preset>{preset}</preset>"
+        "</location>"
+        for loc_id, name, loc_type in locations
+    )
+    return f"<locations>{items}</locations>"
+
+
+def regulation_mode(mode: str, duration: int | None = None) -> str:
+    """Return the body for setting the heating regulation mode."""
+    period = "" if duration is None else f"<duration>{duration}</duration>"
+    return (
+        "<regulation_mode_control_functionality>"
+        f"{period}"
+        f"<mode>{mode}</mode>"
+        "</regulation_mode_control_functionality>"
+    )
+
+
+def schedule_rule(
+    rule_id: str,
+    name: str,
+    contexts: list[Context],
+    template_id: str | None = None,
+    template_tag: str | None = None,
+) -> str:
+    """Return the body for updating the contexts of a schedule-rule."""
+    template = f'<template tag="{template_tag}" />'
+    if template_id is not None:
+        template = f'<template id="{template_id}" />'
+
+    items = "".join(
+        "<context>"
+        + "".join(
+            f'<{container}><{tag} id="{object_id}" /></{container}>'
+            for container, tag, object_id in context
+        )
+        + "</context>"
+        for context in contexts
+    )
+    return (
+        "<rules>"
+        f"<rule id='{rule_id}'>"
+        f"<name><![CDATA[{name}]]></name>"
+        f"{template}"
+        f"<contexts>{items}</contexts>"
+        "</rule>"
+        "</rules>"
+    )
+
+
+def switch_state(func_type: str, func: str, state: str) -> str:
+    """Return the body for setting the state of a relay, toggle or lock."""
+    return f"<{func_type}><{func}>{state}</{func}></{func_type}>"
+
+
+def temperature_offset(offset: float) -> str:
+    """Return the body for setting a temperature-offset."""
+    return f"<offset_functionality><offset>{offset}</offset></offset_functionality>"
+
+
+def thermostat_setpoint(setpoint: float) -> str:
+    """Return the body for setting a thermostat-setpoint."""
+    return (
+        "<thermostat_functionality>"
+        f"<setpoint>{setpoint}</setpoint>"
+        "</thermostat_functionality>"
+    )
+
+
+def zone_profile(profile: str) -> str:
+    """Return the body for setting the heating profile of a zone."""
+    return (
+        "<thermostat_functionality>"
+        f"<regulation_control>{profile}</regulation_control>"
+        "</thermostat_functionality>"
+    )
@@ -0,0 +1,264 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise profiler: connect() and async_update() cycles, against a fixture or a live gateway.
+
+Each profiler runs a separate session: cProfile for the top functions, a stack-sampler for
+collapsed stacks (flamegraph.pl, speedscope) and tracemalloc for the allocation sites.
+A fixture is served by the simulator in its own thread, outside the profiled event loop.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import TYPE_CHECKING
+
+from plugwise import Smile
+from plugwise.constants import DEFAULT_PORT, DEFAULT_USERNAME
+from plugwise.simulator import DEFAULT_USERDATA, GatewaySimulator, start_simulators
+from plugwise.smilecomm import create_websession
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import FrameType
+
+PROFILERS = ("cprofile", "sample", "tracemalloc")
+DEFAULT_SAMPLE_INTERVAL = 0.0005
+DEFAULT_TRACEBACK_FRAMES = 8
+PACKAGE_PATTERN = f"{os.sep}plugwise{os.sep}"
+DEFAULT_TOP = 25
+
+
+class StackSampler:
+    """Sample the stack of a thread at an interval, counted per collapsed stack."""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        """Set the constructor for this class."""
+        self._stop = threading.Event()
+        self._switch_interval = sys.getswitchinterval()
+        self._thread: threading.Thread | None = None
+        self._thread_id = threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+
+    @staticmethod
+    def _label(frame: FrameType) -> str:
+        """Return the label of a frame: module-file and function."""
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+    def _run(self) -> None:
+        """Take the samples until stopped."""
+        while not self._stop.wait(self.interval):
+            if (frame := sys._current_frames().get(self._thread_id)) is None:  # noqa: SLF001
+                continue
+
+            stack: list[str] = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        """Start sampling the calling thread.
+
+        The sampler needs the GIL to take a sample: the switch-interval is lowered to the
+        sample-interval, else the samples cluster where the sampled thread releases the GIL.
+        """
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(self.interval)
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            sys.setswitchinterval(self._switch_interval)
+
+    def collapsed(self) -> str:
+        """Return the samples in the collapsed-stack format: frames;separated count."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+    def top(self, limit: int = DEFAULT_TOP) -> list[tuple[str, int, int]]:
+        """Return the functions with the most samples: (label, own, total)."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+
+        return [(label, count, total[label]) for label, count in own.most_common(limit)]
+
+
+def _start_simulator(path: str) -> tuple[int, Callable[[], None]]:
+    """Serve a fixture-directory from a thread, return the port and the stop-function."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    simulator = GatewaySimulator(
+        os.path.basename(path), userdata=os.path.dirname(path) or "."
+    )
+    (runner,) = asyncio.run_coroutine_threadsafe(
+        start_simulators([simulator]), loop
+    ).result()
+
+    def stop() -> None:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    return runner.addresses[0][1], stop
+
+
+async def _session(args: argparse.Namespace, port: int) -> None:
+    """Connect, then run the update-cycles."""
+    host = "127.0.0.1" if args.fixture else args.target
+    websession = create_websession()
+    try:
+        smile = Smile(
+            host, args.password, websession, port=port, username=args.username
+        )
+        await smile.connect()
+        for _ in range(args.updates):
+            await smile.async_update()
+    finally:
+        await websession.close()
+
+
+def _write(args: argparse.Namespace, name: str, text: str) -> None:
+    """Write an output-file, report its path."""
+    path = os.path.join(args.output, name)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+    print(f"Written to {path}")  # noqa: T201
+
+
+def _profile_cprofile(args: argparse.Namespace, port: int) -> None:
+    """Report the top functions by cumulative time, save the pstats-file."""
+    profiler = cProfile.Profile()
+    profiler.runcall(asyncio.run, _session(args, port))
+    stats = pstats.Stats(profiler, stream=sys.stdout)
+    stats.sort_stats("tottime").print_stats(args.top)
+    # The event loop-plumbing tops the cumulative list, restrict it to plugwise
+    stats.sort_stats("cumulative").print_stats(PACKAGE_PATTERN, args.top)
+    path = os.path.join(args.output, "plugwise.pstats")
+    stats.dump_stats(path)
+    print(f"Written to {path}")  # noqa: T201
+
+
+def _profile_sample(args: argparse.Namespace, port: int) -> None:
+    """Report the functions with the most samples, save the collapsed stacks."""
+    sampler = StackSampler(args.interval)
+    sampler.start()
+    try:
+        asyncio.run(_session(args, port))
+    finally:
+        sampler.stop()
+
+    samples = sampler.stacks.total()
+    print(f"{samples} samples, {'own':>7} {'total':>7}")  # noqa: T201
+    for label, own, total in sampler.top(args.top):
+        print(  # noqa: T201
+            f"{label[:60]:60} {100 * own / samples:6.1f}% {100 * total / samples:6.1f}%"
+        )
+    _write(args, "plugwise.collapsed", sampler.collapsed())
+
+
+def _profile_tracemalloc(args: argparse.Namespace, port: int) -> None:
+    """Report the allocation sites of the memory in use at the end, and the peak.
+
+    Every allocation stores its traceback, deep tracebacks slow the session down a lot.
+    """
+    tracemalloc.start(args.frames)
+    try:
+        asyncio.run(_session(args, port))
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    print(f"in use {current // 1024} KiB, peak {peak // 1024} KiB")  # noqa: T201
+    for stat in snapshot.statistics("lineno")[: args.top]:
+        print(stat)  # noqa: T201
+    lines = []
+    for stat in snapshot.statistics("traceback")[: args.top]:
+        lines.append(str(stat))
+        lines.extend(stat.traceback.format(most_recent_first=True))
+    _write(args, "plugwise.allocations", "\n".join(lines) + "\n")
+
+
+PROFILE_FUNCTIONS: dict[str, Callable[[argparse.Namespace, int], None]] = {
+    "cprofile": _profile_cprofile,
+    "sample": _profile_sample,
+    "tracemalloc": _profile_tracemalloc,
+}
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the profile-arguments to a (sub)parser."""
+    parser.add_argument(
+        "target", help="fixture-directory, userdata-fixture name, or gateway host"
+    )
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument(
+        "--profilers",
+        default=",".join(PROFILERS),
+        help=f"comma-separated, of {', '.join(PROFILERS)}",
+    )
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    parser.add_argument(
+        "--interval", type=float, default=DEFAULT_SAMPLE_INTERVAL, help="sampler"
+    )
+    parser.add_argument(
+        "--frames", type=int, default=DEFAULT_TRACEBACK_FRAMES, help="tracemalloc"
+    )
+    parser.add_argument("--output", default=".", help="directory of the output-files")
+    parser.add_argument("--password", default="", help="live gateway only")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--username", default=DEFAULT_USERNAME)
+
+
+def profile(args: argparse.Namespace) -> None:
+    """Run the selected profilers, each in a session of its own."""
+    profilers = args.profilers.split(",")
+    if unknown := set(profilers) - set(PROFILERS):
+        raise SystemExit(f"Unknown profiler(s): {', '.join(sorted(unknown))}")
+
+    args.fixture = None
+    for path in (args.target, os.path.join(DEFAULT_USERDATA, args.target)):
+        if os.path.isdir(path):
+            args.fixture = os.path.normpath(path)
+            break
+
+    stop = None
+    port = args.port
+    if args.fixture:
+        port, stop = _start_simulator(args.fixture)
+
+    try:
+        for name in profilers:
+            print(f"--- {name}: {args.target}, {args.updates} updates ---")  # noqa: T201
+            start = time.perf_counter()
+            PROFILE_FUNCTIONS[name](args, port)
+            print(f"--- {name}: {time.perf_counter() - start:.2f} s ---")  # noqa: T201
+    finally:
+        if stop is not None:
+            stop()
@@ -0,0 +1,126 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise adaptive poll-scheduler.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from copy import deepcopy
+import time
+from typing import TYPE_CHECKING
+
+from plugwise.constants import (
+    DEFAULT_POLL_MARGIN,
+    DEFAULT_POLL_MAX,
+    DEFAULT_POLL_MIN,
+    LOGGER,
+    GwEntityData,
+)
+
+if TYPE_CHECKING:
+    from plugwise import Smile
+
+
+class PollScheduler:
+    """Pick the next poll-time of a gateway, within the user-set bounds.
+
+    The next poll is planned just after new data is expected: either from the
+    logging-intervals of the point- and interval-logs, or from the observed
+    change-period of the entities. When nothing changes, the interval backs off.
+    """
+
+    def __init__(
+        self,
+        api: Smile,
+        min_interval: float = DEFAULT_POLL_MIN,
+        max_interval: float = DEFAULT_POLL_MAX,
+        margin: float = DEFAULT_POLL_MARGIN,
+    ) -> None:
+        """Set the constructor for this class."""
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Invalid poll-interval bounds")
+
+        self._api = api
+        self._last_change: dict[str, float] = {}
+        self._margin = margin
+        self._max_interval = max_interval
+        self._min_interval = min_interval
+        self._periods: dict[str, float] = {}
+        self._previous: dict[str, GwEntityData] = {}
+        self.interval = min_interval
+        self.next_update = 0.0
+
+    @property
+    def delay(self) -> float:
+        """Return the number of seconds until the next planned poll."""
+        return max(0.0, self.next_update - time.monotonic())
+
+    async def async_update(self) -> dict[str, GwEntityData]:
+        """Poll the gateway and plan the next poll."""
+        now = time.monotonic()
+        data = await self._api.async_update()
+        changed = self._observe(data, now)
+        self.interval = self._next_interval(changed, now)
+        self.next_update = now + self.interval
+        LOGGER.debug(
+            "Next poll in %.1f seconds, %s entities changed", self.interval, changed
+        )
+        return data
+
+    async def async_wait_and_update(self) -> dict[str, GwEntityData]:
+        """Sleep until the planned poll-time, then poll the gateway."""
+        await asyncio.sleep(self.delay)
+        return await self.async_update()
+
+    def _observe(self, data: dict[str, GwEntityData], now: float) -> int:
+        """Detect the changed entities, update their estimated change-period."""
+        changed = 0
+        for entity_id, entity in data.items():
+            if (
+                previous := self._previous.get(entity_id)
+            ) is None or previous == entity:
+                continue
+
+            changed += 1
+            if (last := self._last_change.get(entity_id)) is not None:
+                gap = now - last
+                period = self._periods.get(entity_id, gap)
+                # Exponential moving average, smoothing single late or early changes
+                self._periods[entity_id] = (period + gap) / 2
+
+            self._last_change[entity_id] = now
+
+        # Forget the change-periods of removed entities
+        for entity_id in set(self._last_change) - set(data):
+            del self._last_change[entity_id]
+            self._periods.pop(entity_id, None)
+
+        # The entity-dicts can be updated in place, store a copy
+        self._previous = deepcopy(data)
+        return changed
+
+    def _next_interval(self, changed: int, now: float) -> float:
+        """Return the seconds until new data is expected."""
+        waits: list[float] = []
+        if (log_wait := self._api.next_log_update) is not None:
+            waits.append(log_wait + self._margin)
+
+        for entity_id, period in self._periods.items():
+            # Changed on each poll: the actual change-period may be shorter, probe faster
+            if period < self.interval + self._margin:
+                period /= 2
+
+            wait = self._last_change[entity_id] + period - now
+            if wait > 0:
+                waits.append(wait + self._margin)
+
+        if waits:
+            interval = min(waits)
+        elif changed:
+            interval = self.interval
+        else:
+            # Nothing expected and nothing changed: back off
+            interval = self.interval * 2
+
+        return min(max(interval, self._min_interval), self._max_interval)
@@ -0,0 +1,316 @@
+"""Use of this source code is governed by the MIT license found in the LICENSE file.
+
+Plugwise gateway simulator: serve userdata-fixtures with latency- and fault-injection.
+
+For load-testing pollers and their retry-behaviour locally, for example:
+
+    python -m plugwise.simulator adam_plus_anna_new p1v4_442_single --count 10 \
+        --latency 0.2 --distribution exponential --error-504 0.05 --drift 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import random
+
+from plugwise.constants import LOGGER
+
+from aiohttp import web
+from defusedxml import ElementTree as etree
+
+# The userdata-fixtures of the repository, independent of the working directory
+DEFAULT_USERDATA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "userdata"
+)
+EMPTY_XML = "<xml />"
+LATENCY_DISTRIBUTIONS = ("constant", "exponential", "uniform")
+# The legacy gateways provide these endpoints, the others are rendered from the domain_objects
+ENDPOINT_TAGS = {"appliances": "appliance", "locations": "location"}
+# Removing these disconnects the gateway instead of changing its topology
+FIXED_APPLIANCE_TYPES = {"gateway", "heater_central"}
+
+
+def render_elements(domain_objects: etree.Element, tag: str, item_id: str = "") -> str:
+    """Return the elements of a type, or the one with the given id, from the domain_objects.
+
+    As served by the non-legacy gateways on their appliances- and locations-endpoints.
+    """
+    elements = [
+        etree.tostring(element, encoding="unicode")
+        for element in domain_objects.findall(f"./{tag}")
+        if not item_id or element.get("id") == item_id
+    ]
+    return f"<{tag}s>{''.join(elements)}</{tag}s>"
+
+
+class FaultProfile:
+    """Latency-distribution and fault-probabilities of a simulated gateway.
+
+    The probabilities are per request; drift is the relative step of the
+    measurement values per request, cumulative values only increase.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        latency: float = 0.0,
+        distribution: str = "constant",
+        error_504: float = 0.0,
+        timeout: float = 0.0,
+        timeout_delay: float = 60.0,
+        unauthorized: float = 0.0,
+        truncated: float = 0.0,
+        drift: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        """Set the constructor for this class."""
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution}")
+
+        self.distribution = distribution
+        self.drift = drift
+        self.error_504 = error_504
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.timeout = timeout
+        self.timeout_delay = timeout_delay
+        self.truncated = truncated
+        self.unauthorized = unauthorized
+
+    def delay(self) -> float:
+        """Return the latency of a request, latency being the mean."""
+        match self.distribution:
+            case "exponential":
+                return (
+                    self.random.expovariate(1 / self.latency) if self.latency else 0.0
+                )
+            case "uniform":
+                return self.random.uniform(0.0, 2 * self.latency)
+            case _:
+                return self.latency
+
+    def happens(self, probability: float) -> bool:
+        """Draw a fault with the given probability."""
+        return probability > 0 and self.random.random() < probability
+
+
+class GatewaySimulator:
+    """Serve a userdata-fixture like a Plugwise gateway does."""
+
+    def __init__(
+        self,
+        fixture: str,
+        faults: FaultProfile | None = None,
+        userdata: str = DEFAULT_USERDATA,
+    ) -> None:
+        """Set the constructor for this class."""
+        self._files: dict[str, str] = {}
+        path = os.path.join(userdata, fixture)
+        for name in os.listdir(path):
+            if name.endswith(".xml"):
+                with open(os.path.join(path, name), encoding="utf-8") as file:
+                    self._files[name.removesuffix(".xml")] = file.read()
+
+        self._removed: list[tuple[str, int, etree.Element]] = []
+        self._trees: dict[str, etree.Element] = {}
+        self.faults = faults or FaultProfile()
+        self.fixture = fixture
+        self.requests = 0
+
+    def _tree(self, name: str) -> etree.Element:
+        """Return the parsed fixture-file, once parsed it is served: drifted, items removed."""
+        if (tree := self._trees.get(name)) is None:
+            tree = self._trees[name] = etree.fromstring(self._files[name])
+
+        return tree
+
+    @property
+    def removed(self) -> list[str]:
+        """Return the ids of the removed items."""
+        return [item.get("id") for _, _, item in self._removed]
+
+    def removable_appliances(self) -> list[str]:
+        """Return the ids of the appliances that can be removed, not the gateway or heater."""
+        name = (
+            "core.appliances"
+            if "core.appliances" in self._files
+            else "core.domain_objects"
+        )
+        return [
+            appliance.get("id")
+            for appliance in self._tree(name).findall("./appliance")
+            if appliance.find("type").text not in FIXED_APPLIANCE_TYPES
+        ]
+
+    def remove(self, item_id: str) -> None:
+        """Leave an item out of all responses, as if it was removed from the gateway."""
+        for name in self._files:
+            if not name.startswith("core."):
+                continue
+
+            tree = self._tree(name)
+            for index, item in enumerate(tree):
+                if item.get("id") == item_id:
+                    tree.remove(item)
+                    self._removed.append((name, index, item))
+                    break
+
+    def restore(self) -> None:
+        """Put the removed items back, as if they were added to the gateway."""
+        while self._removed:
+            name, index, item = self._removed.pop()
+            self._tree(name).insert(index, item)
+
+    def _drift(self, tree: etree.Element) -> None:
+        """Move the measurement values one step."""
+        faults = self.faults
+        for log in tree.iter():
+            if not log.tag.endswith("_log"):
+                continue
+
+            cumulative = log.tag == "cumulative_log"
+            for measurement in log.iter("measurement"):
+                try:
+                    value = float(measurement.text or "")
+                except ValueError:
+                    continue
+
+                step = faults.random.gauss(0.0, faults.drift) * (abs(value) or 1.0)
+                value += abs(step) if cumulative else step
+                # Keep integer values, e.g. status-codes, integer
+                if "." in (measurement.text or ""):
+                    measurement.text = f"{value:.2f}"
+                else:
+                    measurement.text = str(round(value))
+
+    def _render(self, endpoint: str, item_id: str) -> str | None:
+        """Return the XML of an endpoint, None when not available."""
+        if endpoint in {"system", "system/status.xml"}:
+            return self._files.get("system_status_xml")
+
+        name = f"core.{endpoint.removeprefix('core/')}"
+        if (tag := ENDPOINT_TAGS.get(endpoint.removeprefix("core/"))) is not None:
+            if name not in self._files:
+                return render_elements(self._tree("core.domain_objects"), tag, item_id)
+
+        if name not in self._files:
+            return None
+
+        if name not in self._trees and not self.faults.drift:
+            return self._files[name]
+
+        tree = self._tree(name)
+        if self.faults.drift:
+            self._drift(tree)
+        return str(etree.tostring(tree, encoding="unicode"))
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        """Handle a request, injecting the latency and faults."""
+        self.requests += 1
+        faults = self.faults
+        if delay := faults.delay():
+            await asyncio.sleep(delay)
+        if faults.happens(faults.timeout):
+            await asyncio.sleep(faults.timeout_delay)
+        if faults.happens(faults.unauthorized):
+            raise web.HTTPUnauthorized()
+        if faults.happens(faults.error_504):
+            raise web.HTTPGatewayTimeout()
+
+        if request.method != "GET":
+            raise web.HTTPAccepted(text=EMPTY_XML)
+
+        endpoint, _, item_id = request.path.strip("/").partition(";id=")
+        if (text := self._render(endpoint, item_id)) is None:
+            raise web.HTTPNotFound()
+
+        if faults.happens(faults.truncated):
+            text = text[: faults.random.randrange(len(text))]
+        return web.Response(text=text, content_type="text/xml")
+
+    def app(self) -> web.Application:
+        """Return the web-application of the simulated gateway."""
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        return app
+
+
+async def start_simulators(
+    simulators: list[GatewaySimulator], host: str = "127.0.0.1", port: int = 0
+) -> list[web.AppRunner]:
+    """Start the simulators on consecutive ports, or on free ports when port is 0."""
+    runners: list[web.AppRunner] = []
+    for index, simulator in enumerate(simulators):
+        runner = web.AppRunner(simulator.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port + index if port else 0).start()
+        runners.append(runner)
+
+    return runners
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Run the simulators until cancelled."""
+    simulators = [
+        GatewaySimulator(
+            fixture,
+            FaultProfile(
+                latency=args.latency,
+                distribution=args.distribution,
+                error_504=args.error_504,
+                timeout=args.timeout,
+                unauthorized=args.unauthorized,
+                truncated=args.truncated,
+                drift=args.drift,
+                seed=None if args.seed is None else args.seed + index,
+            ),
+            args.userdata,
+        )
+        for index, fixture in enumerate(
+            fixture for fixture in args.fixtures for _ in range(args.count)
+        )
+    ]
+    runners = await start_simulators(simulators, args.host, args.port)
+    for simulator, runner in zip(simulators, runners, strict=True):
+        LOGGER.warning("%s on port %s", simulator.fixture, runner.addresses[0][1])
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Parse the command line and run the simulators."""
+    parser = argparse.ArgumentParser(
+        prog="python -m plugwise.simulator", description="Simulate Plugwise gateways."
+    )
+    parser.add_argument("fixtures", nargs="+", help="userdata-fixture(s) to serve")
+    parser.add_argument("--count", type=int, default=1, help="instances per fixture")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="first port, 0: free")
+    parser.add_argument("--userdata", default=DEFAULT_USERDATA)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean, seconds")
+    parser.add_argument(
+        "--distribution", choices=LATENCY_DISTRIBUTIONS, default="constant"
+    )
+    parser.add_argument("--error-504", type=float, default=0.0, help="probability")
+    parser.add_argument("--timeout", type=float, default=0.0, help="probability")
+    parser.add_argument("--unauthorized", type=float, default=0.0, help="probability")
+    parser.add_argument("--truncated", type=float, default=0.0, help="probability")
+    parser.add_argument("--drift", type=float, default=0.0, help="relative step")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args))
+
+
+if __name__ == "__main__":
+    main()
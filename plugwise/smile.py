@@ -5,7 +5,9 @@ Plugwise backend module for Home Assistant Core.
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Awaitable, Callable
+import copy
 import datetime as dt
 from typing import Any, cast
 
@@ -16,6 +18,7 @@ from plugwise.constants import (
     DOMAIN_OBJECTS,
     GATEWAY_REBOOT,
     LOCATIONS,
+    LOGGER,
     MAX_SETPOINT,
     MIN_SETPOINT,
     NONE,
@@ -25,11 +28,26 @@ from plugwise.constants import (
     STATE_OFF,
     STATE_ON,
     GwEntityData,
+    MemberSwitchResult,
     SwitchType,
     ThermoLoc,
 )
 from plugwise.data import SmileData
 from plugwise.exceptions import ConnectionFailedError, DataMissingError, PlugwiseError
+from plugwise.payloads import (
+    Context,
+    dhw_mode,
+    gateway_mode,
+    locations_preset,
+    regulation_mode,
+    schedule_rule,
+    switch_state,
+    temperature_offset,
+    thermostat_setpoint,
+    zone_context,
+    zone_profile,
+)
+from plugwise.util import replace_elements
 
 from defusedxml import ElementTree as etree
 
@@ -57,6 +75,10 @@ def model_to_switch_items(model: str, state: str, switch: Munch) -> tuple[str, M
     return state, switch
 
 
+# The containers changed in place while collecting the entities
+COLLECTED_IN_PLACE = ("_loc_data", "_notifications", "_schedule_old_states")
+
+
 class SmileAPI(SmileData):
     """The Plugwise SmileAPI helper class for actual Plugwise devices."""
 
@@ -85,18 +107,74 @@ class SmileAPI(SmileData):
         self._request = _request
         self._schedule_old_states = _schedule_old_states
         self.smile = smile
+        self._pending_updates: dict[tuple[str, str, str | None], Any] = {}
+        self._pending_writes: dict[str, Munch] = {}
+        self._rule_locks: dict[str, asyncio.Lock] = {}
+        self._schedule_contexts: dict[str, list[Context]] = {}
         self.therms_with_offset_func: list[str] = []
+        self.write_coalesce_window: float = 0.0
 
     @property
     def cooling_present(self) -> bool:
         """Return the cooling capability."""
         return self._cooling_present
 
+    @property
+    def pending_updates(self) -> dict[str, list[str]]:
+        """Return the optimistically patched entity-items, awaiting confirmation by the next update."""
+        pending: dict[str, list[str]] = {}
+        for entity_id, key, subkey in self._pending_updates:
+            item = key if subkey is None else f"{key}/{subkey}"
+            pending.setdefault(entity_id, []).append(item)
+
+        return pending
+
     async def full_xml_update(self) -> None:
         """Perform a first fetch of the Plugwise server XML data."""
-        self._domain_objects = await self._request(DOMAIN_OBJECTS)
+        self._set_domain_objects(await self._request(DOMAIN_OBJECTS))
+
+    def xml_commands(self) -> list[str]:
+        """Return the requests of a full update, see collect_from_xml()."""
+        return [DOMAIN_OBJECTS]
+
+    def collect_from_xml(
+        self, xml: dict[str, etree.Element]
+    ) -> dict[str, GwEntityData]:
+        """Perform a full update from already received XML data, as done by a fleet-worker."""
+        try:
+            self._set_domain_objects(xml[DOMAIN_OBJECTS])
+            self._collect_entities()
+        except KeyError as err:
+            raise DataMissingError(f"No data: {err}") from err
+
+        return self.gw_entities
+
+    def _set_domain_objects(self, domain_objects: etree.Element) -> None:
+        """Replace the XML data and collect the notifications."""
+        self._domain_objects = domain_objects
+        self._schedule_contexts = {}
         self._get_plugwise_notifications()
 
+    async def fast_xml_update(self) -> None:
+        """Refresh the location(s) in the present XML data, for the fast polling tier."""
+        replace_elements(self._domain_objects, await self._fetch_locations())
+
+    async def _fetch_locations(self) -> list[etree.Element]:
+        """Fetch the location(s) for the fast polling tier.
+
+        A P1 only requires its home location (the power-logs), a thermostat all locations.
+        """
+        command = LOCATIONS
+        if self.smile.type == "power":
+            command = f"{LOCATIONS};id={self._home_loc_id}"
+
+        result = await self._request(command)
+        locations: list[etree.Element] = result.findall("./location")
+        if not locations:
+            raise KeyError("No location data present!")
+
+        return locations
+
     def get_all_gateway_entities(self) -> None:
         """Collect the Plugwise gateway entities and their data and states from the received raw XML-data.
 
@@ -126,32 +204,172 @@ class SmileAPI(SmileData):
 
         return therm_list
 
-    async def async_update(self) -> dict[str, GwEntityData]:
+    async def async_update(
+        self, fast: bool = False, offload: bool = False
+    ) -> dict[str, GwEntityData]:
         """Perform an full update: re-collect all gateway entities and their data and states.
 
         Any change in the connected entities will be detected immediately.
+        With fast selected, only the locations are refreshed, see fast_xml_update().
+        With offload selected, the entities are collected in an executor, see _offloaded_update().
         """
-        self._zones = {}
-        self.gw_entities = {}
+        self._item_count = None
         try:
-            await self.full_xml_update()
-            self.get_all_gateway_entities()
-            # Set self._cooling_enabled - required for set_temperature(),
-            # also, check for a failed data-retrieval
-            if self.heater_id != NONE:
-                heat_cooler = self.gw_entities[self.heater_id]
-                if (
-                    "binary_sensors" in heat_cooler
-                    and "cooling_enabled" in heat_cooler["binary_sensors"]
-                ):
-                    self._cooling_enabled = heat_cooler["binary_sensors"][
-                        "cooling_enabled"
-                    ]
+            if offload:
+                await self._offloaded_update(fast)
+            else:
+                if fast:
+                    await self.fast_xml_update()
+                else:
+                    await self.full_xml_update()
+                self._collect_entities()
         except KeyError as err:
             raise DataMissingError(f"No data: {err}") from err
 
+        self._reconcile_pending_updates()
         return self.gw_entities
 
+    def _collect_entities(self) -> None:
+        """Collect all gateway entities from the present XML data."""
+        self._zones = {}
+        self.gw_entities = {}
+        self.get_all_gateway_entities()
+        # Forget the schedule-states of removed locations
+        for loc_id in set(self._schedule_old_states) - set(self._loc_data):
+            del self._schedule_old_states[loc_id]
+        # Set self._cooling_enabled - required for set_temperature(),
+        # also, check for a failed data-retrieval
+        if self.heater_id != NONE:
+            heat_cooler = self.gw_entities[self.heater_id]
+            if (
+                "binary_sensors" in heat_cooler
+                and "cooling_enabled" in heat_cooler["binary_sensors"]
+            ):
+                self._cooling_enabled = heat_cooler["binary_sensors"]["cooling_enabled"]
+
+    async def _offloaded_update(self, fast: bool) -> None:
+        """Collect the entities in an executor, then swap in the results at once.
+
+        The collection runs on a snapshot of this object with its own XML data and its own
+        copies of the containers it changes in place, the event loop keeps serving the present
+        data until the new XML data and entities replace it together. The contents of these
+        containers are swapped into the originals, shared with the Smile object.
+        """
+        if fast:
+            locations = await self._fetch_locations()
+        else:
+            domain_objects = await self._request(DOMAIN_OBJECTS)
+
+        snapshot = copy.copy(self)
+        for name in COLLECTED_IN_PLACE:
+            setattr(snapshot, name, copy.deepcopy(getattr(self, name)))
+        initial = dict(vars(snapshot))
+
+        def collect() -> None:
+            if fast:
+                snapshot._domain_objects = copy.deepcopy(self._domain_objects)
+                replace_elements(snapshot._domain_objects, locations)
+            else:
+                snapshot._set_domain_objects(domain_objects)
+            snapshot._collect_entities()
+
+        await asyncio.get_running_loop().run_in_executor(None, collect)
+        for name in COLLECTED_IN_PLACE:
+            container = getattr(self, name)
+            container.clear()
+            container.update(getattr(snapshot, name))
+        # Only take over the attributes the collection has replaced
+        vars(self).update(
+            {
+                key: value
+                for key, value in vars(snapshot).items()
+                if key not in COLLECTED_IN_PLACE and initial.get(key) is not value
+            }
+        )
+
+    def _patch_entity(
+        self, entity_id: str, key: str, value: Any, subkey: str | None = None
+    ) -> None:
+        """Optimistically patch an existing entity-item after an accepted write.
+
+        The gateway has accepted the change, but reports it only in the next update.
+        """
+        entity = cast(dict[str, Any], self.gw_entities.get(entity_id, {}))
+        target = entity if subkey is None else entity.get(key)
+        item = key if subkey is None else subkey
+        if isinstance(target, dict) and item in target:
+            target[item] = value
+            self._pending_updates[(entity_id, key, subkey)] = value
+
+    def _reconcile_pending_updates(self) -> None:
+        """Compare the patched entity-items with the updated data, the updated data prevails."""
+        for (entity_id, key, subkey), value in self._pending_updates.items():
+            current = self.gw_entities.get(entity_id, {}).get(key)
+            if subkey is not None and isinstance(current, dict):
+                current = current.get(subkey)
+            if current != value:
+                LOGGER.debug(
+                    "Patched %s of %s not confirmed: %s, updated to %s",
+                    key if subkey is None else f"{key}/{subkey}",
+                    entity_id,
+                    value,
+                    current,
+                )
+
+        self._pending_updates = {}
+
+    def _climate_entities(self, loc_id: str) -> list[str]:
+        """Return the climate-entities (zone or thermostat) controlling the location."""
+        return [
+            entity_id
+            for entity_id, entity in self.gw_entities.items()
+            if "thermostat" in entity
+            and (entity_id == loc_id or entity.get("location") == loc_id)
+        ]
+
+    async def async_refresh_entities(
+        self, entity_ids: list[str]
+    ) -> dict[str, GwEntityData]:
+        """Refresh only the given entities, against the present topology.
+
+        Fetch only the related appliances and/or locations, replace them in the present XML data
+        and re-collect the data of the given entities.
+        """
+        commands: dict[str, None] = {}
+        for entity_id in entity_ids:
+            if (entity := self.gw_entities.get(entity_id)) is None:
+                raise PlugwiseError(f"Plugwise: unknown entity {entity_id}")
+
+            if self._domain_objects.find(f'./appliance[@id="{entity_id}"]') is not None:
+                commands[f"{APPLIANCES};id={entity_id}"] = None
+            # Zones, the P1 gateway and the climate- and smartmeter-appliance locations
+            loc_ids = [entity_id]
+            if "thermostat" in entity or entity["dev_class"] == "smartmeter":
+                loc_ids.append(entity.get("location", NONE))
+            for loc_id in loc_ids:
+                if self._domain_objects.find(f'./location[@id="{loc_id}"]') is not None:
+                    commands[f"{LOCATIONS};id={loc_id}"] = None
+
+        results = await asyncio.gather(
+            *(self._request(command) for command in commands)
+        )
+        for result in results:
+            replace_elements(self._domain_objects, list(result))
+
+        self._item_count = None
+        for entity_id in entity_ids:
+            if entity_id in self._zones:
+                self._get_location_data(entity_id, self._zones[entity_id])
+            else:
+                self._update_gw_entity(
+                    entity_id,
+                    self.gw_entities[entity_id],
+                    self._low_battery_macs,
+                    refresh=True,
+                )
+
+        return {entity_id: self.gw_entities[entity_id] for entity_id in entity_ids}
+
     ########################################################################################################
     ###  API Set and HA Service-related Functions                                                        ###
     ########################################################################################################
@@ -180,7 +398,6 @@ class SmileAPI(SmileData):
             case "dhw_temperature":
                 key = "domestic_hot_water_setpoint"
 
-        temp = str(temperature)
         thermostat_id: str | None = None
         locator = f'appliance[@id="{self._heater_id}"]/actuator_functionalities/thermostat_functionality'
         if th_func_list := self._domain_objects.findall(locator):
@@ -191,13 +408,8 @@ class SmileAPI(SmileData):
         if thermostat_id is None:
             raise PlugwiseError(f"Plugwise: cannot change setpoint, {key} not found")
 
-        data = (
-            "<thermostat_functionality>"
-            f"<setpoint>{temp}</setpoint>"
-            "</thermostat_functionality>"
-        )
         uri = f"{APPLIANCES};id={self._heater_id}/thermostat;id={thermostat_id}"
-        await self.call_request(uri, method="put", data=data)
+        await self._coalesced_put(uri, thermostat_setpoint(temperature))
 
     async def set_offset(self, dev_id: str, offset: float) -> None:
         """Set the Temperature offset for thermostats that support this feature."""
@@ -206,32 +418,45 @@ class SmileAPI(SmileData):
                 "Plugwise: this device does not have temperature-offset capability"
             )
 
-        value = str(offset)
-        data = f"<offset_functionality><offset>{value}</offset></offset_functionality>"
         uri = f"{APPLIANCES};id={dev_id}/offset;type=temperature_offset"
-        await self.call_request(uri, method="put", data=data)
+        await self._coalesced_put(uri, temperature_offset(offset))
 
     async def set_preset(self, loc_id: str, preset: str) -> None:
         """Set the given Preset on the relevant Thermostat - from LOCATIONS."""
-        if (presets := self._presets(loc_id)) is None:
-            raise PlugwiseError("Plugwise: no presets available")  # pragma: no cover
-        if preset not in list(presets):
-            raise PlugwiseError(f"Plugwise: invalid preset {preset}")
-
-        current_location = self._domain_objects.find(f'location[@id="{loc_id}"]')
-        location_name = current_location.find("name").text
-        location_type = current_location.find("type").text
-        data = (
-            "<locations>"
-            f'<location id="{loc_id}">'
-            f"<name>{location_name}</name>"
-            f"<type>{location_type}</type>"
-            f"<preset>{preset}</preset>"
-            "</location>"
-            "</locations>"
+        await self.set_presets([loc_id], preset)
+
+    async def set_presets(self, loc_ids: list[str], preset: str) -> None:
+        """Set the given Preset on the Thermostats of several locations.
+
+        All locations are validated first, then a request per location is sent, concurrently.
+        """
+        locations: list[tuple[str, str, str]] = []
+        for loc_id in loc_ids:
+            if (presets := self._presets(loc_id)) is None:
+                raise PlugwiseError(
+                    "Plugwise: no presets available"
+                )  # pragma: no cover
+            if preset not in list(presets):
+                raise PlugwiseError(f"Plugwise: invalid preset {preset}")
+
+            current_location = self._domain_objects.find(f'location[@id="{loc_id}"]')
+            location_name = current_location.find("name").text
+            location_type = current_location.find("type").text
+            locations.append((loc_id, location_name, location_type))
+
+        await asyncio.gather(
+            *(
+                self.call_request(
+                    f"{LOCATIONS};id={location[0]}",
+                    method="put",
+                    data=locations_preset([location], preset),
+                )
+                for location in locations
+            )
         )
-        uri = f"{LOCATIONS};id={loc_id}"
-        await self.call_request(uri, method="put", data=data)
+        for loc_id in loc_ids:
+            for entity_id in self._climate_entities(loc_id):
+                self._patch_entity(entity_id, "active_preset", preset)
 
     async def set_select(
         self,
@@ -246,17 +471,24 @@ class SmileAPI(SmileData):
                 state = STATE_ON if option == "comfort" else STATE_OFF
                 # Appliance id is passed
                 await self.set_switch_state(appl_or_loc_id, None, key, state)
+                self._patch_entity(appl_or_loc_id, key, option)
             case "select_gateway_mode":
                 await self.set_gateway_mode(option)
+                self._patch_entity(self._gateway_id, key, option)
             case "select_regulation_mode":
                 await self.set_regulation_mode(option)
+                self._patch_entity(self._gateway_id, key, option)
             case "select_schedule":
                 # The schedule name corresponds to the select option
                 # Location id is passed
                 await self.set_schedule_state(appl_or_loc_id, option, state=state)
+                selected = OFF if STATE_OFF in (option, state) else option
+                for entity_id in self._climate_entities(appl_or_loc_id):
+                    self._patch_entity(entity_id, key, selected)
             case "select_zone_profile":
                 # Location id is passed
                 await self.set_zone_profile(appl_or_loc_id, option)
+                self._patch_entity(appl_or_loc_id, key, option)
 
     async def set_dhw_mode(
         self, key: str, appl_id: str, mode: str, length: int | str | None = None
@@ -280,15 +512,10 @@ class SmileAPI(SmileData):
             case 2:
                 await self.set_select(key, appl_id, mode)
             case _:
-                data = (
-                    "<domestic_hot_water_mode_control_functionality>"
-                    f"<mode>{mode}</mode>"
-                    "</domestic_hot_water_mode_control_functionality>"
-                )
                 uri = (
                     f"{APPLIANCES};type=heater_central/domestic_hot_water_mode_control"
                 )
-                await self.call_request(uri, method="put", data=data)
+                await self.call_request(uri, method="put", data=dhw_mode(mode))
 
     async def set_gateway_mode(self, mode: str) -> None:
         """Set the gateway mode."""
@@ -298,7 +525,7 @@ class SmileAPI(SmileData):
             raise PlugwiseError(f"Plugwise: invalid gateway mode {mode}")
 
         end_time = "2037-04-21T08:00:53.000Z"
-        valid = ""
+        valid_from: str | None = None
         if mode == "away":
             time_1 = self._domain_objects.find("./gateway/time").text
             away_time = (
@@ -307,20 +534,12 @@ class SmileAPI(SmileData):
                 .isoformat(timespec="milliseconds")
                 .replace("+00:00", "Z")
             )
-            valid = (
-                f"<valid_from>{away_time}</valid_from><valid_to>{end_time}</valid_to>"
-            )
+            valid_from = away_time
         if mode == "vacation":
             time_2 = str(dt.date.today() - dt.timedelta(1))
-            vacation_time = time_2 + "T23:00:00.000Z"
-            valid = f"<valid_from>{vacation_time}</valid_from><valid_to>{end_time}</valid_to>"
-
-        data = (
-            "<gateway_mode_control_functionality>"
-            f"<mode>{mode}</mode>"
-            f"{valid}"
-            "</gateway_mode_control_functionality>"
-        )
+            valid_from = time_2 + "T23:00:00.000Z"
+
+        data = gateway_mode(mode, valid_from, end_time)
         uri = f"{APPLIANCES};id={self.gateway_id}/gateway_mode_control"
         await self.call_request(uri, method="put", data=data)
 
@@ -331,16 +550,11 @@ class SmileAPI(SmileData):
         ):
             raise PlugwiseError(f"Plugwise: invalid regulation mode {mode}")
 
-        duration = ""
+        duration: int | None = None
         if "bleeding" in mode:
-            duration = "<duration>300</duration>"
+            duration = 300
 
-        data = (
-            "<regulation_mode_control_functionality>"
-            f"{duration}"
-            f"<mode>{mode}</mode>"
-            "</regulation_mode_control_functionality>"
-        )
+        data = regulation_mode(mode, duration)
         uri = f"{APPLIANCES};type=gateway/regulation_mode_control"
         await self.call_request(uri, method="put", data=data)
 
@@ -349,13 +563,8 @@ class SmileAPI(SmileData):
         if profile not in ALLOWED_ZONE_PROFILES:
             raise PlugwiseError(f"Plugwise: invalid zone profile {profile}")
 
-        data = (
-            "<thermostat_functionality>"
-            f"<regulation_control>{profile}</regulation_control>"
-            "</thermostat_functionality>"
-        )
         uri = f"{LOCATIONS};id={loc_id}/thermostat"
-        await self.call_request(uri, method="post", data=data)
+        await self.call_request(uri, method="post", data=zone_profile(profile))
 
     async def set_schedule_state(
         self, loc_id: str, name: str | None = None, state: int | str | None = None
@@ -365,6 +574,18 @@ class SmileAPI(SmileData):
         Determined from - DOMAIN_OBJECTS.
         Used in HA Core to set the hvac_mode: in practice switch between schedule on - off.
         """
+        await self.set_schedule_states([loc_id], name=name, state=state)
+
+    async def set_schedule_states(
+        self,
+        loc_ids: list[str],
+        name: str | None = None,
+        state: int | str | None = None,
+    ) -> None:
+        """Activate/deactivate the Schedule, with the given name, for several locations.
+
+        The contexts of all locations are combined, so each schedule-rule is updated only once.
+        """
         # Input checking
         if state is None:
             state = STATE_ON
@@ -375,62 +596,97 @@ class SmileAPI(SmileData):
         if name == OFF:
             state = STATE_OFF
 
-        # Handle no schedule-name / schedule-off requested: find the active schedule
-        if name is None or name == OFF:
-            _, name = self._schedules(loc_id)
-            if name in (NONE, OFF):  # no active schedule found, nothing to do
-                return
+        changes: dict[str, dict[str, str]] = {}
+        for loc_id in loc_ids:
+            schedule = name
+            # Handle no schedule-name / schedule-off requested: find the active schedule
+            if schedule is None or schedule == OFF:
+                _, schedule = self._schedules(loc_id)
+                if schedule in (NONE, OFF):  # no active schedule found, nothing to do
+                    continue
+
+            changes.setdefault(schedule, {})[loc_id] = state
 
-        schedule_rule = self._rule_ids_by_name(name, loc_id)
+        for schedule, loc_states in changes.items():
+            await self._set_schedule_rule(schedule, loc_states)
+
+    async def _set_schedule_rule(self, name: str, loc_states: dict[str, str]) -> None:
+        """Update the contexts of the schedule-rule with the given name, in one request."""
+        rule_ids = self._rule_ids_by_name(name, next(iter(loc_states)))
         # Raise an error when the schedule name does not exist
-        if not schedule_rule or schedule_rule is None:
+        if not rule_ids or rule_ids is None:
             raise PlugwiseError(f"Plugwise: no schedule with name {name} available")
 
+        schedule_rule_id: str = next(iter(rule_ids))
+        # The contexts are read, written and stored per rule, one change at a time:
+        # a concurrent change of the same rule would otherwise be overwritten
+        lock = self._rule_locks.setdefault(schedule_rule_id, asyncio.Lock())
+        async with lock:
+            await self._update_schedule_rule(schedule_rule_id, name, loc_states)
+
+    async def _update_schedule_rule(
+        self, schedule_rule_id: str, name: str, loc_states: dict[str, str]
+    ) -> None:
+        """Helper-function for _set_schedule_rule(): write the changed contexts of the rule."""
         # If no state change is requested, do nothing
-        if state == self._schedule_old_states[loc_id][name]:
+        loc_states = {
+            loc_id: state
+            for loc_id, state in loc_states.items()
+            if state != self._schedule_old_states[loc_id][name]
+        }
+        if not loc_states:
             return
 
-        schedule_rule_id: str = next(iter(schedule_rule))
-        template = (
-            '<template tag="zone_preset_based_on_time_and_presence_with_override" />'
-        )
+        template_id: str | None = None
         if self.check_name(ANNA):
             locator = f'.//*[@id="{schedule_rule_id}"]/template'
             template_id = self._domain_objects.find(locator).get("id")
-            template = f'<template id="{template_id}" />'
-
-        contexts = self.determine_contexts(loc_id, state, schedule_rule_id)
-        data = (
-            "<rules>"
-            f"<rule id='{schedule_rule_id}'>"
-            f"<name><![CDATA[{name}]]></name>"
-            f"{template}"
-            f"{contexts}"
-            "</rule>"
-            "</rules>"
+
+        contexts = self._rule_contexts(schedule_rule_id)
+        for loc_id, state in loc_states.items():
+            context = zone_context(loc_id)
+            contexts = [item for item in contexts if item != context]
+            if state == STATE_ON:
+                contexts.append(context)
+
+        data = schedule_rule(
+            schedule_rule_id,
+            name,
+            contexts,
+            template_id=template_id,
+            template_tag="zone_preset_based_on_time_and_presence_with_override",
         )
         uri = f"{RULES};id={schedule_rule_id}"
         await self.call_request(uri, method="put", data=data)
-        self._schedule_old_states[loc_id][name] = state
-
-    def determine_contexts(self, loc_id: str, state: str, sched_id: str) -> str:
-        """Helper-function for set_schedule_state()."""
-        locator = f'.//*[@id="{sched_id}"]/contexts'
-        contexts = self._domain_objects.find(locator)
-        locator = f'.//*[@id="{loc_id}"].../...'
-        if (subject := contexts.find(locator)) is None:
-            subject = f'<context><zone><location id="{loc_id}" /></zone></context>'
-            subject = etree.fromstring(subject)
-
-        if state == STATE_OFF:
-            contexts.remove(subject)
-        if state == STATE_ON:
-            contexts.append(subject)
-
-        return str(etree.tostring(contexts, encoding="unicode").rstrip())
+        self._schedule_contexts[schedule_rule_id] = contexts
+        for loc_id, state in loc_states.items():
+            self._schedule_old_states[loc_id][name] = state
+
+    def _rule_contexts(self, rule_id: str) -> list[Context]:
+        """Return the contexts of a rule, as last written or else from the XML data."""
+        if (contexts := self._schedule_contexts.get(rule_id)) is not None:
+            return contexts
+
+        return [
+            tuple(
+                (container.tag, item.tag, item.get("id"))
+                for container in context
+                for item in container
+                if item.get("id") is not None
+            )
+            for context in self._domain_objects.findall(
+                f'./rule[@id="{rule_id}"]/contexts/context'
+            )
+        ]
 
     async def set_switch_state(
-        self, appl_id: str, members: list[str] | None, model: str, state: str
+        self,
+        appl_id: str,
+        members: list[str] | None,
+        model: str,
+        state: str,
+        *,
+        results: dict[str, MemberSwitchResult] | None = None,
     ) -> bool | None:
         """Set the given state of the relevant Switch.
 
@@ -438,7 +694,11 @@ class SmileAPI(SmileData):
         For group switches, sets the state for each member in the group separately.
         For switch-locks, sets the lock state using a different data format.
         Return the requested state when successful, the current state otherwise.
+        The outcome per switch, or per group-member, is added to results when provided.
         """
+        if results is None:
+            results = {}
+
         model_type = cast(SwitchType, model)
         try:
             current_state = self.gw_entities[appl_id]["switches"][model_type]
@@ -453,18 +713,14 @@ class SmileAPI(SmileData):
         switch.func = "state"
         switch.method = "put"
         state, switch = model_to_switch_items(model, state, switch)
-        data = (
-            f"<{switch.func_type}>"
-            f"<{switch.func}>{state}</{switch.func}>"
-            f"</{switch.func_type}>"
-        )
+        data = switch_state(switch.func_type, switch.func, state)
         extra = ""
         if switch.device == "toggle":
             extra = f";type={switch.act_type}"
 
         if members is not None:
             return await self._set_groupswitch_member_state(
-                appl_id, data, members, state, switch
+                appl_id, data, members, state, switch, results=results
             )
 
         uri = f"{APPLIANCES};id={appl_id}/{switch.device}{extra}"
@@ -473,31 +729,45 @@ class SmileAPI(SmileData):
             if lock_blocked or lock_blocked is None:
                 # Don't switch a relay when its corresponding lock-state is true or no
                 # lock is present. That means the relay can't be controlled by the user.
+                results[appl_id] = "locked"
                 return current_state
 
         await self.call_request(uri, method=switch.method, data=data)
+        results[appl_id] = "switched"
+        self._patch_entity(appl_id, "switches", requested_state, model)
         return requested_state
 
     async def _set_groupswitch_member_state(
-        self, appl_id: str, data: str, members: list[str], state: str, switch: Munch
+        self,
+        appl_id: str,
+        data: str,
+        members: list[str],
+        state: str,
+        switch: Munch,
+        *,
+        results: dict[str, MemberSwitchResult],
     ) -> bool:
         """Helper-function for set_switch_state().
 
         Set the requested state of the relevant switch within a group of switches.
+        The members are switched concurrently, see _switch_members().
         Return the current group-state when none of the switches has changed its state, the requested state otherwise.
         """
         current_state = self.gw_entities[appl_id]["switches"]["relay"]
         requested_state = state == STATE_ON
-        switched = 0
+        uris: dict[str, str | None] = {}
         for member in members:
-            uri = f"{APPLIANCES};id={member}/{switch.device}"
+            uris[member] = None
             lock_blocked = self.gw_entities[member]["switches"].get("lock")
             # Assume Plugs under Plugwise control are not part of a group
             if lock_blocked is not None and not lock_blocked:
-                await self.call_request(uri, method="put", data=data)
-                switched += 1
+                uris[member] = f"{APPLIANCES};id={member}/{switch.device}"
 
-        if switched > 0:
+        if await self._switch_members(uris, data, results) > 0:
+            self._patch_entity(appl_id, "switches", requested_state, "relay")
+            for member, result in results.items():
+                if result == "switched":
+                    self._patch_entity(member, "switches", requested_state, "relay")
             return requested_state
 
         return current_state
@@ -534,14 +804,36 @@ class SmileAPI(SmileData):
                 f"Plugwise: failed setting temperature: setpoint {setpoint} provided"
             )  # pragma: no cover"
 
-        temperature = str(setpoint)
-        data = (
-            "<thermostat_functionality>"
-            f"<setpoint>{temperature}</setpoint>"
-            "</thermostat_functionality>"
-        )
         uri = self._thermostat_uri(loc_id)
-        await self.call_request(uri, method="put", data=data)
+        await self._coalesced_put(uri, thermostat_setpoint(setpoint))
+        for entity_id in self._climate_entities(loc_id):
+            for key, value in items.items():
+                self._patch_entity(entity_id, "thermostat", value, key)
+
+    async def _coalesced_put(self, uri: str, data: str) -> None:
+        """Latest-wins PUT for rapidly repeated setpoint- and number-writes.
+
+        With a write_coalesce_window set, the writes to the same uri within the window are
+        combined: only the latest data is sent, all callers receive the outcome of that request.
+        """
+        if self.write_coalesce_window <= 0:
+            await self.call_request(uri, method="put", data=data)
+            return
+
+        if (pending := self._pending_writes.get(uri)) is None:
+            pending = self._pending_writes[uri] = Munch(data=data)
+            pending.task = asyncio.create_task(self._send_coalesced_put(uri, pending))
+        else:
+            pending.data = data
+
+        await asyncio.shield(pending.task)
+
+    async def _send_coalesced_put(self, uri: str, pending: Munch) -> None:
+        """Helper-function for _coalesced_put(): send the latest data after the window."""
+        await asyncio.sleep(self.write_coalesce_window)
+        # A write arriving from now on starts a new window
+        self._pending_writes.pop(uri)
+        await self.call_request(uri, method="put", data=pending.data)
 
     async def call_request(self, uri: str, **kwargs: Any) -> None:
         """ConnectionFailedError wrapper for calling request()."""
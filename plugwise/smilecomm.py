@@ -5,13 +5,24 @@ Plugwise Smile communication protocol helpers.
 
 from __future__ import annotations
 
-from plugwise.constants import LOGGER
+import asyncio
+from types import SimpleNamespace
+
+from plugwise.constants import (
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_TIMEOUT,
+    DEFAULT_XML_PARSER,
+    LOGGER,
+)
 from plugwise.exceptions import (
     ConnectionFailedError,
     InvalidAuthentication,
     InvalidXMLError,
     ResponseError,
 )
+from plugwise.parsers import XmlParser, get_xml_parser
 from plugwise.util import escape_illegal_xml_characters
 
 # This way of importing aiohttp is because of patch/mocking in testing (aiohttp timeouts)
@@ -20,10 +31,115 @@ from aiohttp import (
     ClientResponse,
     ClientSession,
     ClientTimeout,
+    ServerDisconnectedError,
+    TCPConnector,
+    TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionReuseconnParams,
     encode_basic_auth,
 )
 from defusedxml import ElementTree as etree
 
+# Consecutive failed connection-reuses before switching to one connection per request
+MAX_FAILED_REUSES = 2
+# Smaller responses are parsed on the event loop, also with executor_offload selected
+MIN_OFFLOAD_SIZE = 16384
+
+
+def parse_xml(result: str, parser: XmlParser | None = None) -> etree.Element:
+    """Parse a gateway response, also used outside of a connection by the fleet-workers."""
+    if parser is None:
+        parser = get_xml_parser()
+
+    # Encode to ensure utf8 parsing
+    return parser.parse(escape_illegal_xml_characters(result).encode())
+
+
+class ConnectionStats:
+    """Connection-reuse statistics of a Plugwise gateway connection.
+
+    The new/reused connections are only counted for sessions created by create_websession().
+    """
+
+    def __init__(self) -> None:
+        """Set the constructor for this class."""
+        self.failed_reuses = 0
+        self.new_connections = 0
+        self.requests = 0
+        self.reused_connections = 0
+
+    @property
+    def reuse_rate(self) -> float | None:
+        """Return the fraction of the requests sent over an already open connection."""
+        if not (total := self.new_connections + self.reused_connections):
+            return None
+
+        return self.reused_connections / total
+
+
+class RequestTrace:
+    """Trace-context of a single request: the connections it was sent over.
+
+    A new connection following a reused one means the reused connection failed,
+    aiohttp retries the idempotent requests itself.
+    """
+
+    def __init__(self, stats: ConnectionStats) -> None:
+        """Set the constructor for this class."""
+        self.failed_reuse = False
+        self.reused = False
+        self.stats = stats
+
+
+async def _on_connection_create(
+    _session: ClientSession,
+    context: SimpleNamespace,
+    _params: TraceConnectionCreateEndParams,
+) -> None:
+    """Trace-callback counting a new connection."""
+    if isinstance(trace := context.trace_request_ctx, RequestTrace):
+        trace.failed_reuse = trace.failed_reuse or trace.reused
+        trace.reused = False
+        trace.stats.new_connections += 1
+
+
+async def _on_connection_reuse(
+    _session: ClientSession,
+    context: SimpleNamespace,
+    _params: TraceConnectionReuseconnParams,
+) -> None:
+    """Trace-callback counting a reused connection."""
+    if isinstance(trace := context.trace_request_ctx, RequestTrace):
+        trace.reused = True
+        trace.stats.reused_connections += 1
+
+
+def create_websession(
+    timeout: int = DEFAULT_TIMEOUT,
+    *,
+    limit_per_host: int = DEFAULT_CONNECTION_LIMIT,
+    keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+    ttl_dns_cache: int = DEFAULT_DNS_CACHE_TTL,
+) -> ClientSession:
+    """Create a ClientSession with a managed connection-pool, can be shared by multiple gateways.
+
+    The connections per gateway are limited, idle connections are kept open for reuse
+    and the host-name resolutions are cached.
+    """
+    connector = TCPConnector(
+        keepalive_timeout=keepalive_timeout,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+    trace_config = TraceConfig()
+    trace_config.on_connection_create_end.append(_on_connection_create)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuse)
+    return ClientSession(
+        connector=connector,
+        timeout=ClientTimeout(total=timeout),
+        trace_configs=[trace_config],
+    )
+
 
 class SmileComm:
     """The SmileComm class."""
@@ -37,11 +153,11 @@ class SmileComm:
         *,
         username: str,
         websession: ClientSession | None,
+        xml_parser: str = DEFAULT_XML_PARSER,
     ) -> None:
         """Set the constructor for this class."""
         if not websession:
-            aio_timeout = ClientTimeout(total=timeout)
-            self._websession = ClientSession(timeout=aio_timeout)
+            self._websession = create_websession(timeout)
         else:
             self._websession = websession
 
@@ -53,6 +169,50 @@ class SmileComm:
             "Authorization": encode_basic_auth(username, password=password)
         }
         self._endpoint = f"http://{host}:{str(port)}"  # Sensitive
+        self._failed_reuses = 0
+        self._headers = self._method_headers()
+        self.connection_stats = ConnectionStats()
+        self.executor_offload = False
+        self.xml_parser = get_xml_parser(xml_parser)
+
+    def _method_headers(self, close: bool = False) -> dict[str, dict[str, str]]:
+        """Prepare the request-headers per method.
+
+        With close selected, request the gateway to close the connection after each response.
+        """
+        base_header = dict(self._base_header)
+        if close:
+            base_header["Connection"] = "close"
+
+        return {
+            "delete": base_header,
+            # Work-around for Stretchv2, should not hurt the other smiles
+            "get": {**base_header, "Accept-Encoding": "gzip"},
+            "post": {**base_header, "Content-type": "text/xml"},
+            "put": {**base_header, "Content-type": "text/xml"},
+        }
+
+    def _check_failed_reuse(
+        self, trace: RequestTrace, exc: ClientError | None = None
+    ) -> None:
+        """Detect a gateway closing its idle connections, as found on legacy firmware.
+
+        A reused connection then fails, costing a retry. After consecutive failures,
+        stop reusing the connections to this gateway. A successful reuse resets the count.
+        """
+        if not (
+            trace.failed_reuse
+            or (trace.reused and isinstance(exc, ServerDisconnectedError))
+        ):
+            if trace.reused and exc is None:
+                self._failed_reuses = 0
+            return
+
+        self.connection_stats.failed_reuses += 1
+        self._failed_reuses += 1
+        if self._failed_reuses == MAX_FAILED_REUSES:
+            LOGGER.debug("Plugwise gateway closes idle connections, stop reusing them")
+            self._headers = self._method_headers(close=True)
 
     async def _request(
         self,
@@ -60,35 +220,45 @@ class SmileComm:
         retry: int = 3,
         method: str = "get",
         data: str | None = None,
+        raw: bool = False,
     ) -> etree.Element:
-        """Get/put/delete data from a give URL."""
+        """Get/put/delete data from a give URL.
+
+        With raw selected, the validated response-text is returned unparsed.
+        """
         resp: ClientResponse
+        headers = self._headers[method]
+        self.connection_stats.requests += 1
+        trace = RequestTrace(self.connection_stats)
         url = f"{self._endpoint}{command}"
         try:
             match method:
                 case "delete":
-                    resp = await self._websession.delete(url, headers=self._base_header)
+                    resp = await self._websession.delete(
+                        url, headers=headers, trace_request_ctx=trace
+                    )
                 case "get":
-                    # Work-around for Stretchv2, should not hurt the other smiles
-                    headers = {**self._base_header, "Accept-Encoding": "gzip"}
-                    resp = await self._websession.get(url, headers=headers)
+                    resp = await self._websession.get(
+                        url, headers=headers, trace_request_ctx=trace
+                    )
                 case "post":
-                    headers = {**self._base_header, "Content-type": "text/xml"}
                     resp = await self._websession.post(
                         url,
                         headers=headers,
                         data=data,
+                        trace_request_ctx=trace,
                     )
                 case "put":
-                    headers = {**self._base_header, "Content-type": "text/xml"}
                     resp = await self._websession.put(
                         url,
                         headers=headers,
                         data=data,
+                        trace_request_ctx=trace,
                     )
         except (
             ClientError
         ) as exc:  # ClientError is an ancestor class of ServerTimeoutError
+            self._check_failed_reuse(trace, exc)
             if retry < 1:
                 LOGGER.warning(
                     "Failed sending %s %s to Plugwise Smile, error: %s",
@@ -97,8 +267,9 @@ class SmileComm:
                     exc,
                 )
                 raise ConnectionFailedError from exc
-            return await self._request(command, retry - 1)
+            return await self._request(command, retry - 1, method, data, raw)
 
+        self._check_failed_reuse(trace)
         if resp.status == 504:
             if retry < 1:
                 LOGGER.warning(
@@ -108,12 +279,12 @@ class SmileComm:
                     "504 Gateway Timeout",
                 )
                 raise ConnectionFailedError
-            return await self._request(command, retry - 1)
+            return await self._request(command, retry - 1, method, data, raw)
 
-        return await self._request_validate(resp, method)
+        return await self._request_validate(resp, method, raw)
 
     async def _request_validate(
-        self, resp: ClientResponse, method: str
+        self, resp: ClientResponse, method: str, raw: bool = False
     ) -> etree.Element:
         """Helper-function for _request(): validate the returned data."""
         match resp.status:
@@ -141,14 +312,23 @@ class SmileComm:
             LOGGER.warning("Smile response empty or error in %s", result)
             raise ResponseError
 
+        if raw:
+            return result
+
+        if self.executor_offload and len(result) >= MIN_OFFLOAD_SIZE:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._parse_xml, result
+            )
+
+        return self._parse_xml(result)
+
+    def _parse_xml(self, result: str) -> etree.Element:
+        """Helper-function for _request_validate(): parse the returned data."""
         try:
-            # Encode to ensure utf8 parsing
-            xml = etree.XML(escape_illegal_xml_characters(result).encode())
-        except etree.ParseError as exc:
+            return parse_xml(result, self.xml_parser)
+        except InvalidXMLError:
             LOGGER.warning("Smile returns invalid XML for %s", self._endpoint)
-            raise InvalidXMLError from exc
-
-        return xml
+            raise
 
     async def close_connection(self) -> None:
         """Close the Plugwise connection."""
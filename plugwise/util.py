@@ -10,6 +10,7 @@ from plugwise.constants import (
     ATTR_UNIT_OF_MEASUREMENT,
     BINARY_SENSORS,
     DATA,
+    DATA_DICTS,
     ELECTRIC_POTENTIAL_VOLT,
     ENERGY_KILO_WATT_HOUR,
     HW_MODELS,
@@ -31,46 +32,21 @@ from plugwise.constants import (
 )
 
 from defusedxml import ElementTree as etree
-from munch import Munch
 
+# P1 measurement-values by (log type, measurement, tariff), see power_log_buckets()
+PowerBuckets = dict[tuple[str, str, str | None], str]
 
-def check_alternative_location(loc: Munch, legacy: bool) -> Munch:
-    """Helper-function for _power_data_peak_value()."""
-    if in_alternative_location(loc, legacy):
-        # Avoid double processing by skipping one peak-list option
-        if loc.peak_select == "nl_offpeak":
-            loc.found = False
-            return loc
+DURATION_PATTERN = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:([\d.]+)S)?)?")
 
-        loc.locator = f'./{loc.log_type}[type="{loc.measurement}"]/period/measurement'
-        if legacy:
-            loc.locator = (
-                f"./{loc.meas_list[0]}_{loc.log_type}/"
-                f'measurement[@directionality="{loc.meas_list[1]}"]'
-            )
-
-        if loc.logs.find(loc.locator) is None:
-            loc.found = False
-            return loc
-
-        return loc
-
-    loc.found = False
-    return loc
 
-
-def in_alternative_location(loc: Munch, legacy: bool) -> bool:
+def in_alternative_location(log_type: str, measurement: str, legacy: bool) -> bool:
     """Look for P1 gas_consumed or phase data (without tariff).
 
     For legacy look for P1 legacy electricity_point_meter or gas_*_meter data.
     """
-    present = "log" in loc.log_type and (
-        "gas" in loc.measurement or "phase" in loc.measurement
-    )
+    present = "log" in log_type and ("gas" in measurement or "phase" in measurement)
     if legacy:
-        present = "meter" in loc.log_type and (
-            "point" in loc.log_type or "gas" in loc.measurement
-        )
+        present = "meter" in log_type and ("point" in log_type or "gas" in measurement)
 
     return present
 
@@ -122,30 +98,6 @@ def check_model(name: str | None, vendor_name: str | None) -> str | None:
     return None
 
 
-def collect_power_values(
-    data: GwEntityData, loc: Munch, tariff: str, legacy: bool = False
-) -> None:
-    """Something."""
-    for loc.peak_select in ("nl_peak", "nl_offpeak"):
-        loc.locator = (
-            f'./{loc.log_type}[type="{loc.measurement}"]/period/'
-            f'measurement[@{tariff}="{loc.peak_select}"]'
-        )
-        if legacy:
-            loc.locator = (
-                f"./{loc.meas_list[0]}_{loc.log_type}/measurement"
-                f'[@directionality="{loc.meas_list[1]}"][@{tariff}="{loc.peak_select}"]'
-            )
-
-        loc = power_data_peak_value(loc, legacy)
-        if not loc.found:
-            continue
-
-        power_data_energy_diff(loc.measurement, loc.net_string, loc.f_val, data)
-        key = cast(SensorType, loc.key_string)
-        data["sensors"][key] = loc.f_val
-
-
 def common_match_cases(
     measurement: str,
     attrs: DATA | UOM,
@@ -175,19 +127,18 @@ def common_match_cases(
         data["binary_sensors"]["low_battery"] = False
 
 
-def count_data_items(count: int, data: GwEntityData) -> int:
-    """When present, count the binary_sensors, sensors and switches dict-items, don't count the dicts.
+def count_data_items(data: GwEntityData) -> int:
+    """Count the data items of an entity.
 
-    Also, count the remaining single data items, the amount of dicts present have already been pre-subtracted in the previous step.
+    The items of the sensor-platform and actuator dicts are counted, not the dicts themselves.
     """
-    if "binary_sensors" in data:
-        count += len(data["binary_sensors"]) - 1
-    if "sensors" in data:
-        count += len(data["sensors"]) - 1
-    if "switches" in data:
-        count += len(data["switches"]) - 1
-
-    count += len(data)
+    count = 0
+    for key, value in data.items():
+        if key in DATA_DICTS and isinstance(value, dict):
+            count += len(value)
+        else:
+            count += 1
+
     return count
 
 
@@ -196,6 +147,40 @@ def escape_illegal_xml_characters(xmldata: str) -> str:
     return re.sub(r"&([^a-zA-Z#])", r"&amp;\1", xmldata)
 
 
+def expected_log_update(xml: etree.Element) -> float | None:
+    """Helper-function for the poll-scheduler.
+
+    Return the number of seconds until the first point_log or interval_log is expected
+    to receive new data: the end of its latest period plus its logging-interval,
+    relative to the gateway time (or to the most recent log-update when not available).
+    Overdue logs are ignored, they may belong to an inactive device.
+    """
+    expected: list[dt.datetime] = []
+    updated: list[dt.datetime] = []
+    for log_type in ("point_log", "interval_log"):
+        for log in xml.iter(log_type):
+            if (
+                updated_date := log.find("updated_date")
+            ) is not None and updated_date.text:
+                updated.append(dt.datetime.fromisoformat(updated_date.text))
+
+            period = log.find("period")
+            interval = parse_duration(log.find("interval"))
+            if period is not None and interval is not None:
+                end_date = dt.datetime.fromisoformat(period.get("end_date"))
+                expected.append(end_date + dt.timedelta(seconds=interval))
+
+    if (gw_time := xml.find("./gateway/time")) is not None and gw_time.text:
+        reference = dt.datetime.fromisoformat(gw_time.text)
+    elif updated:
+        reference = max(updated)
+    else:
+        return None
+
+    waits = [(item - reference).total_seconds() for item in expected]
+    return min((wait for wait in waits if wait > 0), default=None)
+
+
 def format_measure(measure: str, unit: str) -> float | int:
     """Format measure to correct type."""
     float_measure = float(measure)
@@ -227,6 +212,18 @@ def get_vendor_name(module: etree.Element, model_data: ModuleData) -> ModuleData
     return model_data
 
 
+def parse_duration(xml: etree.Element | None) -> float | None:
+    """Convert an ISO 8601 time-duration (e.g. PT5M) to seconds."""
+    if xml is None or not xml.text:
+        return None
+
+    if (match := DURATION_PATTERN.fullmatch(xml.text)) is None:
+        return None
+
+    days, hours, minutes, seconds = (float(item or 0) for item in match.groups())
+    return (((days * 24 + hours) * 60) + minutes) * 60 + seconds or None
+
+
 def power_data_energy_diff(
     measurement: str,
     net_string: SensorType,
@@ -248,9 +245,7 @@ def power_data_energy_diff(
         data["sensors"][net_string] = tmp_val
 
 
-def power_data_local_format(
-    attrs: dict[str, str], key_string: str, val: str
-) -> float | int:
+def power_data_local_format(attrs: UOM, key_string: str, val: str) -> float | int:
     """Format power data."""
     # Special formatting of P1_MEASUREMENT POWER_WATT values, do not move to util-format_measure() function!
     if all(item in key_string for item in ("electricity", "cumulative")):
@@ -261,29 +256,94 @@ def power_data_local_format(
     return format_measure(val, attrs_uom)
 
 
-def power_data_peak_value(loc: Munch, legacy: bool) -> Munch:
-    """Helper-function for _power_data_from_location() and _power_data_from_modules()."""
-    loc.found = True
-    if loc.logs.find(loc.locator) is None:
-        loc = check_alternative_location(loc, legacy)
-        if not loc.found:
-            return loc
+def power_log_buckets(logs: etree.Element, legacy: bool) -> PowerBuckets:
+    """Bucket all P1 measurement-values of the logs in one pass.
+
+    Keyed by (log type, measurement, tariff), the first value of a log type and measurement
+    is also stored without tariff. The actual logs are e.g. point_log elements with a type,
+    the legacy meters e.g. electricity_point_meter elements, with the directionality of the
+    measurement completing the measurement-name.
+    """
+    buckets: PowerBuckets = {}
+    tariff_attr = "tariff_indicator" if legacy else "tariff"
+    for log in logs:
+        if legacy:
+            prefix, _, log_type = log.tag.partition("_")
+            values = log.iterfind("./measurement")
+        else:
+            if (type_element := log.find("type")) is None:
+                continue
+            log_type = log.tag
+            measurement = type_element.text
+            values = log.iterfind("./period/measurement")
+
+        for value in values:
+            if legacy:
+                measurement = f"{prefix}_{value.get('directionality')}"
+            buckets.setdefault(
+                (log_type, measurement, value.get(tariff_attr)), value.text
+            )
+            buckets.setdefault((log_type, measurement, None), value.text)
+
+    return buckets
+
+
+def power_data_from_buckets(
+    module_buckets: list[PowerBuckets],
+    measurements: dict[str, UOM],
+    log_types: tuple[str, ...],
+    legacy: bool,
+) -> GwEntityData:
+    """Derive the P1 sensors, and the net values, from the bucketed measurement-values.
 
-    if (peak := loc.peak_select.partition("_")[2]) == "offpeak":
+    Of multiple legacy modules the values of the last module are kept, the net values are summed.
+    """
+    data: GwEntityData = {"sensors": {}}
+    for measurement, attrs in measurements.items():
+        for buckets in module_buckets:
+            for log_type in log_types:
+                for peak_select in ("nl_peak", "nl_offpeak"):
+                    if (
+                        val := buckets.get((log_type, measurement, peak_select))
+                    ) is None:
+                        # Gas, phase and legacy point data without tariff: once, untariffed
+                        if peak_select == "nl_offpeak" or not in_alternative_location(
+                            log_type, measurement, legacy
+                        ):
+                            continue
+                        if (val := buckets.get((log_type, measurement, None))) is None:
+                            continue
+
+                    power_data_value(
+                        data, measurement, attrs, log_type, peak_select, val
+                    )
+
+    return data
+
+
+def power_data_value(  # noqa: PLR0913, PLR0917
+    data: GwEntityData,
+    measurement: str,
+    attrs: UOM,
+    log_type: str,
+    peak_select: str,
+    val: str,
+) -> None:
+    """Helper-function for power_data_from_buckets(): add a sensor and update the net value."""
+    if (peak := peak_select.partition("_")[2]) == "offpeak":
         peak = "off_peak"
-    log_found = loc.log_type.partition("_")[0]
-    loc.key_string = f"{loc.measurement}_{peak}_{log_found}"
-    if "gas" in loc.measurement or loc.log_type == "point_meter":
-        loc.key_string = f"{loc.measurement}_{log_found}"
+    log_found = log_type.partition("_")[0]
+    key_string = f"{measurement}_{peak}_{log_found}"
+    if "gas" in measurement or log_type == "point_meter":
+        key_string = f"{measurement}_{log_found}"
     # Only for P1 Actual -------------------#
-    if "phase" in loc.measurement:
-        loc.key_string = f"{loc.measurement}"
+    if "phase" in measurement:
+        key_string = f"{measurement}"
     # --------------------------------------#
-    loc.net_string = f"net_electricity_{log_found}"
-    val = loc.logs.find(loc.locator).text
-    loc.f_val = power_data_local_format(loc.attrs, loc.key_string, val)
-
-    return loc
+    net_string = cast(SensorType, f"net_electricity_{log_found}")
+    f_val = power_data_local_format(attrs, key_string, val)
+    power_data_energy_diff(measurement, net_string, f_val, data)
+    data["sensors"][cast(SensorType, key_string)] = f_val
 
 
 def remove_empty_platform_dicts(data: GwEntityData) -> None:
@@ -296,6 +356,14 @@ def remove_empty_platform_dicts(data: GwEntityData) -> None:
         data.pop("switches")
 
 
+def replace_elements(xml: etree.Element, elements: list[etree.Element]) -> None:
+    """Replace the child-elements of xml by the given elements with the same tag and id."""
+    replacements = {(item.tag, item.get("id")): item for item in elements}
+    for index, child in enumerate(list(xml)):
+        if (item := replacements.get((child.tag, child.get("id")))) is not None:
+            xml[index] = item
+
+
 def return_valid(value: etree.Element | None, default: etree.Element) -> etree.Element:
     """Return default when value is None."""
     return value if value is not None else default
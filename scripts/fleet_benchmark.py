@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark the fleet-mode throughput against sequential updates on the event loop.
+
+One userdata-setup is served on localhost (see loop_lag.py) and connected as many gateways.
+The fleet is then updated with 1 up to the number of CPU-cores worker-processes. Example:
+
+    PYTHONPATH=$(pwd) python3 scripts/fleet_benchmark.py adam_plus_anna_new --gateways 100
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import time
+
+from plugwise import Smile
+from plugwise.fleet import Fleet
+from plugwise.smilecomm import create_websession
+
+from loop_lag import serve
+
+
+async def main() -> None:
+    """Run the benchmark and report the updates per second."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("setup", nargs="?", default="adam_plus_anna_new")
+    parser.add_argument("--gateways", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    runner = await serve(args.setup)
+    port = runner.addresses[0][1]
+    websession = create_websession(30, limit_per_host=0)
+    gateways: dict[str, Smile] = {}
+    for index in range(args.gateways):
+        smile = Smile("127.0.0.1", "password", websession, port=port)
+        await smile.connect()
+        gateways[f"gateway_{index}"] = smile
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        await asyncio.gather(*(smile.async_update() for smile in gateways.values()))
+    rate = args.rounds * args.gateways / (time.perf_counter() - start)
+    print(f"event loop only: {rate:8.1f} updates/s")  # noqa: T201
+
+    context = multiprocessing.get_context("forkserver")
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            fleet = Fleet(gateways, executor=executor)
+            await fleet.async_update()  # start the workers
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                await fleet.async_update()
+            rate = args.rounds * args.gateways / (time.perf_counter() - start)
+        print(f"fleet, {workers:2d} workers: {rate:8.1f} updates/s")  # noqa: T201
+
+    await websession.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark the import-time of the plugwise package against a budget.
+
+Every run imports plugwise in a fresh interpreter with -X importtime, the best run is
+reported: the total, the share of the plugwise-modules and the slowest imports.
+Exits with an error when the plugwise-modules exceed the budget, or when legacy support
+is loaded eagerly. The dependencies (aiohttp mostly) are reported but not budgeted.
+"""
+
+import argparse
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 150.0
+DEFAULT_RUNS = 5
+
+
+def measure() -> dict[str, tuple[int, int]]:
+    """Import plugwise in a fresh interpreter, return the (self, cumulative) us per module."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys, plugwise; assert 'plugwise.legacy' not in sys.modules",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    modules: dict[str, tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        modules[name.strip()] = (int(own), int(cumulative))
+
+    return modules
+
+
+def main() -> int:
+    """Run the benchmark, report and check the budget."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="ms")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        best = min(
+            (measure() for _ in range(args.runs)),
+            key=lambda modules: modules["plugwise"][1],
+        )
+    except subprocess.CalledProcessError as exc:
+        print(exc.stderr.splitlines()[-1])  # noqa: T201
+        print("FAIL: legacy support is imported eagerly")  # noqa: T201
+        return 1
+
+    total = best["plugwise"][1] / 1000
+    own = sum(v[0] for k, v in best.items() if k.split(".")[0] == "plugwise") / 1000
+    print(f"import plugwise: {total:.1f} ms, plugwise-modules {own:.1f} ms")  # noqa: T201
+    for name, (own_us, _) in sorted(best.items(), key=lambda x: -x[1][0])[: args.top]:
+        print(f"  {own_us / 1000:8.1f} ms  {name}")  # noqa: T201
+
+    if own > args.budget:
+        print(f"FAIL: over the budget of {args.budget:.0f} ms")  # noqa: T201
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Measure the event-loop lag caused by async_update(), with and without executor_offload.
+
+A userdata-setup is served on localhost by the simulator, a probe-task wakes up every millisecond and records
+how late it was woken up while the updates run. Example:
+
+    PYTHONPATH=$(pwd) python3 scripts/loop_lag.py adam_plus_anna_new --updates 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from plugwise import Smile
+from plugwise.simulator import GatewaySimulator, start_simulators
+from plugwise.smilecomm import create_websession
+
+from aiohttp import web
+
+PROBE_INTERVAL = 0.001
+
+
+async def serve(setup: str) -> web.AppRunner:
+    """Serve a userdata-setup on a free port, without faults."""
+    (runner,) = await start_simulators([GatewaySimulator(setup)])
+    return runner
+
+
+async def probe(lags: list[float], stop: asyncio.Event) -> None:
+    """Record the wake-up delays of a periodic task."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def measure(api: Smile, updates: int, offload: bool) -> list[float]:
+    """Run the updates while probing the loop, return the lags."""
+    api.executor_offload = offload
+    lags: list[float] = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(lags, stop))
+    for _ in range(updates):
+        await api.async_update()
+        await asyncio.sleep(PROBE_INTERVAL)
+    stop.set()
+    await task
+    return lags
+
+
+async def main() -> None:
+    """Run the measurement and report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("setup", nargs="?", default="adam_plus_anna_new")
+    parser.add_argument("--updates", type=int, default=20)
+    args = parser.parse_args()
+
+    runner = await serve(args.setup)
+    port = runner.addresses[0][1]
+    websession = create_websession(10)
+    api = Smile("127.0.0.1", "password", websession, port=port)
+    await api.connect()
+    await api.async_update()
+    for offload in (False, True):
+        lags = sorted(await measure(api, args.updates, offload))
+        p99 = lags[int(0.99 * (len(lags) - 1))]
+        print(  # noqa: T201
+            f"executor_offload={offload}: max {lags[-1] * 1000:.2f} ms, "
+            f"p99 {p99 * 1000:.2f} ms, mean {statistics.fmean(lags) * 1000:.3f} ms"
+        )
+
+    await api.close_connection()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
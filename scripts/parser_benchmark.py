@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Compare the XML parser backends: parse- and extraction-speed per userdata-setup.
+
+Each setup is served on localhost (see loop_lag.py) and connected, the responses of a full
+update are then parsed and collected with each backend. The collected entities must be
+identical for all backends. Example:
+
+    PYTHONPATH=$(pwd) python3 scripts/parser_benchmark.py --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+import sys
+import time
+
+from plugwise import Smile
+from plugwise.exceptions import PlugwiseException
+from plugwise.fleet import collect_snapshot
+from plugwise.parsers import XML_PARSERS, get_xml_parser
+from plugwise.smilecomm import create_websession, parse_xml
+
+from loop_lag import serve
+
+
+def best_of(repeat: int, function, *args) -> float:
+    """Return the fastest run in ms."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+
+    return best * 1000
+
+
+async def fetch(setup: str) -> tuple[bool, dict, dict[str, str]]:
+    """Connect to a served setup, return the legacy-flag, API-config and raw responses."""
+    runner = await serve(setup)
+    websession = create_websession(10)
+    smile = Smile("127.0.0.1", "password", websession, port=runner.addresses[0][1])
+    try:
+        await smile.connect()
+        return smile.smile.legacy, smile.api_config(), await smile.async_fetch_xml()
+    finally:
+        await websession.close()
+        await runner.cleanup()
+
+
+def parse_all(responses: dict[str, str], parser) -> None:
+    """Parse all responses."""
+    for text in responses.values():
+        parse_xml(text, parser)
+
+
+async def main() -> int:
+    """Run the benchmark and check the outputs."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    # The warnings about the faulty setups are reported in the table
+    logging.disable(logging.CRITICAL)
+
+    names = []
+    for name in XML_PARSERS:
+        try:
+            get_xml_parser(name)
+            names.append(name)
+        except PlugwiseException:
+            print(f"{name} is not available, skipped")  # noqa: T201
+
+    header = "".join(f"{name + ' parse':>18}{'collect':>10}" for name in names)
+    print(f"{'setup':40}{header}")  # noqa: T201
+    failed = False
+    for setup in sorted(path.name for path in Path("userdata").iterdir()):
+        if not (Path("userdata") / setup / "core.domain_objects.xml").exists():
+            continue
+        try:
+            legacy, config, responses = await fetch(setup)
+        except PlugwiseException as exc:
+            print(f"{setup:40} not connectable: {exc!r}")  # noqa: T201
+            continue
+
+        row = f"{setup:40}"
+        outputs = set()
+        for name in names:
+            xml_parser = get_xml_parser(name)
+            parse_ms = best_of(args.repeat, parse_all, responses, xml_parser)
+            collect_ms = (
+                best_of(
+                    args.repeat, collect_snapshot, legacy, dict(config), responses, name
+                )
+                - parse_ms
+            )
+            snapshot = collect_snapshot(legacy, dict(config), responses, name)
+            outputs.add(json.dumps(json.loads(snapshot), sort_keys=True))
+            row += f"{parse_ms:15.2f} ms{collect_ms:7.2f} ms"
+        if len(outputs) > 1:
+            row += "  OUTPUT DIFFERS"
+            failed = True
+        print(row)  # noqa: T201
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
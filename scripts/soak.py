@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Soak test: run many update-cycles against simulated gateways and fail on memory growth.
+
+The setups are served by plugwise.simulator with drifting measurements, every --churn cycles
+an appliance is removed from, or put back on, each gateway. The traced memory (tracemalloc)
+and the RSS are sampled; the growth over the second half of the run must stay within the
+budgets, the first half being the warm-up. Example:
+
+    PYTHONPATH=$(pwd) python3 scripts/soak.py --cycles 20000
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import random
+import resource
+import sys
+import tracemalloc
+
+from plugwise import Smile
+from plugwise.simulator import FaultProfile, GatewaySimulator, start_simulators
+from plugwise.smilecomm import create_websession
+
+DEFAULT_SETUPS = ["adam_plus_anna_new", "p1v4_442_single", "stretch_v31"]
+TRACED_BUDGET_KB = 256
+RSS_BUDGET_KB = 8192
+
+
+def rss_kb() -> int:
+    """Return the present resident set size, or the peak where not available."""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def sample(label: str) -> tuple[tracemalloc.Snapshot, int]:
+    """Collect the garbage, return a snapshot and the RSS."""
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    rss = rss_kb()
+    traced = sum(stat.size for stat in snapshot.statistics("filename")) // 1024
+    print(f"{label:>12}: traced {traced:8d} KiB, rss {rss:8d} KiB")  # noqa: T201
+    return snapshot, rss
+
+
+async def main() -> int:
+    """Run the soak test, return 1 on growth beyond the budgets."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("setups", nargs="*", default=DEFAULT_SETUPS)
+    parser.add_argument("--cycles", type=int, default=20000)
+    parser.add_argument("--churn", type=int, default=50, help="cycles per change")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--traced-budget", type=int, default=TRACED_BUDGET_KB)
+    parser.add_argument("--rss-budget", type=int, default=RSS_BUDGET_KB)
+    args = parser.parse_args()
+    # A removed appliance is reported as unavailable, not as a problem here
+    logging.disable(logging.WARNING)
+
+    rand = random.Random(0)
+    simulators = [
+        GatewaySimulator(setup, FaultProfile(drift=0.01, seed=index))
+        for index, setup in enumerate(args.setups)
+    ]
+    runners = await start_simulators(simulators)
+    websession = create_websession(10)
+    gateways = []
+    for simulator, runner in zip(simulators, runners, strict=True):
+        smile = Smile("127.0.0.1", "password", websession, port=runner.addresses[0][1])
+        await smile.connect()
+        gateways.append((simulator, simulator.removable_appliances(), smile))
+
+    tracemalloc.start()
+    samples = []
+    for cycle in range(1, args.cycles + 1):
+        for simulator, ids, smile in gateways:
+            if cycle % args.churn == 0:
+                if simulator.removed:
+                    simulator.restore()
+                elif ids:
+                    simulator.remove(rand.choice(ids))
+            await smile.async_update()
+
+        if cycle % (args.cycles // args.samples or 1) == 0:
+            samples.append(sample(f"cycle {cycle}"))
+
+    await websession.close()
+    for runner in runners:
+        await runner.cleanup()
+
+    (middle, middle_rss), (end, end_rss) = samples[len(samples) // 2 - 1], samples[-1]
+    stats = end.compare_to(middle, "lineno")
+    traced_growth = sum(stat.size_diff for stat in stats) // 1024
+    rss_growth = end_rss - middle_rss
+    print(f"growth, second half: traced {traced_growth} KiB, rss {rss_growth} KiB")  # noqa: T201
+    for stat in stats[:10]:
+        if stat.size_diff > 0:
+            print(f"  {stat}")  # noqa: T201
+
+    if traced_growth > args.traced_budget or rss_growth > args.rss_budget:
+        print("FAILED: memory grows beyond the budget")  # noqa: T201
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -73,6 +73,18 @@ if [ -z "${GITHUB_ACTIONS}" ] || [ "$1" == "linting" ] ; then
     handle_command_error "mypy validation"
 fi
 
+if [ -z "${GITHUB_ACTIONS}" ] || [ "$1" == "benchmark" ] ; then
+    echo "... import-time benchmarking ..."
+    PYTHONPATH=$(pwd) python3 scripts/import_time.py
+    handle_command_error "import-time benchmark"
+fi
+
+if [ "$1" == "soak" ] ; then
+    echo "... memory soak test ..."
+    PYTHONPATH=$(pwd) python3 scripts/soak.py
+    handle_command_error "memory soak test"
+fi
+
 if [ -z "${GITHUB_ACTIONS}" ] || [ "$1" == "fixtures" ] ; then
    echo "... Crafting manual fixtures ..." 
    PYTHONPATH=$(pwd) python3 scripts/manual_fixtures.py
@@ -1,8 +1,14 @@
 """Test Plugwise module Adam related functionality."""
 
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import multiprocessing
+
 import pytest
 
-from .test_init import _LOGGER, TestPlugwise, pw_exceptions
+from defusedxml import ElementTree as etree
+
+from .test_init import _LOGGER, BOGUS, TestPlugwise, pw_exceptions, pw_fleet
 
 SMILE_TYPE = "adam"
 
@@ -69,6 +75,130 @@ class TestPlugwiseAdam(TestPlugwise):  # pylint: disable=attribute-defined-outsi
         ]
         assert api.reboot
 
+        # A targeted refresh of all entities equals the full update
+        data = copy.deepcopy(await api.async_update())
+        refreshed = await api.async_refresh_entities(self.entity_list)
+        assert refreshed == data
+        assert api.item_count == self.entity_items
+
+        # Parsing and collecting in an executor gives the same result
+        api.executor_offload = True
+        assert await api.async_update() == data
+        api.executor_offload = False
+
+        # A fleet-update, collected in a worker-process, gives the same result
+        context = multiprocessing.get_context("forkserver")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            fleet = pw_fleet.Fleet({"adam": api}, executor=executor)
+            assert (await fleet.async_update())["adam"] == data
+        with pytest.raises(pw_exceptions.PlugwiseError):
+            await pw_fleet._no_request("/core/domain_objects")
+
+        # A batch is validated completely before anything is sent
+        requests = api.connection_stats.requests
+        with pytest.raises(pw_exceptions.PlugwiseError):
+            await api.apply_commands(
+                [
+                    {
+                        "command": "set_preset",
+                        "args": {
+                            "loc_id": "f2bf9048bef64cc5b6d5110154e33c81",
+                            "preset": "away",
+                        },
+                    },
+                    {
+                        "command": "set_preset",
+                        "args": {"loc_id": "f871b8c4d63549319221e294e4f88074"},
+                    },
+                    {"command": "reboot_gateway", "args": {}},
+                ]
+            )
+        assert api.connection_stats.requests == requests
+
+        results = await api.apply_commands(
+            [
+                {
+                    "command": "set_preset",
+                    "args": {"loc_id": loc_id, "preset": "away"},
+                }
+                for loc_id in (
+                    "f2bf9048bef64cc5b6d5110154e33c81",
+                    "f871b8c4d63549319221e294e4f88074",
+                )
+            ]
+            + [
+                {
+                    "command": "set_switch_state",
+                    "args": {
+                        "appl_id": "2568cc4b9c1e401495d4741a5f89bee1",
+                        "members": None,
+                        "model": "relay",
+                        "state": "off",
+                    },
+                },
+                {
+                    "command": "set_switch_state",
+                    "args": {
+                        "appl_id": "e8ef2a01ed3b4139a53bf749204fe6b4",
+                        "members": [
+                            "2568cc4b9c1e401495d4741a5f89bee1",
+                            "29542b2b6a6a4169acecc15c72a599b8",
+                        ],
+                        "model": "relay",
+                        "state": "off",
+                    },
+                },
+            ]
+        )
+        assert [result["success"] for result in results] == [True, True, False, True]
+        assert results[0]["result"] is None
+        assert results[0]["switches"] is None
+        # The plug is locked, not switched: also as a member of the group
+        assert results[2]["switches"] == {"2568cc4b9c1e401495d4741a5f89bee1": "locked"}
+        assert results[3]["switches"] == {
+            "2568cc4b9c1e401495d4741a5f89bee1": "locked",
+            "29542b2b6a6a4169acecc15c72a599b8": "switched",
+        }
+        # Two preset-requests, one member-request and one update after the batch
+        assert api.connection_stats.requests == requests + 4
+
+        # Multi-zone schedule changes are combined into a single request,
+        # presets are set per location
+        zones = ["f2bf9048bef64cc5b6d5110154e33c81", "f871b8c4d63549319221e294e4f88074"]
+        requests = api.connection_stats.requests
+        cached = etree.tostring(api._smile_api._domain_objects)
+        await api.set_presets(zones, "home")
+        assert api.connection_stats.requests == requests + 2
+        await api.set_schedule_states(zones, "Badkamer", "on")
+        assert api.connection_stats.requests == requests + 3
+        # The request-bodies are built without modifying the cached XML data
+        assert etree.tostring(api._smile_api._domain_objects) == cached
+        assert all(api._schedule_old_states[zone]["Badkamer"] == "on" for zone in zones)
+        with pytest.raises(pw_exceptions.PlugwiseError):
+            await api.set_presets(zones, BOGUS)
+        await api.set_schedule_states(zones, "Badkamer", "off")
+        # Concurrent changes of the same schedule-rule do not overwrite each other
+        results = await api.apply_commands(
+            [
+                {
+                    "command": "set_select",
+                    "args": {
+                        "key": "select_schedule",
+                        "loc_id": zone,
+                        "option": "Badkamer",
+                        "state": "on",
+                    },
+                }
+                for zone in zones
+            ],
+            refresh=False,
+        )
+        assert all(result["success"] for result in results)
+        rule_id = next(iter(api._smile_api._rule_ids_by_name("Badkamer", zones[0])))
+        contexts = api._smile_api._rule_contexts(rule_id)
+        assert all((("zone", "location", zone),) in contexts for zone in zones)
+        await api.set_schedule_states(zones, "Badkamer", "off")
+
         result = await self.tinker_thermostat(
             api,
             "f2bf9048bef64cc5b6d5110154e33c81",
@@ -226,6 +356,14 @@ class TestPlugwiseAdam(TestPlugwise):  # pylint: disable=attribute-defined-outsi
 
         await self.device_test(api, "2023-12-17 00:00:01", testdata)
 
+        # A refresh reuses the low-battery detection of the full update
+        data = copy.deepcopy(await api.async_update())
+        assert any(
+            entity.get("binary_sensors", {}).get("low_battery")
+            for entity in data.values()
+        )
+        assert await api.async_refresh_entities(list(data)) == data
+
         await api.close_connection()
         await self.disconnect(server, client)
 
@@ -344,6 +482,10 @@ class TestPlugwiseAdam(TestPlugwise):  # pylint: disable=attribute-defined-outsi
             ["02cf28bfec924855854c544690a609ef", "4a810418d5394b3f82727340b91ba740"],
         )
         assert not group_change
+        assert api.member_switch_results == {
+            "02cf28bfec924855854c544690a609ef": "locked",
+            "4a810418d5394b3f82727340b91ba740": "locked",
+        }
 
         await api.close_connection()
         await self.disconnect(server, client)
@@ -1,5 +1,7 @@
 """Test Plugwise module Anna related functionality."""
 
+import asyncio
+
 import pytest
 
 from .test_init import _LOGGER, TestPlugwise, pw_exceptions
@@ -48,6 +50,33 @@ class TestPlugwiseAnna(TestPlugwise):  # pylint: disable=attribute-defined-outsi
         result = await self.tinker_temp_offset(api, "0466eae8520144c78afb29628384edeb")
         assert not result
 
+        # Rapid setpoint-writes are combined into a single request
+        api.write_coalesce_window = 0.05
+        requests = api.connection_stats.requests
+        await asyncio.gather(
+            *(
+                api.set_temperature(
+                    "eb5309212bf5407bb143e5bfa3b18aee", {"setpoint": setpoint}
+                )
+                for setpoint in (20.0, 20.5, 21.0)
+            )
+        )
+        assert api.connection_stats.requests == requests + 1
+        api.write_coalesce_window = 0.0
+
+        # Accepted writes are patched into the entity data, pending confirmation
+        await api.set_preset("eb5309212bf5407bb143e5bfa3b18aee", "away")
+        thermostat = api._smile_api.gw_entities["01b85360fdd243d0aaad4d6ac2a5ba7e"]
+        assert thermostat["active_preset"] == "away"
+        assert thermostat["thermostat"]["setpoint"] == 21.0
+        assert api.pending_updates == {
+            "01b85360fdd243d0aaad4d6ac2a5ba7e": [
+                "thermostat/setpoint",
+                "active_preset",
+                "select_schedule",
+            ]
+        }
+
         # Now change some data and change directory reading xml from
         # emulating reading newer dataset after an update_interval
         testdata_updated = await self.load_testdata(
@@ -58,6 +87,7 @@ class TestPlugwiseAnna(TestPlugwise):  # pylint: disable=attribute-defined-outsi
         await self.device_test(
             api, "2020-04-05 00:00:01", testdata_updated, initialize=False
         )
+        assert not api.pending_updates
 
         await api.close_connection()
         await self.disconnect(server, client)
@@ -1,12 +1,39 @@
 """Test Plugwise module generic functionality."""
 
+import argparse
+import asyncio
+import contextlib
+import copy
+import functools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
 from unittest.mock import patch
 
 import pytest
 
 import aiohttp
 
-from .test_init import _LOGGER, TestPlugwise, pw_exceptions
+from .test_init import (
+    _LOGGER,
+    TestPlugwise,
+    pw_columnar,
+    pw_constants,
+    pw_energy,
+    pw_exceptions,
+    pw_exporter,
+    pw_history,
+    pw_hub,
+    pw_parsers,
+    pw_profiling,
+    pw_scheduler,
+    pw_simulator,
+    pw_smile,
+    pw_smilecomm,
+)
 
 
 class TestPlugwiseGeneric(TestPlugwise):  # pylint: disable=attribute-defined-outside-init
@@ -66,3 +93,690 @@ class TestPlugwiseGeneric(TestPlugwise):  # pylint: disable=attribute-defined-ou
         except pw_exceptions.PlugwiseException:
             setup_result = True
         assert setup_result
+
+    @pytest.mark.asyncio
+    async def test_connection_reuse(self):
+        """Test the managed connection-pool and the connection-reuse statistics."""
+        self.smile_setup = "p1v4_442_single"
+        server = aiohttp.test_utils.TestServer(
+            self.setup_app(), port=aiohttp.test_utils.unused_port(), host="127.0.0.1"
+        )
+        await server.start_server()
+        api = pw_smile.Smile(
+            host=server.host,
+            password="testpass",
+            port=server.port,
+            websession=pw_smilecomm.create_websession(),
+            username=pw_constants.DEFAULT_USERNAME,
+        )
+        await api.connect()
+        await api.async_update()
+        await api.async_update()
+
+        stats = api.connection_stats
+        assert stats.requests == 4
+        assert stats.new_connections == 1
+        assert stats.reused_connections == 3
+        assert stats.reuse_rate == 0.75
+        assert stats.failed_reuses == 0
+
+        await api.close_connection()
+        await server.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_connection_reuse(self):
+        """Test the fallback to a connection per request, after consecutive failed reuses."""
+
+        async def serve(per_connection, reader, writer):
+            # Answer the first requests of a connection, drop it on the next one
+            with contextlib.suppress(asyncio.IncompleteReadError):
+                for _ in range(per_connection):
+                    request = await reader.readuntil(b"\r\n\r\n")
+                    close = b"connection: close" in request.lower()
+                    writer.write(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\n"
+                        + (b"Connection: close\r\n" if close else b"")
+                        + b"Content-Length: 7\r\n\r\n<xml />"
+                    )
+                    await writer.drain()
+                    if close:
+                        break
+                else:
+                    await reader.readuntil(b"\r\n\r\n")
+            writer.close()
+
+        for per_connection, fallback in ((2, False), (1, True)):
+            server = await asyncio.start_server(
+                functools.partial(serve, per_connection), "127.0.0.1", 0
+            )
+            comm = pw_smilecomm.SmileComm(
+                "127.0.0.1",
+                "password",
+                server.sockets[0].getsockname()[1],
+                10,
+                username=pw_constants.DEFAULT_USERNAME,
+                websession=pw_smilecomm.create_websession(),
+            )
+            for _ in range(8):
+                assert await comm._request("/core/domain_objects", raw=True)
+            # As many failed reuses, only the consecutive ones stop the reuse
+            assert comm.connection_stats.failed_reuses == 3
+            assert ("Connection" in comm._headers["get"]) is fallback
+            await comm.close_connection()
+            server.close()
+            await server.wait_closed()
+
+    @pytest.mark.asyncio
+    async def test_tiered_polling_failed_full_update(self):
+        """Test a failed full update is retried, not followed by fast-tier updates."""
+        self.smile_setup = "p1v4_442_single"
+        server, api, client = await self.connect(self.setup_app)
+        api.full_update_interval = 3600.0
+
+        with (
+            patch.object(
+                pw_smile.SmileAPI,
+                "full_xml_update",
+                side_effect=pw_exceptions.ConnectionFailedError,
+            ),
+            pytest.raises(pw_exceptions.ConnectionFailedError),
+        ):
+            await api.async_update()
+        fast_xml_update = pw_smile.SmileAPI.fast_xml_update
+        with patch.object(
+            pw_smile.SmileAPI,
+            "fast_xml_update",
+            autospec=True,
+            side_effect=fast_xml_update,
+        ) as fast_update:
+            await api.async_update()
+            assert not fast_update.called
+            await api.async_update()
+            assert fast_update.call_count == 1
+
+        await api.close_connection()
+        await self.disconnect(server, client)
+
+    @pytest.mark.asyncio
+    async def test_settings_before_connect(self):
+        """Test the settings set before connecting are taken over by the gateway-API."""
+        self.smile_setup = "adam_plus_anna_new"
+        server = aiohttp.test_utils.TestServer(
+            self.setup_app(), port=aiohttp.test_utils.unused_port(), host="127.0.0.1"
+        )
+        await server.start_server()
+        api = pw_smile.Smile(
+            host=server.host,
+            password="testpass",
+            port=server.port,
+            websession=pw_smilecomm.create_websession(),
+            username=pw_constants.DEFAULT_USERNAME,
+        )
+        api.member_concurrency = 1
+        api.write_coalesce_window = 0.5
+        await api.connect()
+        assert api.member_concurrency == 1
+        assert api._smile_api.member_concurrency == 1
+        assert api._smile_api.write_coalesce_window == 0.5
+        api.member_concurrency = 3
+        api.write_coalesce_window = 0.0
+        assert api._smile_api.member_concurrency == 3
+        assert api._smile_api.write_coalesce_window == 0.0
+
+        await api.close_connection()
+        await server.close()
+
+    @pytest.mark.asyncio
+    async def test_offloaded_update_isolation(self):
+        """Test the offloaded collection leaves the served data alone until the swap."""
+        self.smile_setup = "adam_plus_anna_new"
+        server, api, client = await self.connect(self.setup_app)
+        await api.async_update()
+        live = api._smile_api
+        loc_data = dict(live._loc_data)
+        old_states = dict(live._schedule_old_states)
+        untouched = []
+        collect_entities = pw_smile.SmileAPI._collect_entities
+
+        def collect(smile_api):
+            collect_entities(smile_api)
+            untouched.append(
+                all(live._loc_data[key] is value for key, value in loc_data.items())
+                and all(
+                    live._schedule_old_states[key] is value
+                    for key, value in old_states.items()
+                )
+            )
+
+        api.executor_offload = True
+        with patch.object(
+            pw_smile.SmileAPI, "_collect_entities", autospec=True, side_effect=collect
+        ):
+            data = await api.async_update()
+        assert untouched == [True]
+        # The containers shared with the Smile object are updated in place
+        assert api._loc_data is live._loc_data
+        assert live._loc_data == loc_data
+        assert api._schedule_old_states is live._schedule_old_states
+        assert data == await live.async_update()
+
+        await api.close_connection()
+        await self.disconnect(server, client)
+
+    def test_sensor_history(self, tmp_path):
+        """Test the ring-buffer statistics and the file-backed persistence."""
+        series = pw_history.SensorSeries(3)
+        assert series.minimum is None and series.rate is None
+        for timestamp, value in enumerate([5.0, 1.0, 3.0, 4.0, 2.0]):
+            series.append(float(timestamp), value)
+        assert series.samples() == [(2.0, 3.0), (3.0, 4.0), (4.0, 2.0)]
+        assert series.minimum == 2.0
+        assert series.maximum == 4.0
+        assert series.mean == 3.0
+        assert series.rate == -0.5
+
+        history = pw_history.SensorHistory(capacity=3, path=str(tmp_path))
+        for timestamp in range(4):
+            history.update(
+                {"entity": {"sensors": {"temperature": 20.0 + timestamp}}},
+                timestamp=float(timestamp),
+            )
+        history.close()
+
+        history = pw_history.SensorHistory(capacity=3, path=str(tmp_path))
+        restored = history.series("entity", "temperature")
+        assert restored.samples() == [(1.0, 21.0), (2.0, 22.0), (3.0, 23.0)]
+        assert restored.minimum == 21.0
+        assert history.series("entity", "humidity") is None
+        # The series of a removed entity is dropped, including its file
+        history.update({"other": {"sensors": {"temperature": 18.0}}}, timestamp=4.0)
+        assert history.series("entity", "temperature") is None
+        assert not (tmp_path / "entity_temperature.bin").exists()
+        assert history.series("other", "temperature").latest == (4.0, 18.0)
+        history.close()
+
+    def test_lazy_legacy_import(self):
+        """Test legacy support is not loaded by importing plugwise."""
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, plugwise; print('plugwise.legacy' in sys.modules)",
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_xml_parsers(self):
+        """Test the parser backends give the same tree and refuse entity expansion."""
+        with pytest.raises(pw_exceptions.PlugwiseError):
+            pw_parsers.get_xml_parser("bogus")
+
+        bomb = b'<!DOCTYPE x [<!ENTITY a "aaaaaaaaaa">]><x>&a;&a;</x>'
+        with pytest.raises(pw_exceptions.InvalidXMLError):
+            pw_parsers.get_xml_parser().parse(bomb)
+
+        pytest.importorskip("lxml")
+        lxml_parser = pw_parsers.get_xml_parser("lxml")
+        assert "aaaaaaaaaa" not in (lxml_parser.parse(bomb).text or "")
+        with pytest.raises(pw_exceptions.InvalidXMLError):
+            lxml_parser.parse(b"<x>")
+
+        path = os.path.join(
+            pw_simulator.DEFAULT_USERDATA,
+            "adam_plus_anna_new",
+            "core.domain_objects.xml",
+        )
+        with open(path, "rb") as file:
+            data = file.read()
+        trees = [
+            pw_parsers.get_xml_parser(name).parse(data)
+            for name in pw_parsers.XML_PARSERS
+        ]
+        assert len({len(list(tree.iter())) for tree in trees}) == 1
+        assert len({tree.find(".//gateway/time").text for tree in trees}) == 1
+
+    def test_profile(self, tmp_path):
+        """Test the profiling command, on a fixture served by the simulator."""
+        parser = argparse.ArgumentParser()
+        pw_profiling.add_arguments(parser)
+        with pytest.raises(SystemExit):
+            pw_profiling.profile(
+                parser.parse_args(["p1v4_442_single", "--profilers", "bogus"])
+            )
+
+        args = parser.parse_args(
+            [
+                "p1v4_442_single",
+                "--updates",
+                "2",
+                "--top",
+                "3",
+                "--output",
+                str(tmp_path),
+            ]
+        )
+        pw_profiling.profile(args)
+        assert args.fixture == os.path.join(
+            pw_simulator.DEFAULT_USERDATA, "p1v4_442_single"
+        )
+        assert (tmp_path / "plugwise.pstats").stat().st_size
+        stacks = (tmp_path / "plugwise.collapsed").read_text().splitlines()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+        assert "plugwise" in (tmp_path / "plugwise.allocations").read_text()
+
+    @pytest.mark.asyncio
+    async def test_simulator(self):
+        """Test the gateway simulator, its faults and its drifting measurements."""
+        with pytest.raises(ValueError):
+            pw_simulator.FaultProfile(distribution="bogus")
+
+        faults = pw_simulator.FaultProfile(
+            latency=0.001, distribution="exponential", error_504=0.3, seed=1
+        )
+        # The 504s are retried
+        simulator, runner, api = await self.connect_simulator("p1v4_442_single", faults)
+        assert simulator.requests > 2
+
+        faults.error_504 = 0.0
+        faults.drift = 0.01
+        first = await api.async_update()
+        second = await api.async_update()
+        sensors = [
+            next(entity["sensors"] for entity in data.values() if "sensors" in entity)
+            for data in (first, second)
+        ]
+        assert sensors[0] != sensors[1]
+        assert (
+            sensors[1]["electricity_consumed_peak_cumulative"]
+            >= sensors[0]["electricity_consumed_peak_cumulative"]
+        )
+
+        faults.truncated = 1.0
+        with pytest.raises(pw_exceptions.InvalidXMLError):
+            await api.async_update()
+
+        faults.truncated = 0.0
+        faults.unauthorized = 1.0
+        with pytest.raises(pw_exceptions.InvalidAuthentication):
+            await api.async_update()
+
+        await self.disconnect_simulator(runner, api)
+
+    @pytest.mark.asyncio
+    async def test_topology_churn(self):
+        """Test the state of a removed location and its thermostat is dropped, not kept."""
+        simulator, runner, api = await self.connect_simulator(
+            "adam_plus_anna_new", pw_simulator.FaultProfile(drift=0.01, seed=0)
+        )
+        scheduler = pw_scheduler.PollScheduler(api)
+        await scheduler.async_update()
+        await scheduler.async_update()
+        # Bathroom, with its Lisa
+        loc_id = "f871b8c4d63549319221e294e4f88074"
+        thermostat = "e2f4322d57924fa090fbbc48b3a140dc"
+        assert thermostat in scheduler._last_change
+        assert thermostat in simulator.removable_appliances()
+
+        simulator.remove(thermostat)
+        simulator.remove(loc_id)
+        assert simulator.removed == [thermostat, loc_id]
+        data = await scheduler.async_update()
+        assert loc_id not in data
+        assert loc_id not in api._smile_api._loc_data
+        assert loc_id not in api._smile_api._schedule_old_states
+        assert thermostat not in scheduler._last_change
+
+        simulator.restore()
+        data = await api.async_update()
+        assert loc_id in data
+        assert loc_id in api._smile_api._schedule_old_states
+
+        await self.disconnect_simulator(runner, api)
+
+    @pytest.mark.asyncio
+    async def test_exporter(self):
+        """Test the OpenMetrics exposition and its caching."""
+        _simulator, runner, api = await self.connect_simulator("p1v4_442_single")
+        exporter = pw_exporter.MetricsExporter()
+        exporter.update("p1", await api.async_update())
+        exporter.update('p1 "2"', await api.async_update())
+        exporter_runner = aiohttp.web.AppRunner(exporter.app())
+        await exporter_runner.setup()
+        site = aiohttp.web.TCPSite(exporter_runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{exporter_runner.addresses[0][1]}/metrics"
+
+        async with api._websession.get(url) as resp:
+            assert resp.headers["Content-Type"].startswith(
+                "application/openmetrics-text"
+            )
+            text = await resp.text()
+        lines = text.splitlines()
+        assert lines[-1] == "# EOF"
+        assert (
+            "# TYPE plugwise_sensor_electricity_consumed_peak_cumulative counter"
+            in lines
+        )
+        assert "# TYPE plugwise_sensor_net_electricity_cumulative gauge" in lines
+        assert (
+            len(
+                [
+                    line
+                    for line in lines
+                    if line.startswith("# TYPE plugwise_sensor_net_electricity_point ")
+                ]
+            )
+            == 1
+        )
+        assert any(
+            line.startswith(
+                'plugwise_sensor_electricity_consumed_peak_cumulative_total{gateway="p1 \\"2\\""'
+            )
+            for line in lines
+        )
+        assert any(
+            line.startswith("plugwise_binary_sensor_plugwise_notification{")
+            for line in lines
+        )
+
+        # Served from cache until the next update
+        payload = exporter.payload
+        assert exporter.payload is payload
+        exporter.remove("p1")
+        assert exporter.payload is not payload
+        assert 'gateway="p1"' not in exporter.payload.decode()
+        assert exporter.scrapes == 1
+
+        # Non-finite values in the OpenMetrics notation
+        families = pw_exporter.collect_families(
+            "gw",
+            {
+                "entity": {
+                    "sensors": {
+                        "temperature": math.nan,
+                        "power": math.inf,
+                        "setpoint": -math.inf,
+                    }
+                }
+            },
+        )
+        samples = [
+            sample.rsplit(" ", 1)[1]
+            for name in (
+                "plugwise_sensor_temperature",
+                "plugwise_sensor_power",
+                "plugwise_sensor_setpoint",
+            )
+            for sample in families[name][1]
+        ]
+        assert samples == ["NaN", "+Inf", "-Inf"]
+
+        await exporter_runner.cleanup()
+        await self.disconnect_simulator(runner, api)
+
+    @pytest.mark.asyncio
+    async def test_columnar(self):
+        """Test the columnar snapshot of a fleet, and its NumPy and Arrow views."""
+        snapshots = {}
+        for name, fixture in (
+            ("p1", "p1v4_442_single"),
+            ("adam", "adam_plus_anna_new"),
+        ):
+            _simulator, runner, api = await self.connect_simulator(fixture)
+            snapshots[name] = await api.async_update()
+            await self.disconnect_simulator(runner, api)
+
+        columnar = pw_columnar.ColumnarSnapshot(snapshots)
+        rows = len(snapshots["p1"]) + len(snapshots["adam"])
+        assert len(columnar) == rows
+        assert columnar.gateways.count("p1") == len(snapshots["p1"])
+        assert columnar.dev_classes == [
+            entity["dev_class"]
+            for entities in snapshots.values()
+            for entity in entities.values()
+        ]
+        peak = columnar.columns["sensors.electricity_consumed_peak_cumulative"]
+        assert len(peak) == rows
+        assert sum(not math.isnan(value) for value in peak) == 1
+        mask = columnar.dev_class_mask("thermostat")
+        assert sum(mask) == 1
+        assert not any(columnar.dev_class_mask("no_such_class"))
+
+        np = pytest.importorskip("numpy")
+        arrays = columnar.to_numpy()
+        temperature = arrays["sensors.temperature"]
+        assert np.shares_memory(
+            temperature,
+            np.frombuffer(columnar.columns["sensors.temperature"], dtype=np.float64),
+        )
+        zones = arrays["dev_class"] == columnar.dev_class_categories.index("climate")
+        assert np.nanmean(temperature[zones]) == pytest.approx(
+            sum(
+                entity["sensors"]["temperature"]
+                for entity in snapshots["adam"].values()
+                if entity["dev_class"] == "climate"
+            )
+            / sum(columnar.dev_class_mask("climate"))
+        )
+
+        pa = pytest.importorskip("pyarrow")
+        table = columnar.to_arrow()
+        assert table.num_rows == rows
+        assert table.column("dev_class").type == pa.dictionary(pa.int32(), pa.string())
+        assert table.column("sensors.temperature").null_count == 0
+        assert table.column("entity_id").to_pylist() == columnar.entity_ids
+
+    @pytest.mark.asyncio
+    async def test_hub(self, tmp_path):
+        """Test the hub: snapshot then deltas, filters, drop-oldest and socket-subscribers."""
+        simulator, runner, api = await self.connect_simulator(
+            "adam_plus_anna_new", pw_simulator.FaultProfile(drift=0.01, seed=0)
+        )
+        hub = pw_hub.Hub(api)
+        everything = hub.subscribe()
+        thermostat = "ad4838d7d35c4d6ea796ee12ae5aedf8"
+        temperature = hub.subscribe(entities=[thermostat], keys=["temperature"])
+        slow = hub.subscribe(queue_size=2)
+        server = await hub.serve(str(tmp_path / "hub.sock"))
+        reader, writer = await asyncio.open_unix_connection(str(tmp_path / "hub.sock"))
+        writer.write(b'{"keys": ["setpoint"]}\n')
+        await writer.drain()
+        while len(hub.subscriptions) < 4:
+            await asyncio.sleep(0)
+
+        data = await hub.poll()
+        message = await everything.get()
+        assert message == {"type": "snapshot", "data": data}
+        message = await temperature.get()
+        assert message["data"] == {
+            thermostat: {
+                "sensors": {"temperature": data[thermostat]["sensors"]["temperature"]}
+            }
+        }
+        message = json.loads(await reader.readline())
+        assert message["type"] == "snapshot"
+        assert message["data"][thermostat] == {
+            "sensors": {"setpoint": data[thermostat]["sensors"]["setpoint"]}
+        }
+
+        # Drifting measurements: deltas of the changed items only
+        await hub.poll()
+        message = await everything.get()
+        assert message["type"] == "delta"
+        assert message["removed"] == []
+        assert "name" not in message["data"][thermostat]
+        assert (await temperature.get())["type"] == "delta"
+
+        # The removed and restored thermostat
+        simulator.remove(thermostat)
+        await hub.poll()
+        assert thermostat in (await everything.get())["removed"]
+        assert (await temperature.get()) == {
+            "type": "delta",
+            "data": {},
+            "removed": [thermostat],
+            "removed_keys": {},
+        }
+        simulator.restore()
+        await hub.poll()
+        assert "name" in (await everything.get())["data"][thermostat]
+
+        # The slow subscriber missed the oldest messages, resynchronized by the snapshots
+        assert slow.dropped == 2
+        messages = [await slow.get(), await slow.get()]
+        assert [message["type"] for message in messages] == ["snapshot", "snapshot"]
+        assert messages[1]["data"] == hub.snapshot
+
+        # A late subscriber starts with the latest snapshot
+        late = hub.subscribe()
+        assert await late.get() == {"type": "snapshot", "data": hub.snapshot}
+
+        # The keys and data-dict items no longer present are signalled
+        data = copy.deepcopy(hub.snapshot)
+        del data[thermostat]["model_id"]
+        del data[thermostat]["sensors"]["setpoint"]
+        with patch.object(hub._scheduler, "async_update", return_value=data):
+            await hub.poll()
+        assert (await late.get())["removed_keys"] == {
+            thermostat: ["model_id", "sensors.setpoint"]
+        }
+        message = {}
+        async with asyncio.timeout(1):
+            while not message.get("removed_keys"):
+                message = json.loads(await reader.readline())
+        assert message["removed_keys"] == {thermostat: ["sensors.setpoint"]}
+
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        await self.disconnect_simulator(runner, api)
+
+    @pytest.mark.asyncio
+    async def test_legacy_topology_change(self):
+        """Test a legacy full update is performed when the topology has changed only."""
+        simulator, runner, api = await self.connect_simulator("stretch_v31")
+        data = await api.async_update()
+        circle = "059e4d03c7a34d278add5c7a4a781d19"
+        assert circle in data
+        requests = api.connection_stats.requests
+        # Unchanged: domain_objects and appliances only
+        await api.async_update()
+        assert api.connection_stats.requests == requests + 2
+
+        simulator.remove(circle)
+        data = await api.async_update()
+        assert circle not in data
+        assert all(circle not in entity.get("members", []) for entity in data.values())
+        # Changed: the refreshed XML data is reused, the locations and modules are added
+        assert api.connection_stats.requests == requests + 6
+
+        simulator.restore()
+        data = await api.async_update()
+        assert circle in data
+
+        group = "d03738edfcc947f7b8f4573571d90d2d"
+        assert group in data
+        simulator.remove(group)
+        data = await api.async_update()
+        assert group not in data
+        simulator.restore()
+        data = await api.async_update()
+        assert data[group]["members"] == [
+            circle,
+            "cfe95cf3de1948c0b8955125bf754614",
+        ]
+
+        await self.disconnect_simulator(runner, api)
+
+    def test_energy_aggregation(self):
+        """Test the energy windows: counter resets, missed polls and the fleet-totals."""
+        with pytest.raises(ValueError):
+            pw_energy.EnergyAggregator(windows=(3600, 1000), resolution=300)
+
+        aggregator = pw_energy.EnergyAggregator(windows=(3600,), resolution=300)
+        sensor = "electricity_consumed_peak_cumulative"
+        hour = 1_699_999_200.0
+
+        def update(gateway, offset, meter, plug=None):
+            entities = {
+                "meter": {"sensors": {sensor: meter}},
+                "zone": {"sensors": {"electricity_consumed": 50.0}},
+            }
+            if plug is not None:
+                entities["plug"] = {
+                    "sensors": {
+                        "electricity_consumed": plug,
+                        "electricity_consumed_interval": 1.0,
+                    }
+                }
+            aggregator.update(entities, hour + offset, gateway)
+
+        update("p1", 0, 100.0, 100.0)
+        update("p1", 600, 100.5, 200.0)
+        update("p1", 1200, 0.25, 200.0)  # counter reset
+        assert aggregator.resets == 1
+        meter = aggregator.series("meter", sensor, "p1")
+        assert meter.tumbling(3600) == (hour, pytest.approx(0.75))
+        plug = aggregator.series("plug", "electricity_consumed", "p1")
+        assert plug.tumbling(3600)[1] == pytest.approx((150 + 200) * 600 / 3.6e6)
+        assert aggregator.series("zone", "electricity_consumed", "p1") is None
+
+        # Missed polls: the energy is spread over the hours, the power-gap not estimated
+        update("p1", 4200, 1.45, 100.0)
+        assert meter.tumbling(3600) == (hour + 3600, pytest.approx(0.24))
+        assert meter.previous(3600) == (hour, pytest.approx(0.75 + 0.96))
+        assert meter.sliding(3600) == pytest.approx(0.125 + 1.2)
+        assert aggregator.gaps == 1
+
+        update("p1", 4500, 1.45)
+        assert meter.sliding(3600) == pytest.approx(1.2)
+        assert aggregator.series("plug", "electricity_consumed", "p1") is None
+
+        update("p1b", 0, 10.0)
+        update("p1b", 600, 11.0)
+        fleet = aggregator.fleet(sensor)
+        assert fleet.previous(3600) == (hour, pytest.approx(0.75 + 0.96 + 1.0))
+        assert fleet.tumbling(3600) == (hour + 3600, pytest.approx(0.24))
+        assert aggregator.series("meter", sensor, "p1b").tumbling(3600)[1] == 1.0
+
+    def test_energy_windows_exact(self):
+        """Test the energy windows against a brute-force sum, with gaps of any length."""
+        rng = random.Random(42)
+        windows = pw_energy.EnergyWindows(windows=(900, 3600), resolution=300)
+        periods = []
+        timestamp = 1_699_999_200.0
+        for _ in range(300):
+            step = rng.choice((rng.uniform(1, 600), rng.uniform(600, 9000)))
+            energy = rng.uniform(0, 2)
+            windows.add(timestamp, timestamp + step, energy)
+            periods.append((timestamp, timestamp + step, energy))
+            timestamp += step
+
+            current = math.floor(timestamp / 300)
+
+            def total(first, last):
+                """Return the energy of the slots first up to last, brute-force."""
+                begin, finish = first * 300, (last + 1) * 300
+                return sum(
+                    energy * (min(end, finish) - max(start, begin)) / (end - start)
+                    for start, end, energy in periods
+                    if end > begin and start < finish
+                )
+
+            for window in (900, 3600):
+                length = window // 300
+                period = current // length * length
+                assert windows.sliding(window) == pytest.approx(
+                    total(current - length + 1, current), abs=1e-9
+                )
+                assert windows.tumbling(window) == (
+                    period * 300,
+                    pytest.approx(total(period, current), abs=1e-9),
+                )
+                assert windows.previous(window) == (
+                    (period - length) * 300,
+                    pytest.approx(total(period - length, period - 1), abs=1e-9),
+                )
@@ -18,12 +18,24 @@ import pytest
 # Testing
 import aiofiles
 import aiohttp
+from defusedxml import ElementTree as etree
 from freezegun import freeze_time
 from packaging import version
 
+pw_columnar = importlib.import_module("plugwise.columnar")
 pw_constants = importlib.import_module("plugwise.constants")
+pw_energy = importlib.import_module("plugwise.energy")
 pw_exceptions = importlib.import_module("plugwise.exceptions")
+pw_exporter = importlib.import_module("plugwise.exporter")
+pw_fleet = importlib.import_module("plugwise.fleet")
+pw_history = importlib.import_module("plugwise.history")
+pw_hub = importlib.import_module("plugwise.hub")
+pw_parsers = importlib.import_module("plugwise.parsers")
+pw_profiling = importlib.import_module("plugwise.profiling")
+pw_scheduler = importlib.import_module("plugwise.scheduler")
+pw_simulator = importlib.import_module("plugwise.simulator")
 pw_smile = importlib.import_module("plugwise")
+pw_smilecomm = importlib.import_module("plugwise.smilecomm")
 
 pytestmark = pytest.mark.asyncio
 
@@ -132,6 +144,10 @@ class TestPlugwise:  # pylint: disable=attribute-defined-outside-init
             app.router.add_route("PUT", CORE_LOCATIONS_TAIL, self.smile_timeout)
             app.router.add_route("DELETE", CORE_NOTIFICATIONS_TAIL, self.smile_timeout)
             app.router.add_route("PUT", CORE_RULES_TAIL, self.smile_timeout)
+
+        if not (broken or raise_timeout or timeout_happened):
+            app.router.add_get(CORE_APPLIANCES_TAIL, self.smile_core_appliances)
+            app.router.add_get(CORE_LOCATIONS_TAIL, self.smile_core_locations)
         return app
 
     def setup_legacy_app(
@@ -205,6 +221,28 @@ class TestPlugwise:  # pylint: disable=attribute-defined-outside-init
             data = await filedata.read()
         return aiohttp.web.Response(text=data)
 
+    async def smile_core_elements(self, request, tag):
+        """Render the elements of a type, or the one with the requested id, from the domain objects."""
+        userdata = os.path.join(
+            os.path.dirname(__file__),
+            f"../userdata/{self.smile_setup}/core.domain_objects.xml",
+        )
+        async with aiofiles.open(userdata, encoding="utf-8") as filedata:
+            data = await filedata.read()
+
+        item_id = request.match_info["tail"].partition(";id=")[2]
+        return aiohttp.web.Response(
+            text=pw_simulator.render_elements(etree.fromstring(data), tag, item_id)
+        )
+
+    async def smile_core_appliances(self, request):
+        """Render the appliances from the domain objects."""
+        return await self.smile_core_elements(request, "appliance")
+
+    async def smile_core_locations(self, request):
+        """Render the locations from the domain objects."""
+        return await self.smile_core_elements(request, "location")
+
     async def smile_locations(self, request):
         """Render setup specific locations endpoint."""
         userdata = os.path.join(
@@ -365,6 +403,19 @@ class TestPlugwise:  # pylint: disable=attribute-defined-outside-init
             await self.disconnect(server, client)
             raise exception
 
+    async def connect_simulator(self, fixture, faults=None):
+        """Connect to a simulated gateway serving a fixture, return the simulator, its runner and the api."""
+        simulator = pw_simulator.GatewaySimulator(fixture, faults)
+        (runner,) = await pw_simulator.start_simulators([simulator])
+        api = pw_smile.Smile(
+            "127.0.0.1",
+            "password",
+            pw_smilecomm.create_websession(),
+            port=runner.addresses[0][1],
+        )
+        await api.connect()
+        return simulator, runner, api
+
     # Wrap connect for invalid connections
     async def connect_wrapper(
         self, raise_timeout=False, fail_auth=False, stretch=False
@@ -458,6 +509,12 @@ class TestPlugwise:  # pylint: disable=attribute-defined-outside-init
         await client.session.close()
         await server.close()
 
+    @classmethod
+    async def disconnect_simulator(cls, runner, api):
+        """Disconnect from a simulated gateway and stop it."""
+        await api.close_connection()
+        await runner.cleanup()
+
     @staticmethod
     def show_setup(location_list, entity_list):
         """Show informative outline of the setup."""
@@ -63,6 +63,7 @@ class TestPlugwiseP1(TestPlugwise):  # pylint: disable=attribute-defined-outside
         await self.device_test(
             api, "2022-05-16 00:00:01", testdata_updated, initialize=False
         )
+        assert self.entity_items == 26
 
         await api.close_connection()
         await self.disconnect(server, client)
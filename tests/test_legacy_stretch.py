@@ -1,8 +1,12 @@
 """Test Plugwise module Stretch related functionality."""
 
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from unittest.mock import patch
+
 import pytest
 
-from .test_init import _LOGGER, TestPlugwise
+from .test_init import _LOGGER, TestPlugwise, pw_exceptions, pw_fleet
 
 SMILE_TYPE = "stretch"
 
@@ -31,12 +35,50 @@ class TestPlugwiseStretch(TestPlugwise):  # pylint: disable=attribute-defined-ou
         assert api.gateway_id == "0000aaaa0000aaaa0000aaaa0000aa00"
         assert self.entity_items == 85
 
+        # A legacy fleet-update, collected in a worker-process
+        context = multiprocessing.get_context("forkserver")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            fleet = pw_fleet.Fleet({"stretch": api}, executor=executor)
+            snapshots = await fleet.async_update()
+        assert snapshots["stretch"] == await api.async_update()
+
         switch_change = await self.tinker_switch(
             api,
             "059e4d03c7a34d278add5c7a4a781d19",
         )
         assert not switch_change
 
+        # A member failing with an error-response does not stop the other members
+        group = "d950b314e9d8499f968e6db8d82ef78c"
+        members = api._smile_api.gw_entities[group]["members"]
+        failing = "5871317346d045bc9f6b987ef25ee638"
+        request = api._smile_api._request
+
+        async def fail_member(uri, *args, **kwargs):
+            if failing in uri:
+                raise pw_exceptions.ResponseError
+            return await request(uri, *args, **kwargs)
+
+        with patch.object(api._smile_api, "_request", side_effect=fail_member):
+            assert not await api.set_switch_state(group, members, "relay", "off")
+        assert api.member_switch_results == {
+            "059e4d03c7a34d278add5c7a4a781d19": "locked",
+            failing: "failed",
+            "aac7b735042c4832ac9ff33aae4f453b": "switched",
+            "cfe95cf3de1948c0b8955125bf754614": "switched",
+            "e1c884e7dede431dadee09506ec4f859": "switched",
+        }
+        with (
+            patch.object(
+                api._smile_api,
+                "_request",
+                side_effect=pw_exceptions.ResponseError,
+            ),
+            pytest.raises(pw_exceptions.ResponseError),
+        ):
+            await api.set_switch_state(group, members, "relay", "off")
+        assert set(api.member_switch_results.values()) == {"locked", "failed"}
+
         # Now change some data and change directory reading xml from
         # emulating reading newer dataset after an update_interval
         testdata_updated = await self.load_testdata(
@@ -46,6 +88,7 @@ class TestPlugwiseStretch(TestPlugwise):  # pylint: disable=attribute-defined-ou
         await self.device_test(
             api, "2022-05-16 00:00:01", testdata_updated, initialize=False
         )
+        assert self.entity_items == 85
 
         await api.close_connection()
         await self.disconnect(server, client)
@@ -84,6 +127,17 @@ class TestPlugwiseStretch(TestPlugwise):  # pylint: disable=attribute-defined-ou
             ["407aa1c1099d463c9137a3a9eda787fd"],
         )
         assert switch_change
+        assert api.member_switch_results == {
+            "407aa1c1099d463c9137a3a9eda787fd": "switched"
+        }
+        # Sequential fallback
+        api.member_concurrency = 1
+        switch_change = await self.tinker_switch(
+            api,
+            "f7b145c8492f4dd7a4de760456fdef3e",
+            ["407aa1c1099d463c9137a3a9eda787fd"],
+        )
+        assert switch_change
 
         await api.close_connection()
         await self.disconnect(server, client)
@@ -1,8 +1,10 @@
 """Test Plugwise module P1 related functionality."""
 
+import copy
+
 import pytest
 
-from .test_init import _LOGGER, TestPlugwise, pw_exceptions
+from .test_init import _LOGGER, TestPlugwise, pw_exceptions, pw_history, pw_scheduler
 
 SMILE_TYPE = "p1"
 
@@ -26,6 +28,15 @@ class TestPlugwiseP1(TestPlugwise):  # pylint: disable=attribute-defined-outside
             smile_version="4.4.2",
         )
 
+        scheduler = pw_scheduler.PollScheduler(api, max_interval=120.0)
+        await scheduler.async_update()
+        assert api.next_log_update == 150.0
+        assert scheduler.interval == 120.0
+
+        data = copy.deepcopy(await api.async_update())
+        assert await api.async_refresh_entities(list(data)) == data
+
+        api.history = pw_history.SensorHistory(capacity=4)
         await self.device_test(api, "2022-05-16 00:00:01", testdata)
         assert api.gateway_id == "a455b61e52394b2db5081ce025a430f3"
         assert self.entity_items == 33
@@ -37,9 +48,25 @@ class TestPlugwiseP1(TestPlugwise):  # pylint: disable=attribute-defined-outside
             SMILE_TYPE, f"{self.smile_setup}_UPDATED_DATA"
         )
         self.smile_setup = "updated/p1v4_442_single"
+        # Tiered polling: only the home location is refreshed, in an executor
+        api.full_update_interval = 3600.0
+        api.executor_offload = True
         await self.device_test(
             api, "2022-05-16 00:00:01", testdata_updated, initialize=False
         )
+        meter = "ba4de7613517478da82dd9b6abea36af"
+        net_point = api.history.series(meter, "net_electricity_point")
+        assert len(net_point) == 2
+        assert net_point.minimum == -2248.0
+        assert net_point.maximum == 486.0
+        assert net_point.mean == -881.0
+        produced = api.history.series(meter, "electricity_produced_peak_point")
+        assert [value for _, value in produced.samples()] == [0.0, 2248.0]
+        consumed = api.history.series(meter, "electricity_consumed_off_peak_point")
+        assert consumed.maximum == 486.0
+        api.history.close()
+        api.full_update_interval = None
+        api.executor_offload = False
 
         # Simulate receiving no xml-data after a requesting a reboot of the gateway
         self.smile_setup = "reboot/p1v4_442_single"